@@ -0,0 +1,92 @@
+"""
+Async read-only views for the product and category API.
+
+These mirror the list and detail endpoints of `ProductViewSet`,
+`CategoryViewSet` and `CategoryDetailView` (same filters, pagination and JSON
+schema) but run on Django's async ORM, so under an ASGI server a slow query
+only suspends its coroutine instead of blocking a whole worker.
+"""
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from apps.api_app.filters import CategoryFilter, ProductFilter
+from apps.api_app.renderers import FastJSONRenderer
+from apps.api_app.serializers import CategoryRowSerializer, ProductRowSerializer
+from apps.crawler_app.models import Category, Product
+
+product_serializer = ProductRowSerializer()
+category_serializer = CategoryRowSerializer()
+
+
+def json_response(data, status: int = 200) -> HttpResponse:
+    return HttpResponse(
+        FastJSONRenderer().render(data), content_type="application/json", status=status
+    )
+
+
+def filter_errors(filterset) -> HttpResponse:
+    """The 400 response DRF's `DjangoFilterBackend` returns for invalid filters."""
+    errors = {name: list(messages) for name, messages in filterset.errors.items()}
+    return json_response(errors, status=400)
+
+
+async def paginate(request, queryset, row_serializer) -> dict:
+    """Async counterpart of DRF's `PageNumberPagination` (same response shape)."""
+    page_size = settings.REST_FRAMEWORK["PAGE_SIZE"]
+    try:
+        page = int(request.GET.get("page", 1))
+    except ValueError:
+        raise Http404("Invalid page.")
+
+    count = await queryset.acount()
+    offset = (page - 1) * page_size
+    if page < 1 or (offset >= count and page != 1):
+        raise Http404("Invalid page.")
+
+    rows = row_serializer.get_queryset(queryset)[offset : offset + page_size]
+    results = [row_serializer.to_representation(row) async for row in rows]
+
+    def page_url(number):
+        query = request.GET.copy()
+        query["page"] = number
+        return request.build_absolute_uri(f"{request.path}?{query.urlencode()}")
+
+    return {
+        "count": count,
+        "next": page_url(page + 1) if offset + page_size < count else None,
+        "previous": page_url(page - 1) if page > 1 else None,
+        "results": results,
+    }
+
+
+async def detail(queryset, row_serializer, **lookup) -> HttpResponse:
+    row = await row_serializer.get_queryset(queryset.filter(**lookup)).afirst()
+    if row is None:
+        raise Http404("No matching object.")
+    return json_response(row_serializer.to_representation(row))
+
+
+async def product_list(request):
+    filterset = ProductFilter(request.GET, queryset=Product.objects.order_by("id"))
+    if not filterset.is_valid():
+        return filter_errors(filterset)
+    return json_response(await paginate(request, filterset.qs, product_serializer))
+
+
+async def product_detail(request, pk):
+    return await detail(Product.objects.all(), product_serializer, pk=pk)
+
+
+async def category_list(request):
+    filterset = CategoryFilter(request.GET, queryset=Category.objects.order_by("id"))
+    if not filterset.is_valid():
+        return filter_errors(filterset)
+    return json_response(await paginate(request, filterset.qs, category_serializer))
+
+
+async def category_detail(request, pk):
+    return await detail(Category.objects.all(), category_serializer, pk=pk)
+
+
+async def category_detail_by_slug(request, slug):
+    return await detail(Category.objects.all(), category_serializer, slug=slug)
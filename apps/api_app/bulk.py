@@ -0,0 +1,228 @@
+import json
+from itertools import islice
+from django.conf import settings
+from django.db import transaction
+from rest_framework import serializers
+from apps.crawler_app.cache import bump_data_version
+from apps.crawler_app.models import (
+    TRACKED_FIELDS,
+    Category,
+    Product,
+    ProductChange,
+    store_blobs,
+)
+
+
+class ProductBulkSerializer(serializers.ModelSerializer):
+    """
+    Validates one record of a bulk write.
+
+    `category_id` is a plain integer and `site_id` has no unique validator, so
+    validating a record runs no queries; both are checked per chunk instead.
+    """
+
+    category_id = serializers.IntegerField()
+    description = serializers.CharField(
+        allow_blank=True, allow_null=True, required=False
+    )
+    specifications = serializers.JSONField(required=False)
+    images = serializers.ListField(child=serializers.URLField(), default=list)
+
+    class Meta:
+        model = Product
+        fields = [
+            "site_id",
+            "title",
+            "original_price",
+            "discount_price",
+            "description",
+            "specifications",
+            "category_id",
+            "url",
+            "images",
+            "availability",
+        ]
+        extra_kwargs = {"site_id": {"validators": []}}
+
+
+# Columns rewritten on conflict; blob-backed properties map to their foreign keys
+UPDATE_FIELDS = [
+    {"description": "description_blob", "specifications": "specifications_blob"}.get(
+        field, field
+    )
+    for field in ProductBulkSerializer.Meta.fields
+    if field != "site_id"
+] + ["updated_at"]
+
+
+def iter_records(request):
+    """
+    Yields the records of a bulk request body.
+
+    NDJSON bodies (`application/x-ndjson`) are read line by line from the
+    request stream; JSON bodies must hold an array of records.
+    """
+    if request.content_type.startswith("application/x-ndjson"):
+        for line in request._request:
+            if line.strip():
+                yield json.loads(line)
+        return
+
+    records = json.loads(request._request.read() or b"[]")
+    if not isinstance(records, list):
+        raise ValueError("Expected a JSON array of records")
+    yield from records
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class BulkProductWriter:
+    """
+    Applies bulk product writes chunk by chunk inside one transaction.
+
+    Each record is either an upsert (the default) or `{"op": "delete",
+    "site_id": ...}`. Upserts become a single `INSERT ... ON CONFLICT
+    (site_id) DO UPDATE` per chunk and deletes a single `DELETE ... WHERE
+    site_id IN (...)`. Only the last operation on a `site_id` within a chunk
+    is applied and the earlier ones are reported as superseded; invalid
+    records are reported and skipped.
+    """
+
+    def __init__(self, chunk_size: int = None):
+        self.chunk_size = chunk_size or settings.BULK_WRITE_CHUNK_SIZE
+        self.results = []
+        self.totals = {
+            "created": 0,
+            "updated": 0,
+            "deleted": 0,
+            "superseded": 0,
+            "errors": 0,
+        }
+
+    def write(self, records) -> dict:
+        with transaction.atomic():
+            offset = 0
+            for chunk in chunked(records, self.chunk_size):
+                self._write_chunk(offset, chunk)
+                offset += len(chunk)
+            # Bulk inserts skip model signals, so invalidate API caches here
+            transaction.on_commit(bump_data_version)
+        self.results.sort(key=lambda result: result["index"])
+        return {**self.totals, "results": self.results}
+
+    def _report(self, index, site_id, status, errors=None):
+        result = {"index": index, "site_id": site_id, "status": status}
+        if errors:
+            result["errors"] = errors
+            self.totals["errors"] += 1
+        else:
+            self.totals[status] += 1
+        self.results.append(result)
+
+    def _write_chunk(self, offset, chunk):
+        # The last valid operation on each site_id wins, as if run in order
+        operations = {}
+        # Superseded upserts, so deleting them afterwards is not "Not found"
+        upserted = set()
+        for index, record in enumerate(chunk, start=offset):
+            if not isinstance(record, dict):
+                self._report(
+                    index, None, "error", {"non_field_errors": ["Not an object"]}
+                )
+                continue
+            site_id = record.get("site_id")
+            if record.get("op", "upsert") == "delete":
+                if not site_id:
+                    self._report(index, None, "error", {"site_id": ["Required"]})
+                    continue
+                site_id, data = str(site_id), None
+            else:
+                serializer = ProductBulkSerializer(data=record)
+                if not serializer.is_valid():
+                    self._report(index, site_id, "error", serializer.errors)
+                    continue
+                data = serializer.validated_data
+                site_id = data["site_id"]
+
+            if site_id in operations:
+                previous, previous_data = operations[site_id]
+                if previous_data is not None:
+                    upserted.add(site_id)
+                self._report(previous, site_id, "superseded")
+            operations[site_id] = (index, data)
+
+        upserts = {
+            site_id: (index, data)
+            for site_id, (index, data) in operations.items()
+            if data is not None
+        }
+        deletes = {
+            site_id: index
+            for site_id, (index, data) in operations.items()
+            if data is None
+        }
+        if upserts:
+            self._upsert(upserts)
+        if deletes:
+            self._delete(deletes, upserted)
+
+    def _upsert(self, upserts):
+        category_ids = {data["category_id"] for _, data in upserts.values()}
+        known_categories = set(
+            Category.objects.filter(id__in=category_ids).values_list("id", flat=True)
+        )
+        existing = set(
+            Product.objects.filter(site_id__in=upserts).values_list(
+                "site_id", flat=True
+            )
+        )
+
+        products = []
+        for site_id, (index, data) in upserts.items():
+            if data["category_id"] not in known_categories:
+                self._report(index, site_id, "error", {"category_id": ["Not found"]})
+                continue
+            products.append(Product(**data))
+            self._report(
+                index, site_id, "updated" if site_id in existing else "created"
+            )
+
+        store_blobs(products)
+        Product.objects.bulk_create(
+            products,
+            update_conflicts=True,
+            unique_fields=["site_id"],
+            update_fields=UPDATE_FIELDS,
+        )
+        # Bulk writes skip the model signals, so record the changes here
+        ProductChange.objects.bulk_create(
+            ProductChange(
+                product_id=product.pk,
+                site_id=product.site_id,
+                action=(
+                    ProductChange.UPDATED
+                    if product.site_id in existing
+                    else ProductChange.INSERTED
+                ),
+                # The values it replaced are unknown, any may have changed
+                fields=list(TRACKED_FIELDS) if product.site_id in existing else [],
+            )
+            for product in products
+        )
+
+    def _delete(self, deletes, upserted=()):
+        existing = set(
+            Product.objects.filter(site_id__in=deletes).values_list(
+                "site_id", flat=True
+            )
+        )
+        Product.objects.filter(site_id__in=existing).delete()
+        for site_id, index in deletes.items():
+            if site_id in existing or site_id in upserted:
+                self._report(index, site_id, "deleted")
+            else:
+                self._report(index, site_id, "error", {"site_id": ["Not found"]})
@@ -0,0 +1,126 @@
+import csv
+import json
+from concurrent.futures import ThreadPoolExecutor
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections, transaction
+from django.http import StreamingHttpResponse
+from apps.api_app.bulk import chunked
+from apps.api_app.renderers import FastJSONRenderer
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+class _LineBuffer:
+    """File-like object whose `write` returns the line instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def iterate_in_transaction(queryset, chunk_size):
+    """
+    `queryset.iterator()` inside a transaction that lasts as long as the stream.
+
+    Outside a transaction, PostgreSQL server-side cursors are declared `WITH
+    HOLD`, which materializes the whole result set when the transaction
+    commits.
+    """
+    with transaction.atomic(using=queryset.db):
+        yield from queryset.iterator(chunk_size=chunk_size)
+
+
+async def iterate_in_thread(chunks, using: str):
+    """
+    Async iteration of a sync chunk generator, one chunk per thread hop.
+
+    The generator holds a transaction and a server-side cursor, so every step
+    runs in the same dedicated thread (and its own database connection)
+    rather than the shared thread of `sync_to_async`.
+    """
+    executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="export")
+    step = sync_to_async(next, thread_sensitive=False, executor=executor)
+    done = object()
+    try:
+        while (chunk := await step(chunks, done)) is not done:
+            yield chunk
+    finally:
+        await sync_to_async(_close, thread_sensitive=False, executor=executor)(
+            chunks, using
+        )
+        executor.shutdown(wait=False)
+
+
+def _close(chunks, using):
+    chunks.close()
+    connections[using].close()
+
+
+def ndjson_chunks(row_serializer, rows, chunk_size):
+    renderer = FastJSONRenderer()
+    for chunk in chunked(rows, chunk_size):
+        yield b"".join(
+            renderer.render(row_serializer.to_representation(row)) + b"\n"
+            for row in chunk
+        )
+
+
+def csv_chunks(row_serializer, rows, chunk_size):
+    writer = csv.writer(_LineBuffer())
+    yield writer.writerow(row_serializer.names)
+    for chunk in chunked(rows, chunk_size):
+        lines = []
+        for row in chunk:
+            item = row_serializer.to_representation(row)
+            lines.append(
+                writer.writerow(
+                    [
+                        # Nested values (images, specifications) stay JSON
+                        (
+                            json.dumps(value, ensure_ascii=False)
+                            if isinstance(value, (dict, list))
+                            else value
+                        )
+                        for value in map(item.get, row_serializer.names)
+                    ]
+                )
+            )
+        yield "".join(lines)
+
+
+def stream_export(
+    queryset,
+    row_serializer,
+    output: str = "ndjson",
+    filename: str = "export",
+    chunk_size: int = None,
+    asynchronous: bool = False,
+) -> StreamingHttpResponse:
+    """
+    Streams every row of `queryset` as NDJSON or CSV.
+
+    Rows are read through a named server-side cursor (`iterator()` on
+    PostgreSQL) in a transaction held open while streaming, `chunk_size` rows
+    per fetch, and each fetched chunk is encoded and sent before the next one
+    is read, so memory use does not grow with the catalog size.
+
+    Under ASGI (`asynchronous=True`) the body is an async iterator, since
+    Django would read a sync one into memory before sending it.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    if not queryset.ordered:
+        queryset = queryset.order_by("pk")
+    # Resolve the database now: the body is consumed after the view returns
+    queryset = queryset.using(queryset.db)
+    rows = iterate_in_transaction(row_serializer.get_queryset(queryset), chunk_size)
+
+    encode = csv_chunks if output == "csv" else ndjson_chunks
+    chunks = encode(row_serializer, rows, chunk_size)
+    if asynchronous:
+        chunks = iterate_in_thread(chunks, queryset.db)
+    response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[output])
+    response["Content-Disposition"] = f'attachment; filename="{filename}.{output}"'
+    return response
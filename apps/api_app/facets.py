@@ -0,0 +1,161 @@
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Q
+from apps.crawler_app.models import Category, SpecificationBlob
+
+
+def price_buckets() -> list[tuple[float, float | None]]:
+    """Returns `(min, max)` price ranges from `PRODUCT_PRICE_BUCKETS` (last is open)."""
+    bounds = settings.PRODUCT_PRICE_BUCKETS
+    return list(zip(bounds, [*bounds[1:], None]))
+
+
+def compute_facets(queryset) -> dict:
+    """
+    Computes all product facet counts for a filtered queryset in one query.
+
+    Rows are grouped by category, and availability, discount and price bucket
+    counts are conditional aggregates (`COUNT(*) FILTER (WHERE ...)`) over each
+    group, then rolled up here.
+    """
+    buckets = price_buckets()
+    aggregates = {
+        "total": Count("pk"),
+        "available": Count("pk", filter=Q(availability=True)),
+        "discounted": Count("pk", filter=Q(has_discount=True)),
+    }
+    for index, (low, high) in enumerate(buckets):
+        condition = Q(discount_price__gte=low)
+        if high is not None:
+            condition &= Q(discount_price__lt=high)
+        aggregates[f"price_{index}"] = Count("pk", filter=condition)
+
+    rows = list(
+        queryset.order_by()
+        .values("category_id", "category__slug", "category__name")
+        .annotate(**aggregates)
+    )
+
+    def total(key):
+        return sum(row[key] for row in rows)
+
+    count = total("total")
+    return {
+        "count": count,
+        "categories": sorted(
+            (
+                {
+                    "id": row["category_id"],
+                    "slug": row["category__slug"],
+                    "name": row["category__name"],
+                    "count": row["total"],
+                }
+                for row in rows
+            ),
+            key=lambda facet: -facet["count"],
+        ),
+        "price": [
+            {"min": low, "max": high, "count": total(f"price_{index}")}
+            for index, (low, high) in enumerate(buckets)
+        ],
+        "availability": {
+            "true": total("available"),
+            "false": count - total("available"),
+        },
+        "has_discount": {
+            "true": total("discounted"),
+            "false": count - total("discounted"),
+        },
+    }
+
+
+ATTRIBUTES_SQL = f"""
+    SELECT spec_group, spec_key, value, count
+    FROM (
+        SELECT grp.key AS spec_group, spec.key AS spec_key,
+               spec.value #>> '{{}}' AS value, SUM(product.count)::int AS count,
+               ROW_NUMBER() OVER (
+                   PARTITION BY grp.key, spec.key ORDER BY SUM(product.count) DESC
+               ) AS rank
+        FROM ({{products}}) product
+        JOIN {SpecificationBlob._meta.db_table} blob
+          ON blob.digest = product.specifications_blob_id,
+             jsonb_each(CASE WHEN jsonb_typeof(blob.data) = 'object'
+                        THEN blob.data ELSE '{{}}' END) grp,
+             jsonb_each(CASE WHEN jsonb_typeof(grp.value) = 'object'
+                        THEN grp.value ELSE '{{}}' END) spec
+        GROUP BY 1, 2, 3
+    ) ranked
+    WHERE rank <= %s
+    ORDER BY spec_group, spec_key, count DESC, value
+"""
+
+
+def compute_attributes(queryset, limit: int = None) -> list[dict]:
+    """
+    Lists the specification keys of a filtered queryset with their top values.
+
+    Returns `[{"group", "key", "param", "values": [{"value", "count"}]}]`,
+    where `param` is the matching `spec.<group>.<key>` filter. Each key keeps
+    its `limit` most frequent values (`PRODUCT_ATTRIBUTE_VALUES`). Products
+    are counted per specification blob first, so each distinct dict is
+    expanded once.
+    """
+    limit = limit or settings.PRODUCT_ATTRIBUTE_VALUES
+    products, params = (
+        queryset.order_by()
+        .values("specifications_blob_id")
+        .annotate(count=Count("pk"))
+        .query.sql_with_params()
+    )
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(ATTRIBUTES_SQL.replace("{products}", products), [*params, limit])
+        rows = cursor.fetchall()
+
+    attributes = []
+    for group, key, value, count in rows:
+        if not attributes or attributes[-1]["param"] != f"spec.{group}.{key}":
+            attributes.append(
+                {
+                    "group": group,
+                    "key": key,
+                    "param": f"spec.{group}.{key}",
+                    "values": [],
+                }
+            )
+        attributes[-1]["values"].append({"value": value, "count": count})
+    return attributes
+
+
+def compute_category_tree() -> list[dict]:
+    """
+    Builds the whole nested category hierarchy from one grouped query.
+
+    Each node has its direct `product_count`, the `total_count` of its subtree
+    and the slug `path` from the root (as `Category.get_full_category_path`),
+    computed in linear time without per-node queries.
+    """
+    rows = (
+        Category.objects.annotate(product_count=Count("products"))
+        .order_by("name")
+        .values("id", "name", "slug", "parent_id", "product_count")
+    )
+    nodes = {row["id"]: {**row, "children": []} for row in rows}
+    roots = []
+    for node in nodes.values():
+        parent = nodes.get(node.pop("parent_id"))
+        (parent["children"] if parent else roots).append(node)
+
+    # Pre-order walk sets paths, the reversed order sums subtrees bottom-up
+    order = []
+    stack = [(root, None) for root in reversed(roots)]
+    while stack:
+        node, parent_path = stack.pop()
+        node["path"] = f"{parent_path}/{node['slug']}" if parent_path else node["slug"]
+        order.append(node)
+        stack.extend((child, node["path"]) for child in reversed(node["children"]))
+    for node in reversed(order):
+        node["total_count"] = node["product_count"] + sum(
+            child["total_count"] for child in node["children"]
+        )
+    return roots
@@ -1,5 +1,5 @@
 import django_filters
-from django.db.models import Q, F
+from django.db.models import Q
 from apps.crawler_app.models import Category, Product
 
 
@@ -33,13 +33,22 @@ class CategoryFilter(django_filters.FilterSet):
 
     def filter_subcategories(self, queryset, name, value):
         """Fetches all subcategories when filtering by a parent category."""
-        parent_category = Category.objects.filter(slug=value).first()
-        if parent_category:
-            return queryset.filter(parent=parent_category)
-        return queryset.none()
+        # Joined instead of looked up first, so the filter stays lazy (async-safe)
+        return queryset.filter(parent__slug=value)
 
 
 class ProductFilter(django_filters.FilterSet):
+    """
+    Product filters, plus `spec.<group>.<key>=value` specification filters.
+
+    Specification filters are JSON containment (`data @> ...`) lookups on the
+    deduplicated specification blobs, served by their GIN `jsonb_path_ops`
+    index. Repeating a parameter
+    matches any of its values; different parameters must all match.
+    """
+
+    spec_prefix = "spec."
+
     category = django_filters.CharFilter(method="filter_category_with_subcategories")
     min_price = django_filters.NumberFilter(
         field_name="discount_price", lookup_expr="gte"
@@ -50,18 +59,29 @@ class ProductFilter(django_filters.FilterSet):
     availability = django_filters.BooleanFilter(field_name="availability")
     name = django_filters.CharFilter(field_name="title", lookup_expr="icontains")
     description = django_filters.CharFilter(
-        field_name="description", lookup_expr="icontains"
+        field_name="description_blob__text", lookup_expr="icontains"
     )
     has_discount = django_filters.BooleanFilter(
         method="filter_has_discount",
         label="Has Discount",
     )
+    min_discount_pct = django_filters.NumberFilter(
+        field_name="discount_pct", lookup_expr="gte"
+    )
     created_after = django_filters.DateFilter(
         field_name="created_at", lookup_expr="gte"
     )
     updated_after = django_filters.DateFilter(
         field_name="updated_at", lookup_expr="gte"
     )
+    ordering = django_filters.OrderingFilter(
+        fields=(
+            ("discount_pct", "discount"),
+            ("discount_price", "price"),
+            ("created_at", "created_at"),
+            ("updated_at", "updated_at"),
+        )
+    )
 
     class Meta:
         model = Product
@@ -73,10 +93,38 @@ class ProductFilter(django_filters.FilterSet):
             "name",
             "description",
             "has_discount",
+            "min_discount_pct",
             "created_after",
             "updated_after",
+            "ordering",
         ]
 
+    def spec_filters(self) -> dict[tuple[str, str], list[str]]:
+        """Returns the requested `(group, key)` specification filters and values."""
+        filters = {}
+        for param in self.data:
+            if not param.startswith(self.spec_prefix):
+                continue
+            group, _, key = param[len(self.spec_prefix) :].partition(".")
+            if hasattr(self.data, "getlist"):
+                values = [value for value in self.data.getlist(param) if value]
+            else:
+                values = [self.data[param]] if self.data[param] else []
+            if group and key and values:
+                filters[(group, key)] = values
+        return filters
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        for (group, key), values in self.spec_filters().items():
+            condition = Q()
+            for value in values:
+                condition |= Q(
+                    specifications_blob__data__contains={group: {key: value}}
+                )
+            queryset = queryset.filter(condition)
+        return queryset
+
     def filter_category_with_subcategories(self, queryset, name, value):
         """Include products from selected category and all its subcategories."""
         return queryset.filter(
@@ -86,8 +134,5 @@ class ProductFilter(django_filters.FilterSet):
         )
 
     def filter_has_discount(self, queryset, name, value):
-        """Filter products based on whether they have a discount."""
-        if value:  # When has_discount=True, filter products with a discount
-            return queryset.filter(original_price__gt=F("discount_price"))
-        else:  # When has_discount=False, filter products without a discount
-            return queryset.filter(original_price=F("discount_price"))
+        """Filter products based on the indexed `has_discount` generated column."""
+        return queryset.filter(has_discount=value)
@@ -3,6 +3,10 @@ from apps.crawler_app.models import Product
 
 
 class ProductForm(forms.ModelForm):
+    # Stored in deduplicated blobs, so not model fields of their own
+    description = forms.CharField(widget=forms.Textarea, required=False)
+    specifications = forms.JSONField(required=False)
+
     class Meta:
         model = Product
         fields = [
@@ -16,3 +20,14 @@ class ProductForm(forms.ModelForm):
             "url",
             "availability",
         ]
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            self.initial.setdefault("description", self.instance.description)
+            self.initial.setdefault("specifications", self.instance.specifications)
+
+    def save(self, commit=True):
+        self.instance.description = self.cleaned_data["description"]
+        self.instance.specifications = self.cleaned_data["specifications"] or {}
+        return super().save(commit)
@@ -0,0 +1,222 @@
+import random
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from config.db_router import use_replicas
+from utils.logging import logger
+from utils.profiling import RequestProfile, explain
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, responses then fall back to gzip
+    brotli = None
+
+PIN_COOKIE = "pin_primary"
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Sends safe API and HTML requests to the read replicas.
+
+    A successful write (e.g. through `EditProductView`) sets a short-lived
+    cookie that pins the client to the primary, so the redirect after an edit
+    and the next few reads see the client's own writes despite replica lag.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def reads_from_replica(self, request) -> bool:
+        return (
+            request.method in ("GET", "HEAD", "OPTIONS")
+            and PIN_COOKIE not in request.COOKIES
+            and request.path.startswith(tuple(settings.REPLICA_READ_PATHS))
+        )
+
+    def pin_after_write(self, request, response):
+        if request.method not in ("GET", "HEAD", "OPTIONS") and (
+            response.status_code < 400
+        ):
+            response.set_cookie(
+                PIN_COOKIE, "1", max_age=settings.REPLICA_PIN_SECONDS, httponly=True
+            )
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with use_replicas(self.reads_from_replica(request)):
+            response = self.get_response(request)
+        return self.pin_after_write(request, response)
+
+    async def __acall__(self, request):
+        with use_replicas(self.reads_from_replica(request)):
+            response = await self.get_response(request)
+        return self.pin_after_write(request, response)
+
+
+class BrotliMiddleware:
+    """
+    Compresses responses with Brotli for clients sending `Accept-Encoding: br`.
+
+    Sits below `GZipMiddleware`, which then leaves already encoded responses
+    alone, so clients get Brotli when they accept it and gzip otherwise. Does
+    nothing unless the optional `brotli` package is installed; streaming
+    responses are left to `GZipMiddleware`.
+
+    Only JSON API responses are compressed: HTML pages carry CSRF tokens, and
+    `GZipMiddleware` pads those against BREACH.
+    """
+
+    min_length = 200
+    compressible_types = ("application/json",)
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.compress(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.compress(request, await self.get_response(request))
+
+    def compress(self, request, response):
+        if (
+            brotli is None
+            or response.streaming
+            or len(response.content) < self.min_length
+            or response.has_header("Content-Encoding")
+            or not response.get("Content-Type", "").startswith(self.compressible_types)
+            or not accepts_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""), "br")
+        ):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        compressed = brotli.compress(response.content, quality=settings.BROTLI_QUALITY)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response["Content-Length"] = str(len(compressed))
+        response["Content-Encoding"] = "br"
+        # The body changed, so a strong ETag no longer holds (like GZipMiddleware)
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response["ETag"] = "W/" + etag
+        return response
+
+
+def accepts_encoding(header: str, coding: str) -> bool:
+    """
+    Whether an `Accept-Encoding` header accepts `coding`, by its q-value.
+
+    `br;q=0` refuses Brotli; `*` covers codings that are not listed.
+    """
+    qualities = {}
+    for item in header.split(","):
+        name, _, params = item.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip():
+            qualities[name.strip().lower()] = quality
+    return qualities.get(coding, qualities.get("*", 0.0)) > 0
+
+
+class QueryProfilingMiddleware:
+    """
+    Logs the query count, database time and view/render time of slow requests.
+
+    Requests under `PROFILE_PATHS` run inside a `RequestProfile`; one is
+    logged when it exceeds `PROFILE_SLOW_REQUEST_MS`, `PROFILE_MAX_QUERIES`
+    or has a statement over `PROFILE_SLOW_QUERY_MS`, with its slowest
+    statements and, for a `PROFILE_EXPLAIN_RATE` sample, the `EXPLAIN` plan
+    of the slowest one. Requests under the thresholds only pay for the
+    timers. Async views are passed through unprofiled.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self) or not (
+            settings.PROFILE_REQUESTS
+            and request.path.startswith(tuple(settings.PROFILE_PATHS))
+        ):
+            return self.get_response(request)
+
+        request.profile = RequestProfile(keep=settings.PROFILE_SLOWEST)
+        with request.profile:
+            response = self.get_response(request)
+        self.report(request, response, request.profile)
+        return response
+
+    def process_template_response(self, request, response):
+        # The view returned, rendering (DRF renderers, templates) follows
+        profile = getattr(request, "profile", None)
+        if profile is not None:
+            profile.mark()
+        return response
+
+    def report(self, request, response, profile: RequestProfile) -> None:
+        total_ms = profile.total_time * 1000
+        slowest = profile.slowest()
+        exceeded = [
+            name
+            for name, value, threshold in (
+                ("duration", total_ms, settings.PROFILE_SLOW_REQUEST_MS),
+                ("queries", profile.queries, settings.PROFILE_MAX_QUERIES),
+                (
+                    "slow_query",
+                    slowest[0]["ms"] if slowest else 0,
+                    settings.PROFILE_SLOW_QUERY_MS,
+                ),
+            )
+            if threshold and value >= threshold
+        ]
+        if not exceeded:
+            return
+
+        plan = None
+        if "slow_query" in exceeded and random.random() < settings.PROFILE_EXPLAIN_RATE:
+            plan = explain(slowest[0])
+        match = request.resolver_match
+        logger.warning(
+            f"🐢 Slow request {request.method} {request.get_full_path()}",
+            extra={
+                # Each slow request is a distinct problem, never rate-limited
+                "rate_limit": False,
+                "method": request.method,
+                "path": request.get_full_path(),
+                "view": match.view_name if match else None,
+                "status": response.status_code,
+                "exceeded": exceeded,
+                "total_ms": round(total_ms, 2),
+                "db_ms": round(profile.db_time * 1000, 2),
+                "queries": profile.queries,
+                **profile.phases(),
+                "slow_queries": slowest,
+                "explain": plan,
+            },
+        )
@@ -0,0 +1,139 @@
+import hashlib
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """
+    Answers conditional GET requests with `304 Not Modified`.
+
+    Validators are computed from a single aggregate query (`max(updated_at)` and
+    row count) over the filtered queryset, so unchanged data is detected before
+    any row is loaded or serialized. Models listed in `related_models` are
+    rendered into the payload too (e.g. `category_name`), so their own
+    `max(updated_at)` joins the validators.
+    """
+
+    last_modified_field = "updated_at"
+    related_models = ()
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self._conditional(
+            queryset, False, super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            **{self.lookup_field: kwargs[lookup_url_kwarg]}
+        )
+        return self._conditional(
+            queryset, True, super().retrieve, request, *args, **kwargs
+        )
+
+    def get_validators(self, queryset):
+        """
+        Returns the `(etag, last_modified, count)` validators for a queryset.
+
+        The ETag also covers the full request path (query string and page) and
+        the negotiated format, since both change the response body. Related
+        tables are read from the same database as the queryset, so the
+        validators never run ahead of a lagging replica.
+        """
+        stats = queryset.order_by().aggregate(
+            last_modified=Max(self.last_modified_field), count=Count("pk")
+        )
+        timestamps = [stats["last_modified"]] + [
+            model.objects.using(queryset.db).aggregate(last_modified=Max("updated_at"))[
+                "last_modified"
+            ]
+            for model in self.related_models
+        ]
+        last_modified = max(filter(None, timestamps), default=None)
+        renderer = getattr(self.request, "accepted_renderer", None)
+        fingerprint = "|".join(
+            [
+                self.request.get_full_path(),
+                getattr(renderer, "format", ""),
+                last_modified.isoformat() if last_modified else "",
+                str(stats["count"]),
+            ]
+        )
+        etag = quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+        return etag, last_modified, stats["count"]
+
+    def _conditional(self, queryset, detail, handler, request, *args, **kwargs):
+        """Short-circuits with 304 when the client's validators still match."""
+        etag, last_modified, count = self.get_validators(queryset)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+
+        # A missing object must still fall through to the regular 404.
+        if count or not detail:
+            not_modified = get_conditional_response(
+                request._request, etag=etag, last_modified=timestamp
+            )
+            if not_modified is not None:
+                return not_modified
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response["ETag"] = etag
+            if timestamp is not None:
+                response["Last-Modified"] = http_date(timestamp)
+        return response
+
+
+class FastListMixin:
+    """
+    Serves `list` through a row serializer when the fast format is negotiated.
+
+    Rows are fetched with `values_list()` and converted by
+    `row_serializer_class`, skipping per-object `ModelSerializer` dispatch.
+    Every other format keeps the regular serializer path.
+    """
+
+    row_serializer_class = None
+    fast_format = "fastjson"
+
+    def list(self, request, *args, **kwargs):
+        if request.accepted_renderer.format != self.fast_format:
+            return super().list(request, *args, **kwargs)
+
+        # The regular serializer knows the sparse fieldset of this request
+        row_serializer = self.row_serializer_class(
+            fields=list(self.get_serializer().fields)
+        )
+        queryset = row_serializer.get_queryset(
+            self.filter_queryset(self.get_queryset())
+        )
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(row_serializer.many(page))
+        return Response(row_serializer.many(queryset))
+
+
+class SparseFieldsetQuerysetMixin:
+    """
+    Narrows the `SELECT` of list/detail reads to the requested sparse fieldset.
+
+    Requires a serializer using `SparseFieldsetMixin`.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        params = self.request.query_params
+        if self.action not in ("list", "retrieve") or not (
+            params.get("fields") or params.get("omit")
+        ):
+            return queryset
+
+        columns = self.get_serializer().only_columns()
+        related = {column.split("__")[0] for column in columns if "__" in column}
+        # A deferred relation cannot be followed with select_related
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
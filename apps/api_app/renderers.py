@@ -0,0 +1,29 @@
+import json
+from rest_framework.renderers import BaseRenderer
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib encoder
+    orjson = None
+
+
+class FastJSONRenderer(BaseRenderer):
+    """
+    Compact JSON renderer selected with `?format=fastjson`.
+
+    Encodes with `orjson` when it is installed. Views use this format as the
+    opt-in signal for their row-based fast path (see `FastListMixin`).
+    """
+
+    media_type = "application/json"
+    format = "fastjson"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        if orjson is not None:
+            return orjson.dumps(data, default=str)
+        return json.dumps(
+            data, default=str, ensure_ascii=False, separators=(",", ":")
+        ).encode()
@@ -1,11 +1,74 @@
 from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
 from apps.crawler_app.models import Product, Category
 
 
-class ProductSerializer(serializers.ModelSerializer):
+def sparse_fieldset(query_params, available) -> list[str]:
+    """
+    Returns the field names selected by `?fields=` and `?omit=`.
+
+    Both take comma separated names; the result keeps the serializer's field
+    order and unknown names are ignored.
+    """
+    names = list(available)
+    if query_params.get("fields"):
+        wanted = {name.strip() for name in query_params["fields"].split(",")}
+        names = [name for name in names if name in wanted]
+    if query_params.get("omit"):
+        unwanted = {name.strip() for name in query_params["omit"].split(",")}
+        names = [name for name in names if name not in unwanted]
+    return names
+
+
+class SparseFieldsetMixin:
+    """
+    Limits a serializer's output to the `?fields=`/`?omit=` of a read request.
+
+    `only_columns()` gives the matching model paths, so views can narrow the
+    SQL `SELECT` with `QuerySet.only()` as well.
+    """
+
+    # Model paths of fields whose source is not a model field (e.g. a property)
+    column_sources = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get("request")
+        if request is None or request.method not in SAFE_METHODS:
+            return
+        selected = set(sparse_fieldset(request.query_params, self.fields))
+        for name in list(self.fields):
+            if name not in selected:
+                self.fields.pop(name)
+
+    def only_columns(self) -> list[str]:
+        """Model paths (for `QuerySet.only()`) read by the selected fields."""
+        columns = ["pk"]
+        for name, field in self.fields.items():
+            source = self.column_sources.get(name, field.source)
+            if source != "*":
+                columns.append(source.replace(".", "__"))
+        return columns
+
+
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     category_id = serializers.PrimaryKeyRelatedField(source="category", read_only=True)
     category_name = serializers.CharField(source="category.name", read_only=True)
     images = serializers.ListField(child=serializers.URLField(), required=False)
+    has_discount = serializers.BooleanField(read_only=True)
+    discount_pct = serializers.FloatField(read_only=True)
+    # Model properties backed by deduplicated blobs
+    description = serializers.CharField(
+        allow_blank=True,
+        allow_null=True,
+        required=False,
+        style={"base_template": "textarea.html"},
+    )
+    specifications = serializers.JSONField(required=False)
+    column_sources = {
+        "description": "description_blob.text",
+        "specifications": "specifications_blob.data",
+    }
 
     class Meta:
         model = Product
@@ -22,6 +85,8 @@ class ProductSerializer(serializers.ModelSerializer):
             "url",
             "images",
             "availability",
+            "has_discount",
+            "discount_pct",
             "created_at",
             "updated_at",
         ]
@@ -42,3 +107,74 @@ class CategorySerializer(serializers.ModelSerializer):
             "created_at",
             "updated_at",
         ]
+
+
+class RowSerializer:
+    """
+    Read-only, high-throughput equivalent of a `ModelSerializer` for bulk listing.
+
+    Field accessors are precomputed once from `serializer_class`, so the output
+    schema stays identical, and rows are read with `values_list()` instead of
+    being materialized as model instances. Only fields whose database value is
+    not already its JSON representation (e.g. datetimes) go through DRF's
+    `to_representation`.
+    """
+
+    serializer_class = None
+    passthrough_fields = (
+        serializers.BooleanField,
+        serializers.CharField,
+        serializers.FloatField,
+        serializers.IntegerField,
+        serializers.JSONField,
+        serializers.ListField,
+        serializers.PrimaryKeyRelatedField,
+    )
+
+    def __init__(self, fields: list[str] = None):
+        self.names = []
+        self.columns = []
+        self.converters = []
+        # DRF omits fields whose dotted source crosses a null relation
+        self.skip_if_null = []
+        column_sources = getattr(self.serializer_class, "column_sources", {})
+        for name, field in self.serializer_class().fields.items():
+            if fields is not None and name not in fields:
+                continue
+            if name in column_sources:
+                column = column_sources[name].replace(".", "__")
+            elif isinstance(field, serializers.RelatedField):
+                column = f"{field.source}_id"
+            else:
+                column = field.source.replace(".", "__")
+                if "." in field.source:
+                    self.skip_if_null.append(name)
+            self.names.append(name)
+            self.columns.append(column)
+            if not isinstance(field, self.passthrough_fields):
+                self.converters.append((name, field.to_representation))
+
+    def get_queryset(self, queryset):
+        """Narrows a queryset to the tuples this serializer reads."""
+        return queryset.values_list(*self.columns)
+
+    def to_representation(self, row: tuple) -> dict:
+        item = dict(zip(self.names, row))
+        for name in self.skip_if_null:
+            if item[name] is None:
+                del item[name]
+        for name, convert in self.converters:
+            if item.get(name) is not None:
+                item[name] = convert(item[name])
+        return item
+
+    def many(self, rows) -> list[dict]:
+        return [self.to_representation(row) for row in rows]
+
+
+class ProductRowSerializer(RowSerializer):
+    serializer_class = ProductSerializer
+
+
+class CategoryRowSerializer(RowSerializer):
+    serializer_class = CategorySerializer
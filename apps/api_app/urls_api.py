@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProductViewSet, CategoryViewSet
+from .views import ProductViewSet, CategoryViewSet, snapshot_download, snapshot_list
 
 
 # Initialize router
@@ -9,5 +9,11 @@ router.register(r"products", ProductViewSet, basename="product")
 router.register(r"categories", CategoryViewSet, basename="category")
 
 urlpatterns = [
+    path("snapshots/", snapshot_list, name="snapshot-list"),
+    path(
+        "snapshots/<str:version>/<str:filename>",
+        snapshot_download,
+        name="snapshot-download",
+    ),
     path("", include(router.urls)),  # Register all router-based viewsets
 ]
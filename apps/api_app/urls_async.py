@@ -0,0 +1,22 @@
+from django.urls import path
+from apps.api_app import async_views
+
+urlpatterns = [
+    path("products/", async_views.product_list, name="async-product-list"),
+    path(
+        "products/<int:pk>/",
+        async_views.product_detail,
+        name="async-product-detail",
+    ),
+    path("categories/", async_views.category_list, name="async-category-list"),
+    path(
+        "categories/<int:pk>/",
+        async_views.category_detail,
+        name="async-category-detail",
+    ),
+    path(
+        "categories/slug/<slug:slug>/",
+        async_views.category_detail_by_slug,
+        name="async-category-detail-by-slug",
+    ),
+]
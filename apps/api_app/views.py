@@ -1,44 +1,252 @@
-from rest_framework import viewsets
+import hashlib
+import json
+from rest_framework import status, viewsets
+from rest_framework.decorators import action, api_view
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from django_filters.rest_framework import DjangoFilterBackend
 from apps.crawler_app.models import Category, Product
-from apps.api_app.serializers import CategorySerializer, ProductSerializer
+from apps.api_app.serializers import (
+    CategorySerializer,
+    ProductRowSerializer,
+    ProductSerializer,
+)
 from apps.api_app.filters import CategoryFilter, ProductFilter
 from rest_framework.generics import RetrieveAPIView
 from django.shortcuts import render, get_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404
+from django.core.paginator import Paginator
+from django.db.models.fields.json import KT
 from django.views.generic import UpdateView, DeleteView, CreateView
 from django.urls import reverse_lazy
+from django.conf import settings
+from django.core.cache import cache
 from apps.api_app.forms import ProductForm
+from apps.api_app.facets import (
+    compute_attributes,
+    compute_category_tree,
+    compute_facets,
+)
+from apps.api_app.bulk import BulkProductWriter, iter_records
+from apps.api_app.export import EXPORT_FORMATS, stream_export
+from apps.crawler_app.cache import get_data_version
+from config.db_router import use_replicas
+from apps.crawler_app.snapshots import get_snapshot, list_snapshots, snapshot_path
+from apps.api_app.mixins import (
+    ConditionalGetMixin,
+    FastListMixin,
+    SparseFieldsetQuerysetMixin,
+)
+from apps.api_app.renderers import FastJSONRenderer
 
 
-class CategoryDetailView(RetrieveAPIView):
+class CategoryDetailView(ConditionalGetMixin, RetrieveAPIView):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     lookup_field = "slug"
+    related_models = (Category,)
 
 
-class ProductViewSet(viewsets.ModelViewSet):
-    queryset = Product.objects.all()
+class ProductViewSet(
+    ConditionalGetMixin,
+    FastListMixin,
+    SparseFieldsetQuerysetMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Product.objects.select_related(
+        "category", "description_blob", "specifications_blob"
+    )
     serializer_class = ProductSerializer
+    row_serializer_class = ProductRowSerializer
+    related_models = (Category,)
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, FastJSONRenderer]
     filter_backends = [DjangoFilterBackend]
     filterset_class = ProductFilter
 
+    def cached_summary(self, name, compute):
+        """
+        Caches `compute(filtered_queryset)` per data version and filter set.
 
-class CategoryViewSet(viewsets.ModelViewSet):
+        The catalog data version is part of the key, so any product or category
+        write invalidates every cached summary at once.
+        """
+        params = sorted(
+            (key, value)
+            for key, value in self.request.query_params.lists()
+            if key not in ("format", "page")
+        )
+        digest = hashlib.md5(repr(params).encode()).hexdigest()
+        cache_key = f"{name}:{get_data_version()}:{digest}"
+
+        data = cache.get(cache_key)
+        if data is None:
+            # From the primary: a lagging replica would cache stale rows under
+            # the new data version
+            with use_replicas(False):
+                data = compute(self.filter_queryset(self.get_queryset()))
+            cache.set(cache_key, data, settings.FACETS_CACHE_TIMEOUT)
+        return Response(data)
+
+    @action(detail=False, methods=["get"])
+    def facets(self, request):
+        """Facet counts for the current filter set, cached per data version."""
+        return self.cached_summary("facets", compute_facets)
+
+    @action(detail=False, methods=["get"])
+    def attributes(self, request):
+        """
+        Specification keys and their most frequent values for the current
+        filter set (e.g. `?category=bedroom`), cached per data version.
+        """
+        return self.cached_summary("attributes", compute_attributes)
+
+    @action(detail=False, methods=["post"])
+    def bulk(self, request):
+        """
+        Creates, updates and deletes many products in one transaction.
+
+        Accepts a JSON array or NDJSON (`application/x-ndjson`) of records keyed
+        on `site_id` and returns a per-record result summary.
+        """
+        try:
+            summary = BulkProductWriter().write(iter_records(request))
+        except (ValueError, json.JSONDecodeError) as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(summary)
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Streams the whole filtered catalog as NDJSON (default) or CSV.
+
+        The format is chosen with `?output=ndjson|csv`; `?fields=`/`?omit=`
+        select the exported columns.
+        """
+        output = request.query_params.get("output", "ndjson")
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {"detail": f"Unknown output {output!r}"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        row_serializer = self.row_serializer_class(
+            fields=list(self.get_serializer().fields)
+        )
+        return stream_export(
+            self.filter_queryset(self.get_queryset()),
+            row_serializer,
+            output=output,
+            filename="products",
+            asynchronous=isinstance(request._request, ASGIRequest),
+        )
+
+
+class CategoryViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     filter_backends = [DjangoFilterBackend]
     filterset_class = CategoryFilter
+    related_models = (Category,)
+
+    @action(detail=False, methods=["get"])
+    def tree(self, request):
+        """The nested category hierarchy with product counts, cached per data version."""
+        cache_key = f"category-tree:{get_data_version()}"
+        data = cache.get(cache_key)
+        if data is None:
+            # From the primary, see `ProductViewSet.cached_summary`
+            with use_replicas(False):
+                data = compute_category_tree()
+            cache.set(cache_key, data, settings.FACETS_CACHE_TIMEOUT)
+        return Response(data)
+
+
+@api_view(["GET"])
+def snapshot_list(request):
+    """Manifests of the available catalog snapshots, newest first."""
+    return Response(list_snapshots())
+
+
+@api_view(["GET"])
+def snapshot_download(request, version, filename):
+    """
+    Downloads one file of a catalog snapshot.
+
+    `version` may be `latest`; only files listed in the manifest are served.
+    """
+    manifest = get_snapshot(version)
+    if manifest is None:
+        raise Http404("No such snapshot.")
+    files = [table["file"] for table in manifest.get("tables", {}).values()]
+    if filename not in files + ["manifest.json"]:
+        raise Http404("No such snapshot file.")
+    try:
+        file = open(snapshot_path(manifest, filename), "rb")
+    except FileNotFoundError:
+        # Pruned since the manifest was read
+        raise Http404("No such snapshot file.")
+    return FileResponse(
+        file, as_attachment=True, filename=f"{manifest['version']}-{filename}"
+    )
 
 
 def product_detail(request, product_id):
-    product = get_object_or_404(Product, id=product_id)
+    product = get_object_or_404(
+        Product.objects.select_related("description_blob", "specifications_blob"),
+        id=product_id,
+    )
     return render(request, "product_detail.html", {"product": product})
 
 
+# `ProductFilter` parameters offered by the HTML product list form
+HTML_PRODUCT_FILTERS = [
+    "name",
+    "category",
+    "min_price",
+    "max_price",
+    "has_discount",
+    "availability",
+]
+
+
 def product_list(request):
-    """Display all products in a simple HTML page."""
-    products = Product.objects.all()
-    return render(request, "product_list.html", {"products": products})
+    """
+    Display products page by page in a simple HTML page.
+
+    Accepts the same query parameters as the product API (`ProductFilter`) and
+    only loads the columns the product cards need: the first image is read
+    in SQL, so the `images`, `description` and `specifications` JSON never
+    leaves the database.
+    """
+    queryset = (
+        Product.objects.only("id", "title", "discount_price", "updated_at")
+        .annotate(thumbnail=KT("images__0"))
+        .order_by("id")
+    )
+    product_filter = ProductFilter(request.GET, queryset=queryset)
+    # Invalid parameters are shown next to their field instead of being ignored
+    valid = product_filter.is_valid()
+    paginator = Paginator(
+        product_filter.qs if valid else queryset.none(),
+        settings.HTML_PRODUCTS_PER_PAGE,
+    )
+    page = paginator.get_page(request.GET.get("page"))
+
+    query = request.GET.copy()
+    query.pop("page", None)
+    return render(
+        request,
+        "product_list.html",
+        {
+            "products": page,
+            "filter_fields": [
+                product_filter.form[name] for name in HTML_PRODUCT_FILTERS
+            ],
+            "query_string": query.urlencode(),
+            "fragment_cache_timeout": settings.HTML_FRAGMENT_CACHE_TIMEOUT,
+        },
+        status=200 if valid else 400,
+    )
 
 
 class EditProductView(UpdateView):
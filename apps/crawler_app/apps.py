@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class CrawlerAppConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.crawler_app"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        import utils.db_pool  # noqa: F401
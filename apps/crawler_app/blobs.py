@@ -0,0 +1,18 @@
+import hashlib
+import json
+
+
+def content_digest(value) -> str:
+    """
+    Returns the sha256 hex digest identifying a blob's content.
+
+    Text is hashed as UTF-8; any other value as canonical JSON (sorted keys,
+    compact separators), so equal dicts hash equally whatever their key order.
+    """
+    if isinstance(value, str):
+        content = value
+    else:
+        content = json.dumps(
+            value, sort_keys=True, ensure_ascii=False, separators=(",", ":")
+        )
+    return hashlib.sha256(content.encode()).hexdigest()
@@ -0,0 +1,29 @@
+import time
+from django.core.cache import cache
+
+DATA_VERSION_KEY = "crawler:data_version"
+
+
+def get_data_version() -> int:
+    """
+    Returns the current catalog data version.
+
+    The version changes whenever products or categories are written, so it can
+    be embedded in cache keys instead of invalidating entries one by one. It is
+    seeded from the clock, so a flushed cache never reuses an old version.
+    """
+    version = cache.get(DATA_VERSION_KEY)
+    if version is None:
+        cache.add(DATA_VERSION_KEY, time.time_ns() // 1_000_000, timeout=None)
+        version = cache.get(DATA_VERSION_KEY)
+    return version
+
+
+def bump_data_version() -> int:
+    """Moves the catalog to a new data version and returns it."""
+    try:
+        return cache.incr(DATA_VERSION_KEY)
+    except ValueError:
+        # The key was evicted, any fresh seed is newer than the old versions
+        get_data_version()
+        return cache.incr(DATA_VERSION_KEY)
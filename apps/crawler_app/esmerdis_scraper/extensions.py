@@ -0,0 +1,71 @@
+"""
+Crawl coordination for spiders started as part of a leased run.
+
+`LeaseHeartbeat` renews the run's `CrawlLease` every
+`CRAWL_HEARTBEAT_INTERVAL` seconds with the shard's progress, until the
+engine stops (i.e. also while `process_products` saves after the spider
+closed), and closes the spider with the reason `lease_lost` when another run
+has taken the lease over. Spiders without a `run_id` (e.g. `scrapy crawl
+products`) are left alone.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from scrapy.utils.defer import deferred_from_coro
+from twisted.internet import task
+from apps.crawler_app.leases import heartbeat
+from utils.logging import logger
+
+
+class LeaseHeartbeat:
+    def __init__(self, crawler, interval: float):
+        self.crawler = crawler
+        self.interval = interval
+        self.task = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        if not settings.CRAWL_HEARTBEAT_INTERVAL:
+            raise NotConfigured
+        extension = cls(crawler, settings.CRAWL_HEARTBEAT_INTERVAL)
+        crawler.signals.connect(extension.spider_opened, signal=signals.spider_opened)
+        # Not `spider_closed`: the products are saved in a `spider_closed` handler
+        crawler.signals.connect(extension.engine_stopped, signal=signals.engine_stopped)
+        return extension
+
+    def spider_opened(self, spider):
+        if getattr(spider, "run_id", None):
+            self.task = task.LoopingCall(lambda: deferred_from_coro(self.beat(spider)))
+            self.task.start(self.interval, now=False)
+
+    def engine_stopped(self):
+        if self.task and self.task.running:
+            self.task.stop()
+
+    def progress(self, spider) -> dict:
+        stats = self.crawler.stats
+        return {
+            "state": "crawling",
+            "pages": stats.get_value("response_received_count", 0),
+            "products": len(spider.products_to_process),
+            "errors": stats.get_value("log_count/ERROR", 0),
+        }
+
+    async def beat(self, spider):
+        try:
+            held = await sync_to_async(heartbeat)(
+                settings.CRAWL_LEASE,
+                spider.run_id,
+                key=spider.start_urls[0],
+                progress=self.progress(spider),
+            )
+        except Exception as e:
+            # Keep crawling, the next heartbeat may get through
+            logger.error(f"❌ Crawl heartbeat failed: {e}", exc_info=True)
+            return
+        if not held:
+            logger.warning(f"🛑 Run {spider.run_id} lost its crawl lease, stopping")
+            self.task.stop()
+            self.crawler.engine.close_spider(spider, "lease_lost")
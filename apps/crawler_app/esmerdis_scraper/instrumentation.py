@@ -0,0 +1,207 @@
+"""
+Opt-in timing and profiling of the spider.
+
+- `timed` records the wall and CPU time of each call of a spider callback or
+  helper in the Scrapy stats (`timing/<name>/...`) when `SPIDER_TIMINGS` is
+  on: call count, totals and a histogram per time bucket. Generators and
+  coroutines are timed per step, so their CPU time only counts the spider's
+  own work while the wall time also covers what they waited on (network,
+  `sync_to_async` database calls).
+- `SamplingProfiler` is an extension that samples the stacks of every thread
+  during a crawl and writes them to `SPIDER_PROFILE_FILE` as folded stacks,
+  ready for `flamegraph.pl` or speedscope.
+
+Usage:
+    SPIDER_TIMINGS=true SPIDER_PROFILE_FILE=/tmp/crawl.folded scrapy crawl products
+"""
+
+import collections
+import functools
+import inspect
+import sys
+import threading
+import time
+from scrapy import signals
+from scrapy.exceptions import NotConfigured
+from utils.logging import logger
+
+# Upper bounds of the histogram buckets (milliseconds)
+BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+def _bucket(seconds: float) -> str:
+    ms = seconds * 1000
+    for bound in BUCKETS_MS:
+        if ms <= bound:
+            return f"le_{bound}"
+    return f"gt_{BUCKETS_MS[-1]}"
+
+
+def record_timing(stats, name: str, wall: float, cpu: float) -> None:
+    """Adds one call of `name` to the stats."""
+    prefix = f"timing/{name}"
+    stats.inc_value(f"{prefix}/calls")
+    stats.inc_value(f"{prefix}/wall_s", wall)
+    stats.inc_value(f"{prefix}/cpu_s", cpu)
+    stats.inc_value(f"{prefix}/wall_ms/{_bucket(wall)}")
+    stats.inc_value(f"{prefix}/cpu_ms/{_bucket(cpu)}")
+
+
+def _timed_steps(steps, record):
+    """Drives a generator or coroutine, timing the CPU spent in each step."""
+    started = time.perf_counter()
+    cpu = 0.0
+    value, error = None, None
+    while True:
+        step = time.thread_time()
+        try:
+            yielded = steps.throw(error) if error else steps.send(value)
+        except StopIteration as stop:
+            record(time.perf_counter() - started, cpu + time.thread_time() - step)
+            return stop.value
+        except BaseException:
+            record(time.perf_counter() - started, cpu + time.thread_time() - step)
+            raise
+        cpu += time.thread_time() - step
+        try:
+            value, error = (yield yielded), None
+        except BaseException as e:
+            value, error = None, e
+
+
+class _TimedAwaitable:
+    def __init__(self, coroutine, record):
+        self.coroutine = coroutine
+        self.record = record
+
+    def __await__(self):
+        return (yield from _timed_steps(self.coroutine, self.record))
+
+
+def timed(func):
+    """
+    Records the timings of a spider method when `spider.timings_enabled`.
+
+    Works for plain methods, generator callbacks and coroutines.
+    """
+    name = func.__name__
+
+    def recorder(spider):
+        return lambda wall, cpu: record_timing(spider.crawler.stats, name, wall, cpu)
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            if not getattr(self, "timings_enabled", False):
+                return await func(self, *args, **kwargs)
+            return await _TimedAwaitable(func(self, *args, **kwargs), recorder(self))
+
+    elif inspect.isgeneratorfunction(func):
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not getattr(self, "timings_enabled", False):
+                return func(self, *args, **kwargs)
+            return _timed_steps(func(self, *args, **kwargs), recorder(self))
+
+    else:
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            if not getattr(self, "timings_enabled", False):
+                return func(self, *args, **kwargs)
+            started, cpu = time.perf_counter(), time.thread_time()
+            try:
+                return func(self, *args, **kwargs)
+            finally:
+                record_timing(
+                    self.crawler.stats,
+                    name,
+                    time.perf_counter() - started,
+                    time.thread_time() - cpu,
+                )
+
+    return wrapper
+
+
+class SamplingProfiler:
+    """
+    Samples the stacks of all threads every `SPIDER_PROFILE_INTERVAL` seconds.
+
+    The result is a wall-clock profile: the reactor waiting on the network and
+    the `sync_to_async` thread waiting on Postgres show up as well as the
+    spider's own code. Sampling lasts until the engine stops, so the products
+    saved after the spider closed are included. Each line of the output is
+    `thread;outer;...;inner count`.
+    """
+
+    def __init__(self, path: str, interval: float, stats):
+        self.path = path
+        self.interval = interval
+        self.stats = stats
+        self.stacks = collections.Counter()
+        self.labels = {}
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        path = crawler.settings.get("SPIDER_PROFILE_FILE")
+        if not path:
+            raise NotConfigured
+        profiler = cls(
+            path, crawler.settings.getfloat("SPIDER_PROFILE_INTERVAL"), crawler.stats
+        )
+        crawler.signals.connect(profiler.spider_opened, signal=signals.spider_opened)
+        # Not `spider_closed`: the products are saved in a `spider_closed`
+        # handler, and that database-bound phase belongs in the profile
+        crawler.signals.connect(profiler.engine_stopped, signal=signals.engine_stopped)
+        return profiler
+
+    def spider_opened(self, spider):
+        self._thread = threading.Thread(
+            target=self._run, name="SamplingProfiler", daemon=True
+        )
+        self._thread.start()
+
+    def engine_stopped(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self.write()
+        self.stats.set_value("profile/samples", sum(self.stacks.values()))
+        logger.info(f"🔥 Wrote {len(self.stacks)} sampled stacks to {self.path}")
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def sample(self) -> None:
+        """Adds the current stack of every other thread."""
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        own = threading.get_ident()
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._label(frame.f_code))
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            self.stacks[";".join(reversed(stack))] += 1
+
+    def _label(self, code) -> str:
+        label = self.labels.get(code)
+        if label is None:
+            filename = code.co_filename.rsplit("/", 1)[-1]
+            label = self.labels[code] = (
+                f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+            ).replace(";", ":")
+        return label
+
+    def write(self) -> None:
+        with open(self.path, "w", encoding="utf-8") as file:
+            for stack, count in self.stacks.most_common():
+                file.write(f"{stack} {count}\n")
@@ -56,9 +56,12 @@ ROBOTSTXT_OBEY = False
 
 # Enable or disable extensions
 # See https://docs.scrapy.org/en/latest/topics/extensions.html
-# EXTENSIONS = {
-#    "scrapy.extensions.telnet.TelnetConsole": None,
-# }
+EXTENSIONS = {
+    # Only active when SPIDER_PROFILE_FILE is set
+    "apps.crawler_app.esmerdis_scraper.instrumentation.SamplingProfiler": 500,
+    # Only active for spiders started with a `run_id`
+    "apps.crawler_app.esmerdis_scraper.extensions.LeaseHeartbeat": 500,
+}
 
 # Configure item pipelines
 # See https://docs.scrapy.org/en/latest/topics/item-pipeline.html
@@ -115,5 +118,14 @@ sys.path.insert(0, DJANGO_PROJECT_ROOT)
 # Set Django settings module
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
-# Initialize Django
-django.setup()
+# Initialize Django, unless the process (e.g. a Celery worker) already did
+from django.apps import apps
+
+if not apps.ready:
+    django.setup()
+
+# Per-callback wall/CPU timings in the crawl stats (see instrumentation.py)
+SPIDER_TIMINGS = os.getenv("SPIDER_TIMINGS", "false").lower() == "true"
+# Folded stacks of a sampled crawl profile, for flamegraph.pl or speedscope
+SPIDER_PROFILE_FILE = os.getenv("SPIDER_PROFILE_FILE")
+SPIDER_PROFILE_INTERVAL = float(os.getenv("SPIDER_PROFILE_INTERVAL", 0.005))
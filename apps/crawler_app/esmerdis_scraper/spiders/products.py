@@ -1,8 +1,15 @@
-import asyncio
 import scrapy
-from apps.crawler_app.models import Product, Category
-from config.settings import logger
+from apps.crawler_app.models import (
+    Product,
+    Category,
+    save_crawled_products,
+    tracked_values,
+)
+from apps.crawler_app.cache import bump_data_version
+from utils.logging import logger
+from apps.crawler_app.esmerdis_scraper.instrumentation import timed
 from asgiref.sync import sync_to_async
+from scrapy.utils.defer import deferred_from_coro
 from dataclasses import dataclass
 
 
@@ -24,10 +31,16 @@ class ProductSpider(scrapy.Spider):
     name = "products"
     allowed_domains = ["esmerdis.com"]
     start_urls = ["https://www.esmerdis.com/shop/page/1"]
+    # Set by `crawl_shard` to the run holding the crawl lease
+    run_id = None
 
-    def __init__(self, *args, **kwargs):
+    def __init__(self, start_url=None, *args, **kwargs):
         super().__init__(*args, **kwargs)
+        # A crawl shard only lists one category subtree
+        if start_url:
+            self.start_urls = [start_url]
         self.products_to_process: list[ProductItem] = []
+        self.timings_enabled = False
 
     @classmethod
     def from_crawler(cls, crawler, *args, **kwargs):
@@ -36,8 +49,10 @@ class ProductSpider(scrapy.Spider):
         crawler.signals.connect(
             spider.spider_closed, signal=scrapy.signals.spider_closed
         )
+        spider.timings_enabled = crawler.settings.getbool("SPIDER_TIMINGS")
         return spider
 
+    @timed
     def parse(self, response):
         try:
             logger.info(f"🔍 Parsing page: {response.url}")
@@ -97,6 +112,7 @@ class ProductSpider(scrapy.Spider):
         product_info.images = images
         return product_info
 
+    @timed
     def get_price(
         self, response: scrapy.http.Response, product_info: ProductItem = None
     ) -> ProductItem:
@@ -137,6 +153,7 @@ class ProductSpider(scrapy.Spider):
         product_info.availability = availability
         return product_info
 
+    @timed
     async def product_info_in_product_page(
         self, response: scrapy.http.Response, product_info: ProductItem = None
     ) -> ProductItem:
@@ -150,11 +167,16 @@ class ProductSpider(scrapy.Spider):
 
         self.products_to_process.append(product_info)
 
-    def spider_closed(self, spider):
+    def spider_closed(self, spider, reason):
         """Runs `process_products` after crawling is complete."""
+        if reason == "lease_lost":
+            logger.warning("⏭️ Another run took over the crawl, not saving products")
+            return
         logger.info("✅ Crawling finished - Running process_products()")
-        asyncio.create_task(self.process_products())
+        # Returning the deferred keeps the crawler open until products are saved
+        return deferred_from_coro(self.process_products())
 
+    @timed
     async def process_products(self):
         """Processes products in bulk: fetches existing, updates, and inserts new products."""
         try:
@@ -172,40 +194,53 @@ class ProductSpider(scrapy.Spider):
 
             products_to_insert = []
             products_to_update = []
+            # A product listed on several pages is saved once
+            crawled = {p.site_id: p for p in self.products_to_process}
 
-            for product_data in self.products_to_process:
+            for product_data in crawled.values():
                 product_data = product_data.__dict__
                 if product_data["site_id"] in existing_products:
                     existing_product = existing_products[product_data["site_id"]]
+                    before = tracked_values(existing_product)
                     for key, value in product_data.items():
                         setattr(existing_product, key, value)
-                    products_to_update.append(existing_product)
+                    existing_product.last_seen_run = self.run_id
+                    products_to_update.append((existing_product, before))
                 else:
-                    products_to_insert.append(Product(**product_data))
+                    products_to_insert.append(
+                        Product(**product_data, last_seen_run=self.run_id)
+                    )
 
             logger.info(
                 f"🔍 Inserting {len(products_to_insert)} new products"
-                f" and updating {len(products_to_update)} existing products"
+                f" and checking {len(products_to_update)} existing products"
+            )
+
+            inserted, updated = await sync_to_async(save_crawled_products)(
+                products_to_insert, products_to_update, self.run_id
             )
 
-            if products_to_insert:
-                await sync_to_async(Product.objects.bulk_create)(
-                    products_to_insert, ignore_conflicts=True
-                )
+            # Bulk writes skip model signals, so invalidate API caches here
+            if inserted or updated:
+                await sync_to_async(bump_data_version)()
 
-            if products_to_update:
-                await sync_to_async(Product.objects.bulk_update)(
-                    products_to_update, ["title", "url", "images"]
-                )
+            stats = self.crawler.stats
+            stats.set_value("products/scraped", len(crawled))
+            stats.set_value("products/inserted", inserted)
+            stats.set_value("products/updated", updated)
+            stats.set_value("products/unchanged", len(products_to_update) - updated)
 
             logger.info(
-                f"✅ Processed {len(self.products_to_process)} products in bulk!"
-                f"Inserted: {len(products_to_insert)} | Updated: {len(products_to_update)}"
+                f"✅ Processed {len(crawled)} products in bulk!"
+                f"Inserted: {inserted} | Updated: {updated}"
             )
 
         except Exception as e:
             logger.error(f"🔥 Error in bulk processing: {e}", exc_info=True)
+            # The shard must not count as complete, see `shard_failed`
+            self.crawler.stats.set_value("products/save_error", repr(e))
 
+    @timed
     async def get_or_create_category(self, full_category_path):
         """Creates categories recursively from a hierarchical string (e.g., decoration>bedroom>bed)."""
         if full_category_path.endswith("/"):
@@ -246,6 +281,7 @@ class ProductSpider(scrapy.Spider):
         num = str(num).strip().replace(",", "")
         return float(num.translate(str.maketrans(persian_numbers, english_numbers)))
 
+    @timed
     async def get_info(self, response, product_info: ProductItem = None) -> ProductItem:
         """
         Extracts product information from the product page.
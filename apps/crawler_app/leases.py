@@ -0,0 +1,91 @@
+"""
+Crawl leases: at most one crawl run at a time.
+
+A run acquires the `CrawlLease` row of its crawl before dispatching any shard
+and holds it until the chord callback releases it. Each shard renews the
+lease with heartbeats carrying its progress, so a lease that is not renewed
+within `CRAWL_LEASE_TTL` seconds belongs to a dead run and is taken over by
+the next one; the old run's shards notice on their next heartbeat and stop.
+
+Usage:
+    lease, acquired = acquire_lease("catalog")
+    if acquired:
+        heartbeat("catalog", lease.run_id, key=shard, progress={"pages": 10})
+        release_lease("catalog", lease.run_id)
+"""
+
+import os
+import socket
+import uuid
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from apps.crawler_app.models import CrawlLease
+from utils.logging import logger
+
+
+def worker_name() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def acquire_lease(name: str, ttl: int = None) -> tuple[CrawlLease, bool]:
+    """
+    Starts a new run holding the lease, like `get_or_create`.
+
+    Returns the lease and whether it was acquired; when it wasn't, the lease
+    is the active run's.
+    """
+    ttl = ttl or settings.CRAWL_LEASE_TTL
+    now = timezone.now()
+    with transaction.atomic():
+        lease, _ = CrawlLease.objects.select_for_update().get_or_create(name=name)
+        if lease.run_id and lease.expires_at > now:
+            return lease, False
+        if lease.run_id:
+            logger.warning(
+                f"♻️ Taking over crawl lease {name} of run {lease.run_id}"
+                f" ({lease.owner}), last heartbeat {lease.heartbeat_at}"
+            )
+        lease.run_id = uuid.uuid4()
+        lease.owner = worker_name()
+        lease.acquired_at = lease.heartbeat_at = now
+        lease.expires_at = now + timedelta(seconds=ttl)
+        lease.progress = {}
+        lease.save()
+    return lease, True
+
+
+def heartbeat(
+    name: str, run_id, ttl: int = None, key: str = None, progress: dict = None
+) -> bool:
+    """
+    Renews the lease of `run_id` and stores `progress` under `key`.
+
+    Returns `False` when the run no longer holds the lease.
+    """
+    ttl = ttl or settings.CRAWL_LEASE_TTL
+    now = timezone.now()
+    with transaction.atomic():
+        lease = (
+            CrawlLease.objects.select_for_update()
+            .filter(name=name, run_id=run_id)
+            .first()
+        )
+        if lease is None:
+            return False
+        lease.heartbeat_at = now
+        lease.expires_at = now + timedelta(seconds=ttl)
+        if key is not None:
+            lease.progress[key] = progress
+        lease.save(update_fields=["heartbeat_at", "expires_at", "progress"])
+    return True
+
+
+def release_lease(name: str, run_id) -> bool:
+    """Ends the run; `False` when it had already lost the lease."""
+    return bool(
+        CrawlLease.objects.filter(name=name, run_id=run_id).update(
+            run_id=None, expires_at=timezone.now()
+        )
+    )
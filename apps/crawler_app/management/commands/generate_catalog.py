@@ -0,0 +1,64 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from apps.crawler_app.models import Category
+from apps.crawler_app.synthetic import PREFIX, clear_catalog, generate_catalog
+
+
+class Command(BaseCommand):
+    help = "Generates a synthetic catalog (categories and products) for load tests."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=10_000)
+        parser.add_argument("--depth", type=int, default=3, help="Category levels")
+        parser.add_argument(
+            "--fanout", type=int, default=6, help="Children per category"
+        )
+        parser.add_argument(
+            "--variants",
+            type=int,
+            default=500,
+            help="Distinct descriptions and specifications",
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--chunk-size", type=int, help="Defaults to BULK_WRITE_CHUNK_SIZE"
+        )
+        parser.add_argument(
+            "--clear",
+            action="store_true",
+            help="Delete the previously generated catalog first",
+        )
+
+    def handle(self, *args, **options):
+        if options["clear"]:
+            products, categories = clear_catalog()
+            self.stdout.write(
+                f"Deleted {products} products and {categories} categories"
+            )
+        elif Category.objects.filter(slug__startswith=PREFIX).exists():
+            raise CommandError("A generated catalog exists, pass --clear to replace it")
+        if not options["products"]:
+            return
+
+        started = time.perf_counter()
+
+        def progress(done, total):
+            rate = done / (time.perf_counter() - started)
+            self.stdout.write(f"{done}/{total} products ({rate:.0f}/s)")
+
+        summary = generate_catalog(
+            options["products"],
+            depth=options["depth"],
+            fanout=options["fanout"],
+            variants=options["variants"],
+            seed=options["seed"],
+            chunk_size=options["chunk_size"],
+            progress=progress,
+        )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {summary['products']} products in"
+                f" {summary['categories']} categories ({summary['leaves']} leaves)"
+                f" in {time.perf_counter() - started:.1f}s"
+            )
+        )
@@ -0,0 +1,29 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from apps.crawler_app.snapshots import SNAPSHOT_FORMATS, prune_snapshots, write_snapshot
+
+
+class Command(BaseCommand):
+    help = "Writes a versioned Arrow/Parquet snapshot of products and categories."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=SNAPSHOT_FORMATS)
+        parser.add_argument("--directory", help="Defaults to SNAPSHOT_DIR")
+        parser.add_argument(
+            "--keep",
+            type=int,
+            help="Snapshots to keep after writing (defaults to SNAPSHOT_KEEP)",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            manifest = write_snapshot(options["format"], options["directory"])
+        except ImproperlyConfigured as e:
+            raise CommandError(str(e))
+        prune_snapshots(options["keep"], options["directory"])
+
+        for name, table in manifest["tables"].items():
+            self.stdout.write(
+                f"{name}: {table['rows']} rows, {table['bytes']} bytes ({table['file']})"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Snapshot {manifest['version']}"))
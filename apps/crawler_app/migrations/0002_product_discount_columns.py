@@ -0,0 +1,71 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:07
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crawler_app", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="discount_pct",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=models.Case(
+                    models.When(
+                        models.Q(
+                            ("original_price__gt", 0),
+                            ("original_price__gt", models.F("discount_price")),
+                        ),
+                        then=django.db.models.expressions.CombinedExpression(
+                            django.db.models.expressions.CombinedExpression(
+                                django.db.models.expressions.CombinedExpression(
+                                    models.F("original_price"),
+                                    "-",
+                                    models.F("discount_price"),
+                                ),
+                                "*",
+                                models.Value(100.0),
+                            ),
+                            "/",
+                            models.F("original_price"),
+                        ),
+                    ),
+                    default=models.Value(0.0),
+                ),
+                output_field=models.FloatField(),
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="has_discount",
+            field=models.GeneratedField(
+                db_persist=True,
+                expression=models.ExpressionWrapper(
+                    models.Q(("original_price__gt", models.F("discount_price"))),
+                    output_field=models.BooleanField(),
+                ),
+                output_field=models.BooleanField(),
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                condition=models.Q(("has_discount", True)),
+                fields=["-discount_pct", "id"],
+                name="product_discount_pct_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["has_discount", "discount_price"],
+                name="product_has_discount_price_idx",
+            ),
+        ),
+    ]
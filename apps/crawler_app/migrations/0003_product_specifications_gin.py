@@ -0,0 +1,22 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:20
+
+import django.contrib.postgres.indexes
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crawler_app", "0002_product_discount_columns"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="product",
+            index=django.contrib.postgres.indexes.GinIndex(
+                fields=["specifications"],
+                name="product_specs_path_ops_idx",
+                opclasses=["jsonb_path_ops"],
+            ),
+        ),
+    ]
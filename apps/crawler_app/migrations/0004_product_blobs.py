@@ -0,0 +1,127 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:40
+
+import django.contrib.postgres.indexes
+import django.db.models.deletion
+from django.db import migrations, models
+from apps.crawler_app.blobs import content_digest
+
+CHUNK_SIZE = 2000
+
+
+def copy_to_blobs(apps, schema_editor):
+    """Moves every product's description and specifications into blobs."""
+    Product = apps.get_model("crawler_app", "Product")
+    DescriptionBlob = apps.get_model("crawler_app", "DescriptionBlob")
+    SpecificationBlob = apps.get_model("crawler_app", "SpecificationBlob")
+
+    rows = Product.objects.order_by("pk").values_list(
+        "pk", "description", "specifications"
+    )
+    last_pk = 0
+    while chunk := list(rows.filter(pk__gt=last_pk)[:CHUNK_SIZE]):
+        last_pk = chunk[-1][0]
+        descriptions, specifications, products = {}, {}, []
+        for pk, description, data in chunk:
+            data = data or {}
+            spec_digest = content_digest(data)
+            specifications[spec_digest] = data
+            description_digest = None
+            if description is not None:
+                description_digest = content_digest(description)
+                descriptions[description_digest] = description
+            products.append(
+                Product(
+                    pk=pk,
+                    description_blob_id=description_digest,
+                    specifications_blob_id=spec_digest,
+                )
+            )
+        DescriptionBlob.objects.bulk_create(
+            [DescriptionBlob(digest=d, text=t) for d, t in descriptions.items()],
+            ignore_conflicts=True,
+        )
+        SpecificationBlob.objects.bulk_create(
+            [SpecificationBlob(digest=d, data=v) for d, v in specifications.items()],
+            ignore_conflicts=True,
+        )
+        Product.objects.bulk_update(
+            products, ["description_blob", "specifications_blob"]
+        )
+
+
+def copy_from_blobs(apps, schema_editor):
+    """Restores the inline columns from the blobs."""
+    Product = apps.get_model("crawler_app", "Product")
+    Product.objects.update(
+        description=models.Subquery(
+            apps.get_model("crawler_app", "DescriptionBlob")
+            .objects.filter(pk=models.OuterRef("description_blob_id"))
+            .values("text")
+        ),
+        specifications=models.Subquery(
+            apps.get_model("crawler_app", "SpecificationBlob")
+            .objects.filter(pk=models.OuterRef("specifications_blob_id"))
+            .values("data")
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crawler_app", "0003_product_specifications_gin"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DescriptionBlob",
+            fields=[
+                (
+                    "digest",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("text", models.TextField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name="SpecificationBlob",
+            fields=[
+                (
+                    "digest",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("data", models.JSONField()),
+            ],
+            options={
+                "indexes": [
+                    django.contrib.postgres.indexes.GinIndex(
+                        fields=["data"],
+                        name="specblob_data_path_ops_idx",
+                        opclasses=["jsonb_path_ops"],
+                    )
+                ],
+            },
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="description_blob",
+            field=models.ForeignKey(
+                blank=True,
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="crawler_app.descriptionblob",
+            ),
+        ),
+        migrations.AddField(
+            model_name="product",
+            name="specifications_blob",
+            field=models.ForeignKey(
+                null=True,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="crawler_app.specificationblob",
+            ),
+        ),
+        migrations.RunPython(copy_to_blobs, copy_from_blobs),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crawler_app", "0004_product_blobs"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="product",
+            name="product_specs_path_ops_idx",
+        ),
+        migrations.RemoveField(
+            model_name="product",
+            name="description",
+        ),
+        migrations.RemoveField(
+            model_name="product",
+            name="specifications",
+        ),
+        migrations.AlterField(
+            model_name="product",
+            name="specifications_blob",
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="+",
+                to="crawler_app.specificationblob",
+            ),
+        ),
+    ]
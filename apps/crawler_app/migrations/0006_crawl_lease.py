@@ -0,0 +1,28 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crawler_app", "0005_product_drop_inline_blobs"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CrawlLease",
+            fields=[
+                (
+                    "name",
+                    models.CharField(max_length=64, primary_key=True, serialize=False),
+                ),
+                ("run_id", models.UUIDField(blank=True, null=True)),
+                ("owner", models.CharField(blank=True, max_length=255)),
+                ("acquired_at", models.DateTimeField(blank=True, null=True)),
+                ("heartbeat_at", models.DateTimeField(blank=True, null=True)),
+                ("expires_at", models.DateTimeField(blank=True, null=True)),
+                ("progress", models.JSONField(default=dict)),
+            ],
+        ),
+    ]
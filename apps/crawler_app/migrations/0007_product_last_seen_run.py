@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-19 13:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crawler_app", "0006_crawl_lease"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="product",
+            name="last_seen_run",
+            field=models.UUIDField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-19 14:02
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crawler_app", "0008_product_change"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="descriptionblob",
+            name="touched_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="specificationblob",
+            name="touched_at",
+            field=models.DateTimeField(
+                auto_now=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+    ]
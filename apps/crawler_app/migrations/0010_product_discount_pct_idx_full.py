@@ -0,0 +1,23 @@
+# Generated by Django 5.1.6 on 2026-10-19 14:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("crawler_app", "0009_blob_touched_at"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="product",
+            name="product_discount_pct_idx",
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["-discount_pct", "id"], name="product_discount_pct_idx"
+            ),
+        ),
+    ]
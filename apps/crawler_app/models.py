@@ -1,4 +1,19 @@
-from django.db import models
+import json
+from datetime import timedelta
+from django.conf import settings
+from django.contrib.postgres.indexes import GinIndex
+from django.db import connection, models, transaction
+from django.db.models import (
+    Case,
+    Count,
+    ExpressionWrapper,
+    F,
+    Q,
+    Value,
+    When,
+)
+from django.utils import timezone
+from apps.crawler_app.blobs import content_digest
 
 
 class Category(models.Model):
@@ -24,6 +39,34 @@ class Category(models.Model):
         return self.slug
 
 
+class SpecificationBlob(models.Model):
+    """A distinct `Product.specifications` dict, stored once per content hash."""
+
+    digest = models.CharField(max_length=64, primary_key=True)
+    data = models.JSONField()
+    # Refreshed by `store_blobs`, so the GC spares blobs about to be referenced
+    touched_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Serves `data @> {...}` containment (spec.* filters)
+            GinIndex(
+                fields=["data"],
+                opclasses=["jsonb_path_ops"],
+                name="specblob_data_path_ops_idx",
+            ),
+        ]
+
+
+class DescriptionBlob(models.Model):
+    """A distinct `Product.description` text, stored once per content hash."""
+
+    digest = models.CharField(max_length=64, primary_key=True)
+    text = models.TextField()
+    # Refreshed by `store_blobs`, so the GC spares blobs about to be referenced
+    touched_at = models.DateTimeField(auto_now=True)
+
+
 class Product(models.Model):
     """
     Product model
@@ -34,12 +77,15 @@ class Product(models.Model):
     - title: str
     - original_price: float
     - discount_price: float
-    - description: str
-    - specifications: dict
+    - description: str (stored deduplicated in `DescriptionBlob`)
+    - specifications: dict (stored deduplicated in `SpecificationBlob`)
     - category: Category
     - url: str
     - images: list[str]
     - availability: bool
+    - last_seen_run: uuid (the crawl run that last found it on the site)
+    - has_discount: bool (generated)
+    - discount_pct: float (generated)
     """
 
     id = models.AutoField(primary_key=True)
@@ -47,16 +93,365 @@ class Product(models.Model):
     title = models.CharField(max_length=255)
     original_price = models.FloatField()
     discount_price = models.FloatField()
-    description = models.TextField(blank=True, null=True)
-    specifications = models.JSONField(default=dict)
+    description_blob = models.ForeignKey(
+        DescriptionBlob,
+        null=True,
+        blank=True,
+        on_delete=models.PROTECT,
+        related_name="+",
+    )
+    specifications_blob = models.ForeignKey(
+        SpecificationBlob, on_delete=models.PROTECT, related_name="+"
+    )
     category = models.ForeignKey(
         Category, on_delete=models.CASCADE, related_name="products"
     )
     url = models.URLField()
     images = models.JSONField()
     availability = models.BooleanField(default=True)
+    last_seen_run = models.UUIDField(null=True, blank=True)
+    # Stored generated columns, so discount filters and ordering can use indexes
+    has_discount = models.GeneratedField(
+        expression=ExpressionWrapper(
+            Q(original_price__gt=F("discount_price")),
+            output_field=models.BooleanField(),
+        ),
+        output_field=models.BooleanField(),
+        db_persist=True,
+    )
+    discount_pct = models.GeneratedField(
+        expression=Case(
+            When(
+                Q(original_price__gt=0) & Q(original_price__gt=F("discount_price")),
+                then=(F("original_price") - F("discount_price"))
+                * Value(100.0)
+                / F("original_price"),
+            ),
+            default=Value(0.0),
+        ),
+        output_field=models.FloatField(),
+        db_persist=True,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Not partial: `min_discount_pct` and `ordering=-discount` don't
+            # imply `has_discount`, so the planner could not use it for them
+            models.Index(
+                fields=["-discount_pct", "id"],
+                name="product_discount_pct_idx",
+            ),
+            models.Index(
+                fields=["has_discount", "discount_price"],
+                name="product_has_discount_price_idx",
+            ),
+        ]
+
     def __str__(self):
         return self.title
+
+    # Values assigned to `description`/`specifications` until `store_blobs` runs
+    def _pending(self) -> dict:
+        return self.__dict__.setdefault("_pending_blobs", {})
+
+    @property
+    def description(self):
+        if "description" in self._pending():
+            return self._pending()["description"]
+        return self.description_blob.text if self.description_blob_id else None
+
+    @description.setter
+    def description(self, value):
+        self._pending()["description"] = value
+
+    @property
+    def specifications(self):
+        if "specifications" in self._pending():
+            return self._pending()["specifications"]
+        return self.specifications_blob.data if self.specifications_blob_id else {}
+
+    @specifications.setter
+    def specifications(self, value):
+        self._pending()["specifications"] = value
+
+    def save(self, *args, **kwargs):
+        store_blobs([self])
+        super().save(*args, **kwargs)
+
+
+class CrawlLease(models.Model):
+    """
+    The lease of a crawl run, one row per crawl `name`.
+
+    A run holds the lease while `run_id` is set and `expires_at` is in the
+    future; heartbeats push `expires_at` forward and record `progress`, so a
+    run whose worker died is taken over once it expires.
+    """
+
+    name = models.CharField(max_length=64, primary_key=True)
+    run_id = models.UUIDField(null=True, blank=True)
+    owner = models.CharField(max_length=255, blank=True)
+    acquired_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    expires_at = models.DateTimeField(null=True, blank=True)
+    progress = models.JSONField(default=dict)
+
+    def __str__(self):
+        return f"{self.name} ({self.run_id or 'free'})"
+
+
+class ProductChange(models.Model):
+    """
+    Outbox of product changes, written in the transaction making them.
+
+    `fields` lists the changed fields of an update (`TRACKED_FIELDS` names).
+    `drain_product_changes` hands the rows to the `PRODUCT_CHANGE_HANDLERS` in
+    batches and deletes them once delivered, so each change is seen at least
+    once.
+    """
+
+    INSERTED, UPDATED, DELETED = "inserted", "updated", "deleted"
+    ACTIONS = [(INSERTED, "Inserted"), (UPDATED, "Updated"), (DELETED, "Deleted")]
+
+    id = models.BigAutoField(primary_key=True)
+    # Not a foreign key, changes of deleted products are kept
+    product_id = models.BigIntegerField()
+    site_id = models.CharField(max_length=255)
+    action = models.CharField(max_length=8, choices=ACTIONS)
+    fields = models.JSONField(default=list, blank=True)
+    run_id = models.UUIDField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.action} {self.site_id}"
+
+
+# Product fields whose changes are recorded, by their attribute on the model
+TRACKED_FIELDS = {
+    "title": "title",
+    "url": "url",
+    "images": "images",
+    "original_price": "original_price",
+    "discount_price": "discount_price",
+    "availability": "availability",
+    "category": "category_id",
+    "description": "description_blob_id",
+    "specifications": "specifications_blob_id",
+}
+
+# Columns written for crawled products that changed
+CRAWL_UPDATE_FIELDS = [
+    "title",
+    "url",
+    "images",
+    "original_price",
+    "discount_price",
+    "availability",
+    "category",
+    "description_blob",
+    "specifications_blob",
+    "last_seen_run",
+    "updated_at",
+]
+
+
+def tracked_values(product) -> dict:
+    """The stored values of `TRACKED_FIELDS`, taken before changing a product."""
+    return {name: getattr(product, attname) for name, attname in TRACKED_FIELDS.items()}
+
+
+def store_blobs(products) -> None:
+    """
+    Points products at the blobs of their assigned description/specifications.
+
+    Blobs are upserted with one `INSERT ... ON CONFLICT DO UPDATE` per blob
+    table, so storing the same content again only refreshes `touched_at`.
+    That keeps `delete_orphan_blobs` from removing an existing blob between
+    here and the write of the product referencing it. Call this before
+    `bulk_create`/`bulk_update`, which bypass `Product.save()`.
+    """
+    descriptions, specifications = {}, {}
+    for product in products:
+        pending = product._pending()
+        if "description" in pending:
+            text = pending.pop("description")
+            product.description_blob_id = None
+            if text is not None:
+                product.description_blob_id = content_digest(text)
+                descriptions[product.description_blob_id] = text
+        if "specifications" in pending or not product.specifications_blob_id:
+            data = pending.pop("specifications", None) or {}
+            product.specifications_blob_id = content_digest(data)
+            specifications[product.specifications_blob_id] = data
+
+    # Sorted, so concurrent writers lock existing rows in the same order
+    DescriptionBlob.objects.bulk_create(
+        [
+            DescriptionBlob(digest=digest, text=text)
+            for digest, text in sorted(descriptions.items())
+        ],
+        update_conflicts=True,
+        unique_fields=["digest"],
+        update_fields=["touched_at"],
+    )
+    SpecificationBlob.objects.bulk_create(
+        [
+            SpecificationBlob(digest=digest, data=data)
+            for digest, data in sorted(specifications.items())
+        ],
+        update_conflicts=True,
+        unique_fields=["digest"],
+        update_fields=["touched_at"],
+    )
+
+
+def delete_orphan_blobs(grace: int = None) -> tuple[int, int]:
+    """
+    Deletes blobs no product references and returns `(descriptions, specs)`.
+
+    Blobs stored or reused in the last `grace` seconds (`BLOB_GC_GRACE`) are
+    kept, as their products may not be written yet. Plain `DELETE`s: the ORM
+    would load every orphan to check the `PROTECT` foreign keys.
+    """
+    grace = settings.BLOB_GC_GRACE if grace is None else grace
+    cutoff = timezone.now() - timedelta(seconds=grace)
+    product_table = Product._meta.db_table
+    deleted = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for blob, column in (
+            (DescriptionBlob, "description_blob_id"),
+            (SpecificationBlob, "specifications_blob_id"),
+        ):
+            cursor.execute(
+                f"""
+                DELETE FROM "{blob._meta.db_table}" AS blob
+                WHERE blob.touched_at < %s AND NOT EXISTS (
+                    SELECT 1 FROM "{product_table}" AS product
+                    WHERE product.{column} = blob.digest
+                )
+                """,
+                [cutoff],
+            )
+            deleted.append(cursor.rowcount)
+    return tuple(deleted)
+
+
+def save_crawled_products(
+    products_to_insert, products_to_update, run_id=None
+) -> tuple[int, int]:
+    """
+    Writes crawled products and their `ProductChange`s in one transaction.
+
+    `products_to_update` holds `(product, tracked_values(product))` pairs taken
+    before the crawled values were assigned. Only products whose tracked
+    fields changed are rewritten (and get a new `updated_at`), the others are
+    just stamped with `run_id`. Products inserted by another shard in the
+    meantime are overwritten and recorded as updated. Returns the number of
+    inserted and changed products.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        # Descriptions and specifications are shared, content-addressed blobs
+        store_blobs(products_to_insert + [product for product, _ in products_to_update])
+
+        changes, changed, unchanged = [], [], []
+        for product, before in products_to_update:
+            fields = [
+                name
+                for name, value in tracked_values(product).items()
+                if value != before[name]
+            ]
+            if not fields:
+                unchanged.append(product.pk)
+                continue
+            product.updated_at = now
+            changed.append(product)
+            changes.append(
+                ProductChange(
+                    product_id=product.pk,
+                    site_id=product.site_id,
+                    action=ProductChange.UPDATED,
+                    fields=fields,
+                    run_id=run_id,
+                )
+            )
+
+        inserted = 0
+        if products_to_insert:
+            # Another shard may have inserted a product since it was looked up
+            Product.objects.bulk_create(
+                products_to_insert,
+                update_conflicts=True,
+                unique_fields=["site_id"],
+                update_fields=CRAWL_UPDATE_FIELDS,
+            )
+            # Rows that hit the conflict kept the other shard's `created_at`
+            created_at = dict(
+                Product.objects.filter(
+                    pk__in=[product.pk for product in products_to_insert]
+                ).values_list("pk", "created_at")
+            )
+            for product in products_to_insert:
+                is_new = created_at[product.pk] == product.created_at
+                inserted += is_new
+                changes.append(
+                    ProductChange(
+                        product_id=product.pk,
+                        site_id=product.site_id,
+                        action=(
+                            ProductChange.INSERTED if is_new else ProductChange.UPDATED
+                        ),
+                        # The values it replaced are unknown, any may have changed
+                        fields=[] if is_new else list(TRACKED_FIELDS),
+                        run_id=run_id,
+                    )
+                )
+        if changed:
+            Product.objects.bulk_update(changed, CRAWL_UPDATE_FIELDS)
+        if unchanged:
+            Product.objects.filter(pk__in=unchanged).update(last_seen_run=run_id)
+        ProductChange.objects.bulk_create(changes)
+    return inserted, len(changes) - inserted
+
+
+def mark_unseen_products(run_id, min_seen: float) -> int | None:
+    """
+    Marks available products the crawl run `run_id` did not see unavailable.
+
+    A single statement updating the products and recording their
+    `ProductChange`s; skipped (returns `None`) when the run saw less than
+    `min_seen` of the products that were available or seen, as a partial crawl
+    would otherwise take most of the catalog offline. Returns the rows marked.
+    """
+    counts = Product.objects.aggregate(
+        seen=Count("pk", filter=Q(last_seen_run=run_id)),
+        known=Count("pk", filter=Q(last_seen_run=run_id) | Q(availability=True)),
+    )
+    if counts["seen"] < counts["known"] * min_seen:
+        return None
+    now = timezone.now()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"""
+            WITH marked AS (
+                UPDATE "{Product._meta.db_table}"
+                SET availability = false, updated_at = %s
+                WHERE availability AND last_seen_run IS DISTINCT FROM %s::uuid
+                RETURNING id, site_id
+            )
+            INSERT INTO "{ProductChange._meta.db_table}"
+                (product_id, site_id, action, fields, run_id, created_at)
+            SELECT id, site_id, %s, %s::jsonb, %s::uuid, %s FROM marked
+            """,
+            [
+                now,
+                str(run_id),
+                ProductChange.UPDATED,
+                json.dumps(["availability"]),
+                str(run_id),
+                now,
+            ],
+        )
+        return cursor.rowcount
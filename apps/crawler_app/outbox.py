@@ -0,0 +1,67 @@
+"""
+Delivery of the `ProductChange` outbox.
+
+`drain_changes` locks the oldest changes batch by batch (`SKIP LOCKED`, so
+several consumers can drain side by side), passes each batch to every handler
+in `PRODUCT_CHANGE_HANDLERS` and deletes it in the same transaction. A failing
+handler rolls the batch back, so it is delivered again later: handlers must
+be idempotent. A handler is a dotted path to a callable taking the list of
+`ProductChange`s, e.g.:
+
+    def reindex_products(changes):
+        ids = {change.product_id for change in changes}
+        ...
+
+`prune_changes` deletes changes older than `PRODUCT_CHANGE_RETENTION`, so
+undelivered changes (e.g. while no handler is configured) don't pile up.
+"""
+
+from datetime import timedelta
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from apps.crawler_app.models import ProductChange
+
+
+def get_handlers() -> list:
+    return [import_string(path) for path in settings.PRODUCT_CHANGE_HANDLERS]
+
+
+def drain_changes(batch_size: int = None, handlers: list = None) -> int:
+    """
+    Delivers pending changes until none are left, returns how many.
+
+    Without handlers nothing is delivered, the changes stay in the outbox for
+    when one is configured.
+    """
+    batch_size = batch_size or settings.PRODUCT_CHANGE_BATCH_SIZE
+    handlers = get_handlers() if handlers is None else handlers
+    delivered = 0
+    if not handlers:
+        return delivered
+    while True:
+        with transaction.atomic():
+            batch = list(
+                ProductChange.objects.select_for_update(skip_locked=True).order_by(
+                    "id"
+                )[:batch_size]
+            )
+            if not batch:
+                return delivered
+            for handler in handlers:
+                handler(batch)
+            ProductChange.objects.filter(
+                pk__in=[change.pk for change in batch]
+            ).delete()
+        delivered += len(batch)
+
+
+def prune_changes(retention: int = None) -> int:
+    """Deletes changes older than `retention` seconds, returns how many."""
+    retention = settings.PRODUCT_CHANGE_RETENTION if retention is None else retention
+    if not retention:
+        return 0
+    cutoff = timezone.now() - timedelta(seconds=retention)
+    deleted, _ = ProductChange.objects.filter(created_at__lt=cutoff).delete()
+    return deleted
@@ -0,0 +1,108 @@
+"""
+Crawl shards: one crawl per top-level product category.
+
+`discover_shards` reads the top-level category links from the shop page (or,
+when the site can't be reached, the root categories of earlier crawls) and
+`scrape_products` runs one `crawl_shard` task per category subtree, so a full
+refresh is spread over the Celery workers. `shard_stats` and `merge_stats`
+reduce the Scrapy stats of each shard to what the chord callback reports.
+"""
+
+from urllib.parse import urljoin, urlsplit
+import httpx
+from django.conf import settings
+from scrapy import Selector
+from apps.crawler_app.models import Category
+from utils.logging import logger
+
+CATEGORY_PATH = "/product-category/"
+
+# Scrapy stats reported per shard, by the name they are reported under
+SHARD_STATS = {
+    "products": "products/scraped",
+    "inserted": "products/inserted",
+    "updated": "products/updated",
+    "pages": "response_received_count",
+    "errors": "log_count/ERROR",
+    "elapsed": "elapsed_time_seconds",
+}
+
+
+def category_url(base_url: str, slug: str) -> str:
+    origin = "{0.scheme}://{0.netloc}".format(urlsplit(base_url))
+    return f"{origin}{CATEGORY_PATH}{slug}/"
+
+
+def top_level_category_urls(html: str, base_url: str) -> list[str]:
+    """URLs of the top-level categories linked from a page, e.g. its menu."""
+    slugs = set()
+    for href in Selector(text=html).css(f'a[href*="{CATEGORY_PATH}"]::attr(href)'):
+        path = urlsplit(urljoin(base_url, href.get())).path
+        segments = path.split(CATEGORY_PATH, 1)[1].strip("/").split("/")
+        # Subcategories are crawled as part of their root's listing
+        if len(segments) == 1 and segments[0]:
+            slugs.add(segments[0])
+    return [category_url(base_url, slug) for slug in sorted(slugs)]
+
+
+def discover_shards() -> list[str]:
+    """Start URLs of the crawl shards, at least one."""
+    shop_url = settings.CRAWL_SHOP_URL
+    try:
+        response = httpx.get(shop_url, timeout=30, follow_redirects=True)
+        response.raise_for_status()
+        urls = top_level_category_urls(response.text, str(response.url))
+    except httpx.HTTPError as e:
+        logger.warning(f"⚠️ Could not read categories from {shop_url}: {e}")
+        urls = []
+
+    if not urls:
+        urls = [
+            category_url(shop_url, slug)
+            for slug in Category.objects.filter(parent=None)
+            .order_by("slug")
+            .values_list("slug", flat=True)
+        ]
+    # Without any categories, crawl the whole shop as a single shard
+    return urls or [shop_url]
+
+
+def shard_stats(start_url: str, stats: dict) -> dict:
+    """The JSON-safe summary of one shard's Scrapy stats."""
+    return {
+        "shard": start_url,
+        **{name: stats.get(key, 0) for name, key in SHARD_STATS.items()},
+        "finish_reason": stats.get("finish_reason"),
+        "save_error": stats.get("products/save_error"),
+    }
+
+
+def shard_failed(result: dict) -> bool:
+    """Whether a shard did not crawl and save its subtree completely."""
+    return result.get("finish_reason") != "finished" or bool(result.get("save_error"))
+
+
+def shard_empty(result: dict) -> bool:
+    """
+    Whether a complete shard found no products.
+
+    Not a failure: a top-level category may be empty, and reconciliation's
+    `CRAWL_RECONCILE_MIN_SEEN` threshold already guards against crawls that
+    came back mostly empty.
+    """
+    return not shard_failed(result) and not result.get("products")
+
+
+def merge_stats(results: list[dict]) -> dict:
+    """Totals over all shards; `elapsed` is the slowest shard."""
+    totals = {name: 0 for name in SHARD_STATS}
+    for result in results:
+        for name in SHARD_STATS:
+            value = result.get(name) or 0
+            totals[name] = (
+                max(totals[name], value) if name == "elapsed" else totals[name] + value
+            )
+    totals["shards"] = len(results)
+    totals["failed"] = sum(shard_failed(result) for result in results)
+    totals["empty"] = sum(shard_empty(result) for result in results)
+    return totals
@@ -0,0 +1,45 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from apps.crawler_app.cache import bump_data_version
+from apps.crawler_app.models import (
+    TRACKED_FIELDS,
+    Category,
+    Product,
+    ProductChange,
+)
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Category)
+def invalidate_catalog_caches(sender, **kwargs):
+    """Bumps the data version on single-row writes (bulk writes bump it explicitly)."""
+    bump_data_version()
+
+
+@receiver(post_save, sender=Product)
+def record_product_save(sender, instance, created, update_fields=None, **kwargs):
+    """Records single-row saves in the outbox, in the saving transaction."""
+    if created:
+        action, fields = ProductChange.INSERTED, []
+    else:
+        # Without `update_fields`, any tracked field may have changed
+        fields = [
+            name
+            for name, attname in TRACKED_FIELDS.items()
+            if update_fields is None
+            or {name, attname, attname.removesuffix("_id")} & set(update_fields)
+        ]
+        if not fields:
+            return
+        action = ProductChange.UPDATED
+    ProductChange.objects.create(
+        product_id=instance.pk, site_id=instance.site_id, action=action, fields=fields
+    )
+
+
+@receiver(post_delete, sender=Product)
+def record_product_delete(sender, instance, **kwargs):
+    """Records single-row deletes in the outbox, in the deleting transaction."""
+    ProductChange.objects.create(
+        product_id=instance.pk, site_id=instance.site_id, action=ProductChange.DELETED
+    )
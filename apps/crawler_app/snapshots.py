@@ -0,0 +1,329 @@
+"""
+Versioned columnar snapshots of the catalog.
+
+Each snapshot is a directory under `SNAPSHOT_DIR` holding `products` and
+`categories` as uncompressed Arrow IPC files (memory-mappable, zero-copy) or
+zstd Parquet files, plus a `manifest.json`. Frequent `specifications` keys are
+flattened into typed `spec.<group>.<key>` columns; the raw JSON is kept too.
+"""
+
+import json
+import os
+import re
+import shutil
+import tempfile
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+from apps.crawler_app.cache import get_data_version
+from apps.crawler_app.models import Category, Product, SpecificationBlob
+from utils.logging import logger
+
+# pyarrow is slow to import, so it is loaded by the first snapshot write
+pa = pq = None
+
+SNAPSHOT_FORMATS = ("arrow", "parquet")
+MANIFEST = "manifest.json"
+# Microseconds keep snapshots written within the same second apart
+VERSION_FORMAT = "%Y%m%dT%H%M%S%fZ"
+VERSION_RE = re.compile(r"^\d{8}T\d{6}(\d{6})?Z$")
+
+INTEGER_RE = r"^-?[0-9]+$"
+NUMBER_RE = r"^-?[0-9]+(\.[0-9]+)?$"
+
+# One row per specification key with its fill count and the narrowest type;
+# each distinct specification blob is expanded once, weighted by its products
+SPEC_KEYS_SQL = f"""
+    SELECT grp.key, spec.key, SUM(product.count)::int,
+           BOOL_AND(spec.value #>> '{{}}' ~ '{INTEGER_RE}'),
+           BOOL_AND(spec.value #>> '{{}}' ~ '{NUMBER_RE}')
+    FROM (
+        SELECT specifications_blob_id, COUNT(*) AS count
+        FROM {Product._meta.db_table} GROUP BY 1
+    ) product
+    JOIN {SpecificationBlob._meta.db_table} blob
+      ON blob.digest = product.specifications_blob_id,
+         jsonb_each(CASE WHEN jsonb_typeof(blob.data) = 'object'
+                    THEN blob.data ELSE '{{}}' END) grp,
+         jsonb_each(CASE WHEN jsonb_typeof(grp.value) = 'object'
+                    THEN grp.value ELSE '{{}}' END) spec
+    GROUP BY 1, 2
+    ORDER BY 1, 2
+"""
+
+PRODUCT_COLUMNS = [
+    "id",
+    "site_id",
+    "title",
+    "original_price",
+    "discount_price",
+    "has_discount",
+    "discount_pct",
+    "availability",
+    "category_id",
+    "url",
+    "images",
+    "description",
+    "specifications",
+    "created_at",
+    "updated_at",
+]
+# Product columns read from the deduplicated blobs
+BLOB_LOOKUPS = {
+    "description": "description_blob__text",
+    "specifications": "specifications_blob__data",
+}
+CATEGORY_COLUMNS = ["id", "name", "slug", "parent_id", "created_at", "updated_at"]
+
+
+def _load_pyarrow():
+    global pa, pq
+    if pa is None:
+        import pyarrow
+        import pyarrow.parquet
+
+        pa, pq = pyarrow, pyarrow.parquet
+
+
+def _base_schemas():
+    timestamp = pa.timestamp("us", tz="UTC")
+    products = [
+        ("id", pa.int64()),
+        ("site_id", pa.string()),
+        ("title", pa.string()),
+        ("original_price", pa.float64()),
+        ("discount_price", pa.float64()),
+        ("has_discount", pa.bool_()),
+        ("discount_pct", pa.float64()),
+        ("availability", pa.bool_()),
+        ("category_id", pa.int64()),
+        ("url", pa.string()),
+        ("images", pa.list_(pa.string())),
+        ("description", pa.string()),
+        ("specifications", pa.string()),
+        ("created_at", timestamp),
+        ("updated_at", timestamp),
+    ]
+    categories = [
+        ("id", pa.int64()),
+        ("name", pa.string()),
+        ("slug", pa.string()),
+        ("parent_id", pa.int64()),
+        ("created_at", timestamp),
+        ("updated_at", timestamp),
+    ]
+    return products, categories
+
+
+def spec_columns(min_share: float, total: int) -> list[tuple]:
+    """
+    Returns `(group, key, type)` for the specification keys worth a column.
+
+    Keys filled in fewer than `min_share` of the products stay in the raw
+    `specifications` JSON only.
+    """
+    threshold = max(1, min_share * total)
+    with connection.cursor() as cursor:
+        cursor.execute(SPEC_KEYS_SQL)
+        rows = cursor.fetchall()
+
+    columns = []
+    for group, key, count, is_integer, is_number in rows:
+        if count < threshold:
+            continue
+        kind = "int" if is_integer else "float" if is_number else "str"
+        columns.append((group, key, kind))
+    return columns
+
+
+def _spec_value(specifications, group, key, kind):
+    try:
+        value = specifications[group][key]
+    except (KeyError, TypeError):
+        return None
+    if value is None:
+        return None
+    try:
+        return (
+            int(value)
+            if kind == "int"
+            else float(value) if kind == "float" else str(value)
+        )
+    except (TypeError, ValueError):
+        # Written after the key types were computed
+        return None
+
+
+def _write_table(path, fmt, schema, rows, names, transform=None) -> int:
+    """
+    Writes `rows` (lists of tuples in `names` order) as one record batch each.
+
+    Returns the number of rows written.
+    """
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(path, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_file(path, schema)
+
+    total = 0
+    try:
+        for chunk in rows:
+            columns = dict(zip(names, map(list, zip(*chunk))))
+            if transform:
+                transform(columns)
+            writer.write_batch(pa.RecordBatch.from_pydict(columns, schema=schema))
+            total += len(chunk)
+    finally:
+        writer.close()
+    return total
+
+
+def _chunks(queryset, names, chunk_size):
+    """Streams `queryset` in lists of `chunk_size` tuples from a server-side cursor."""
+    chunk = []
+    lookups = [BLOB_LOOKUPS.get(name, name) for name in names]
+    for row in queryset.values_list(*lookups).iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _write_products(path, fmt, chunk_size, specs) -> int:
+    spec_types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string()}
+    spec_names = [f"spec.{group}.{key}" for group, key, _ in specs]
+    schema = pa.schema(
+        _base_schemas()[0]
+        + [(name, spec_types[spec[2]]) for name, spec in zip(spec_names, specs)]
+    )
+
+    def flatten(columns):
+        raw = columns["specifications"]
+        for name, (group, key, kind) in zip(spec_names, specs):
+            columns[name] = [_spec_value(value, group, key, kind) for value in raw]
+        columns["specifications"] = [
+            json.dumps(value, ensure_ascii=False) for value in raw
+        ]
+
+    rows = _chunks(Product.objects.order_by("id"), PRODUCT_COLUMNS, chunk_size)
+    return _write_table(path, fmt, schema, rows, PRODUCT_COLUMNS, flatten)
+
+
+def _write_categories(path, fmt, chunk_size) -> int:
+    schema = pa.schema(_base_schemas()[1])
+    rows = _chunks(Category.objects.order_by("id"), CATEGORY_COLUMNS, chunk_size)
+    return _write_table(path, fmt, schema, rows, CATEGORY_COLUMNS)
+
+
+def write_snapshot(fmt: str = None, directory: str = None) -> dict:
+    """
+    Writes a new catalog snapshot and returns its manifest.
+
+    Both tables are read in one `REPEATABLE READ` transaction, so they are
+    consistent with each other. The snapshot is written to a hidden directory
+    and renamed into place, so readers never see a partial version. An
+    existing version is never overwritten.
+    """
+    _load_pyarrow()
+    fmt = fmt or settings.SNAPSHOT_FORMAT
+    if fmt not in SNAPSHOT_FORMATS:
+        raise ValueError(f"Unknown snapshot format {fmt!r}")
+    directory = directory or settings.SNAPSHOT_DIR
+    chunk_size = settings.SNAPSHOT_CHUNK_SIZE
+
+    created_at = timezone.now()
+    version = created_at.strftime(VERSION_FORMAT)
+    target = os.path.join(directory, version)
+    os.makedirs(directory, exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=f".{version}.", suffix=".tmp", dir=directory)
+    os.chmod(staging, 0o755)
+
+    files = {"products": f"products.{fmt}", "categories": f"categories.{fmt}"}
+    outermost = not connection.in_atomic_block
+    try:
+        with transaction.atomic():
+            if outermost:
+                with connection.cursor() as cursor:
+                    cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            data_version = get_data_version()
+            specs = spec_columns(
+                settings.SNAPSHOT_SPEC_MIN_SHARE, Product.objects.count()
+            )
+            rows = {
+                "products": _write_products(
+                    os.path.join(staging, files["products"]), fmt, chunk_size, specs
+                ),
+                "categories": _write_categories(
+                    os.path.join(staging, files["categories"]), fmt, chunk_size
+                ),
+            }
+
+        manifest = {
+            "version": version,
+            "created_at": created_at.isoformat(),
+            "format": fmt,
+            "data_version": data_version,
+            "tables": {
+                name: {
+                    "file": filename,
+                    "rows": rows[name],
+                    "bytes": os.path.getsize(os.path.join(staging, filename)),
+                }
+                for name, filename in files.items()
+            },
+            "spec_columns": [f"spec.{group}.{key}" for group, key, _ in specs],
+        }
+        with open(os.path.join(staging, MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        if os.path.exists(target):
+            raise FileExistsError(f"Catalog snapshot {version} already exists")
+        os.rename(staging, target)
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+    logger.info(
+        f"📦 Catalog snapshot {version} written: "
+        f"{rows['products']} products, {rows['categories']} categories ({fmt})"
+    )
+    return manifest
+
+
+def list_snapshots(directory: str = None) -> list[dict]:
+    """Returns the manifests of all published snapshots, newest first."""
+    directory = directory or settings.SNAPSHOT_DIR
+    if not os.path.isdir(directory):
+        return []
+    manifests = []
+    for version in sorted(os.listdir(directory), reverse=True):
+        path = os.path.join(directory, version, MANIFEST)
+        if VERSION_RE.match(version) and os.path.exists(path):
+            with open(path) as f:
+                manifests.append(json.load(f))
+    return manifests
+
+
+def get_snapshot(version: str, directory: str = None) -> dict | None:
+    """Returns the manifest of `version` (or of the newest one for `latest`)."""
+    for manifest in list_snapshots(directory):
+        if version in ("latest", manifest["version"]):
+            return manifest
+    return None
+
+
+def snapshot_path(manifest: dict, filename: str, directory: str = None) -> str:
+    directory = directory or settings.SNAPSHOT_DIR
+    return os.path.join(directory, manifest["version"], filename)
+
+
+def prune_snapshots(keep: int = None, directory: str = None) -> list[str]:
+    """Deletes all but the newest `keep` snapshots and returns their versions."""
+    keep = settings.SNAPSHOT_KEEP if keep is None else keep
+    removed = [manifest["version"] for manifest in list_snapshots(directory)[keep:]]
+    for version in removed:
+        shutil.rmtree(snapshot_path({"version": version}, "", directory))
+    if removed:
+        logger.info(f"🧹 Removed old catalog snapshots: {', '.join(removed)}")
+    return removed
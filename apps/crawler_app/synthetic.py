@@ -0,0 +1,198 @@
+"""
+Synthetic catalogs for load tests and benchmarks.
+
+Builds a category tree of `depth` levels with `fanout` children per node and
+spreads products over its leaves, with crawler-like titles, prices,
+discounts, images and a limited set of distinct descriptions and
+specifications (so blobs are shared like real data). Everything is written
+with `bulk_create` in chunks; generated rows are marked by a `site_id`/slug
+prefix and can be removed again with `clear_catalog`.
+"""
+
+import random
+from django.conf import settings
+from django.db import connection, transaction
+from apps.crawler_app.blobs import content_digest
+from apps.crawler_app.cache import bump_data_version
+from apps.crawler_app.models import (
+    Category,
+    DescriptionBlob,
+    Product,
+    SpecificationBlob,
+    delete_orphan_blobs,
+)
+
+PREFIX = "gen-"
+
+ROOMS = ["bedroom", "kitchen", "office", "garden", "living", "kids", "bath", "hall"]
+KINDS = ["bed", "sofa", "table", "chair", "lamp", "shelf", "rug", "desk", "mirror"]
+STYLES = ["modern", "classic", "rustic", "nordic", "royal", "compact", "oak", "velvet"]
+MATERIALS = ["Wood", "Metal", "Fabric", "Leather", "Glass", "Marble"]
+COLORS = ["White", "Black", "Gray", "Walnut", "Cream", "Blue", "Green"]
+WIDTHS = ["60", "90", "120", "140", "160", "180", "200"]
+
+
+def _category_name(level: int, index: int) -> str:
+    words = ROOMS if level == 0 else KINDS if level == 1 else STYLES
+    return f"{words[index % len(words)]}{index // len(words) or ''}"
+
+
+def create_categories(depth: int, fanout: int, prefix: str = PREFIX) -> list:
+    """Creates the tree level by level and returns its leaf categories."""
+    level_nodes = [(None, [])]
+    for level in range(depth):
+        categories = [
+            Category(
+                name=">".join(path + [_category_name(level, index)]),
+                slug="-".join(
+                    [prefix.rstrip("-")] + path + [_category_name(level, index)]
+                ),
+                parent=parent,
+            )
+            for parent, path in level_nodes
+            for index in range(fanout)
+        ]
+        Category.objects.bulk_create(categories)
+        level_nodes = [(category, category.name.split(">")) for category in categories]
+    return [category for category, _ in level_nodes]
+
+
+def _variants(rng: random.Random, count: int) -> tuple[list, list]:
+    """Distinct descriptions and specifications, stored once as blobs."""
+    descriptions = [
+        f"{rng.choice(STYLES).title()} {rng.choice(KINDS)} made of "
+        f"{rng.choice(MATERIALS).lower()}, variant {index}.\n"
+        + " ".join(rng.choices(STYLES + KINDS + ROOMS, k=40))
+        for index in range(count)
+    ]
+    specifications = [
+        {
+            "Size": {
+                "Width": rng.choice(WIDTHS),
+                "Height": str(rng.randint(40, 220)),
+            },
+            "Material": {"Main": rng.choice(MATERIALS)},
+            "Color": {"Main": rng.choice(COLORS)},
+            **(
+                {"Warranty": {"Months": str(rng.choice([6, 12, 24]))}}
+                if index % 3
+                else {}
+            ),
+        }
+        for index in range(count)
+    ]
+    # Keyed by digest: one upsert can't touch the same row twice
+    DescriptionBlob.objects.bulk_create(
+        [
+            DescriptionBlob(digest=digest, text=text)
+            for digest, text in {content_digest(t): t for t in descriptions}.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["digest"],
+        update_fields=["touched_at"],
+    )
+    SpecificationBlob.objects.bulk_create(
+        [
+            SpecificationBlob(digest=digest, data=data)
+            for digest, data in {content_digest(d): d for d in specifications}.items()
+        ],
+        update_conflicts=True,
+        unique_fields=["digest"],
+        update_fields=["touched_at"],
+    )
+    return (
+        [content_digest(text) for text in descriptions],
+        [content_digest(data) for data in specifications],
+    )
+
+
+def _product(rng, index, prefix, leaves, descriptions, specifications) -> Product:
+    category = rng.choice(leaves)
+    kind = rng.choice(KINDS)
+    original_price = float(rng.randrange(1_000_000, 100_000_000, 50_000))
+    discount_price = original_price
+    if rng.random() < 0.35:
+        discount_price = float(round(original_price * rng.uniform(0.5, 0.95), -4))
+    slug = f"{kind}-{index}"
+    return Product(
+        site_id=f"{prefix}{index}",
+        title=f"{rng.choice(STYLES).title()} {kind} {rng.choice(COLORS).lower()} {index}",
+        original_price=original_price,
+        discount_price=discount_price,
+        description_blob_id=rng.choice(descriptions),
+        specifications_blob_id=rng.choice(specifications),
+        category=category,
+        url=f"https://www.esmerdis.com/product/{slug}/",
+        images=[
+            f"https://www.esmerdis.com/wp-content/uploads/{slug}-{image}.jpg"
+            for image in range(rng.randint(1, 4))
+        ],
+        availability=rng.random() < 0.9,
+    )
+
+
+def generate_catalog(
+    products: int,
+    depth: int = 3,
+    fanout: int = 6,
+    variants: int = 500,
+    seed: int = 0,
+    chunk_size: int = None,
+    prefix: str = PREFIX,
+    progress=None,
+) -> dict:
+    """
+    Writes a synthetic catalog and returns what was created.
+
+    Each chunk of products is committed on its own; `progress(done, total)` is
+    called after each one.
+    """
+    rng = random.Random(seed)
+    chunk_size = chunk_size or settings.BULK_WRITE_CHUNK_SIZE
+    with transaction.atomic():
+        leaves = create_categories(depth, fanout, prefix)
+        descriptions, specifications = _variants(rng, variants)
+
+    for start in range(0, products, chunk_size):
+        batch = [
+            _product(rng, index, prefix, leaves, descriptions, specifications)
+            for index in range(start, min(start + chunk_size, products))
+        ]
+        with transaction.atomic():
+            Product.objects.bulk_create(batch)
+        if progress:
+            progress(start + len(batch), products)
+
+    # Fresh statistics, so the planner sees the new table sizes
+    with connection.cursor() as cursor:
+        for model in (Category, Product, DescriptionBlob, SpecificationBlob):
+            cursor.execute(f'ANALYZE "{model._meta.db_table}"')
+    # Bulk writes skip model signals, so invalidate API caches here
+    bump_data_version()
+    return {
+        "categories": sum(fanout**level for level in range(1, depth + 1)),
+        "leaves": len(leaves),
+        "products": products,
+    }
+
+
+def clear_catalog(prefix: str = PREFIX) -> tuple[int, int]:
+    """
+    Deletes generated products and categories, returns `(products, categories)`.
+
+    Plain `DELETE`s: the ORM would load every row to send delete signals.
+    """
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM "{Product._meta.db_table}" WHERE site_id LIKE %s',
+            [prefix + "%"],
+        )
+        products = cursor.rowcount
+        cursor.execute(
+            f'DELETE FROM "{Category._meta.db_table}" WHERE slug LIKE %s',
+            [prefix + "%"],
+        )
+        categories = cursor.rowcount
+    delete_orphan_blobs(grace=0)
+    bump_data_version()
+    return products, categories
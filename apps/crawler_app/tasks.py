@@ -1,23 +1,184 @@
-from celery import shared_task
+from celery import chord, shared_task
 from utils.logging import logger
 
 
-@shared_task(name="scrape_products")
-def scrape_products():
+@shared_task(name="scrape_products", bind=True)
+def scrape_products(self):
+    """
+    Celery task refreshing the catalog, one `crawl_shard` per top-level category.
+
+    The run holds the crawl lease (`CRAWL_LEASE`) from here until
+    `finish_crawl`, which runs once all shards are done. While another run is
+    active, the task is skipped or, with `CRAWL_OVERLAP = "queue"`, retried.
+    """
+    from django.conf import settings
+    from .leases import acquire_lease, release_lease
+    from .shards import discover_shards
+
+    lease, acquired = acquire_lease(settings.CRAWL_LEASE)
+    if not acquired:
+        if settings.CRAWL_OVERLAP == "queue" and self.request.retries < (
+            settings.CRAWL_QUEUE_RETRIES
+        ):
+            logger.info(
+                f"⏳ Crawl run {lease.run_id} is still active,"
+                f" retrying in {settings.CRAWL_QUEUE_DELAY}s"
+            )
+            raise self.retry(
+                countdown=settings.CRAWL_QUEUE_DELAY,
+                max_retries=settings.CRAWL_QUEUE_RETRIES,
+            )
+        logger.info(f"⏭️ Crawl run {lease.run_id} is still active, skipping")
+        return f"Skipped: crawl run {lease.run_id} is still active"
+
+    run_id = str(lease.run_id)
+    logger.info(f"🚀 Starting product scraping run {run_id}...")
+
+    try:
+        shards = discover_shards()
+        chord(crawl_shard.s(url, run_id) for url in shards)(finish_crawl.s(run_id))
+    except Exception as e:
+        logger.error(f"❌ Error in scraping task: {e}", exc_info=True)
+        release_lease(settings.CRAWL_LEASE, run_id)
+        return f"Scraping failed: {e}"
+
+    logger.info(f"📦 Dispatched {len(shards)} crawl shards")
+    return f"Dispatched {len(shards)} crawl shards!"
+
+
+@shared_task(name="crawl_shard")
+def crawl_shard(start_url, run_id=None):
+    """
+    Celery task crawling one category subtree, returns its stats.
+
+    Twisted's reactor can't be restarted, so shards are routed to the
+    `crawl_shards` queue, whose workers run one task per child process. Errors are returned rather
+    than raised so the chord callback still runs for the other shards. A
+    shard whose run lost the crawl lease does not crawl.
+    """
     from .esmerdis_scraper.spiders.products import ProductSpider
+    from django.conf import settings
     from scrapy.crawler import CrawlerProcess
     from scrapy.utils.project import get_project_settings
+    from .leases import heartbeat
+    from .shards import shard_stats
+
+    if run_id and not heartbeat(
+        settings.CRAWL_LEASE, run_id, key=start_url, progress={"state": "started"}
+    ):
+        logger.warning(f"⏭️ Run {run_id} lost its crawl lease, skipping {start_url}")
+        return {"shard": start_url, "finish_reason": "lease_lost"}
 
-    """Celery task to run the product scraper."""
-    logger.info("🚀 Starting product scraping task...")
+    logger.info(f"🕷️ Crawling shard {start_url}...")
 
     try:
         process = CrawlerProcess(get_project_settings())
-        process.crawl(ProductSpider)
+        crawler = process.create_crawler(ProductSpider)
+        process.crawl(crawler, start_url=start_url, run_id=run_id)
         process.start()
-        logger.info("✅ Scraping completed successfully!")
     except Exception as e:
-        logger.error(f"❌ Error in scraping task: {e}", exc_info=True)
-        return f"Scraping failed: {e}"
+        logger.error(f"❌ Error in crawl shard {start_url}: {e}", exc_info=True)
+        return {"shard": start_url, "finish_reason": f"error: {e}"}
+
+    stats = shard_stats(start_url, crawler.stats.get_stats())
+    if run_id:
+        heartbeat(
+            settings.CRAWL_LEASE,
+            run_id,
+            key=start_url,
+            progress={"state": "done", **stats},
+        )
+    return stats
+
+
+@shared_task(name="finish_crawl")
+def finish_crawl(results, run_id=None):
+    """
+    Chord callback: reports the shard stats, cleans up and ends the run.
+
+    Products the run did not see are marked unavailable when every shard
+    finished. The cleanup is skipped when another run has taken the lease
+    over, as it would race with that run's writes.
+    """
+    from django.conf import settings
+    from .cache import bump_data_version
+    from .leases import heartbeat, release_lease
+    from .models import delete_orphan_blobs, mark_unseen_products
+    from .shards import merge_stats, shard_empty
+
+    for result in results:
+        logger.info(f"📊 Shard {result['shard']}: {result}")
+        if shard_empty(result):
+            logger.warning(f"⚠️ Shard {result['shard']} found no products")
+    totals = merge_stats(results)
+    logger.info(
+        f"✅ Scraping completed: {totals['products']} products from"
+        f" {totals['shards']} shards ({totals['failed']} failed) |"
+        f" Inserted: {totals['inserted']} | Updated: {totals['updated']}",
+        extra={"crawl": totals},
+    )
+
+    if run_id and not heartbeat(settings.CRAWL_LEASE, run_id):
+        logger.warning(f"⏭️ Run {run_id} lost its crawl lease, skipping cleanup")
+        return totals
+
+    try:
+        if run_id and not totals["failed"]:
+            marked = mark_unseen_products(run_id, settings.CRAWL_RECONCILE_MIN_SEEN)
+            if marked is None:
+                logger.warning(
+                    "⚠️ Run saw too few products, not marking unseen ones unavailable"
+                )
+            else:
+                logger.info(f"👻 Marked {marked} products not seen unavailable")
+                if marked:
+                    bump_data_version()
+        descriptions, specifications = delete_orphan_blobs()
+        logger.info(
+            f"🧹 Removed {descriptions} unused descriptions"
+            f" and {specifications} unused specifications"
+        )
+        snapshot_catalog.delay()
+        drain_product_changes.delay()
+    except Exception as e:
+        logger.error(f"❌ Error finishing crawl: {e}", exc_info=True)
+    finally:
+        if run_id:
+            release_lease(settings.CRAWL_LEASE, run_id)
+
+    return totals
+
+
+@shared_task(name="snapshot_catalog")
+def snapshot_catalog():
+    """Celery task writing a columnar catalog snapshot, queued after each crawl."""
+    from .snapshots import prune_snapshots, write_snapshot
+
+    try:
+        manifest = write_snapshot()
+        prune_snapshots()
+    except Exception as e:
+        logger.error(f"❌ Error writing catalog snapshot: {e}", exc_info=True)
+        return f"Snapshot failed: {e}"
+
+    return f"Snapshot {manifest['version']} written!"
+
+
+@shared_task(name="drain_product_changes")
+def drain_product_changes():
+    """
+    Celery task delivering the product change outbox, queued after each crawl.
+
+    Changes past `PRODUCT_CHANGE_RETENTION` are pruned afterwards.
+    """
+    from .outbox import drain_changes, prune_changes
+
+    try:
+        delivered = drain_changes()
+        pruned = prune_changes()
+    except Exception as e:
+        logger.error(f"❌ Error delivering product changes: {e}", exc_info=True)
+        return f"Delivering changes failed: {e}"
 
-    return "Scraping completed!"
+    logger.info(f"📬 Delivered {delivered} product changes, pruned {pruned} old ones")
+    return f"Delivered {delivered} product changes!"
@@ -0,0 +1,141 @@
+"""
+Load benchmark replaying a mix of product filter queries against the API.
+
+Reads the category tree (`/api/categories/tree/`) and the catalog size, builds
+a set of URLs per scenario and loads each scenario with `run_load` from
+`bench_async.py`, reporting requests/sec and latency percentiles per scenario:
+
+- `list`: the first page, no filters
+- `category`: category subtrees (`?category=<slug>`) from every tree level
+- `price`: price ranges (`min_price`/`max_price`)
+- `discount`: `has_discount=true`, deepest discounts first
+- `search`: `name` substring search
+- `deep_page`: pages in the last tenth of the unfiltered list
+- `combined`: category subtree, price range and `has_discount` together
+- `facets`: `/api/products/facets/` per category (cached per data version)
+
+Generate a catalog first, e.g. `python manage.py generate_catalog --products 100000`.
+
+Usage:
+    python benchmarks/bench_api.py --base-url http://localhost:8000 \\
+        --concurrency 20 --requests 500 --scenario category --scenario search
+"""
+
+import argparse
+import asyncio
+import json
+import random
+from urllib.parse import urlencode
+import httpx
+from bench_async import print_report, run_load
+
+PRICE_RANGES = [
+    (None, 5_000_000),
+    (5_000_000, 20_000_000),
+    (20_000_000, 50_000_000),
+    (50_000_000, None),
+]
+SEARCH_TERMS = ["bed", "sofa", "lamp", "modern", "oak", "walnut", "velvet", "desk"]
+PAGE_SIZE = 20
+
+
+def category_slugs(tree: list[dict]) -> list[str]:
+    """Slugs of every category with products in its subtree."""
+    slugs, stack = [], list(tree)
+    while stack:
+        node = stack.pop()
+        if node["total_count"]:
+            slugs.append(node["slug"])
+        stack.extend(node["children"])
+    return slugs
+
+
+def price_params(low, high) -> dict:
+    params = {}
+    if low is not None:
+        params["min_price"] = low
+    if high is not None:
+        params["max_price"] = high
+    return params
+
+
+def build_scenarios(base_url: str, rng: random.Random, variants: int) -> dict:
+    """Returns `{scenario: [url, ...]}` for the catalog behind `base_url`."""
+    with httpx.Client(base_url=base_url, timeout=60) as client:
+        tree = client.get("/api/categories/tree/").raise_for_status().json()
+        count = client.get("/api/products/").raise_for_status().json()["count"]
+    slugs = category_slugs(tree) or [""]
+    last_page = max(1, -(-count // PAGE_SIZE))
+
+    def pick(make):
+        return [make() for _ in range(variants)]
+
+    products = f"{base_url}/api/products/"
+    return {
+        "list": [products],
+        "category": pick(lambda: f"{products}?category={rng.choice(slugs)}"),
+        "price": pick(
+            lambda: f"{products}?{urlencode(price_params(*rng.choice(PRICE_RANGES)))}"
+        ),
+        "discount": [f"{products}?has_discount=true&ordering=-discount"],
+        "search": [f"{products}?name={term}" for term in SEARCH_TERMS],
+        "deep_page": pick(
+            lambda: f"{products}?page={rng.randint(max(1, last_page * 9 // 10), last_page)}"
+        ),
+        "combined": pick(
+            lambda: f"{products}?"
+            + urlencode(
+                {
+                    "category": rng.choice(slugs),
+                    "has_discount": "true",
+                    **price_params(*rng.choice(PRICE_RANGES)),
+                }
+            )
+        ),
+        "facets": pick(
+            lambda: f"{base_url}/api/products/facets/?category={rng.choice(slugs)}"
+        ),
+    }
+
+
+def with_format(urls: list[str], fmt: str) -> list[str]:
+    return [f"{url}{'&' if '?' in url else '?'}format={fmt}" for url in urls]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument(
+        "--scenario",
+        action="append",
+        help="Scenario to run, may be given several times (default: all)",
+    )
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--requests", type=int, default=500, help="Requests per scenario"
+    )
+    parser.add_argument(
+        "--variants", type=int, default=50, help="Distinct URLs per scenario"
+    )
+    parser.add_argument("--format", help="e.g. fastjson, added to every URL")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    base_url = args.base_url.rstrip("/")
+    scenarios = build_scenarios(base_url, random.Random(args.seed), args.variants)
+    results = {}
+    for name in args.scenario or scenarios:
+        urls = scenarios[name]
+        if args.format:
+            urls = with_format(urls, args.format)
+        results[name] = asyncio.run(run_load(urls, args.concurrency, args.requests))
+    print_report(results)
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Load benchmark for the sync (WSGI) and async (ASGI) product API.
+
+Fires the same number of GET requests at each URL from a fixed number of
+concurrent clients and reports requests/sec and latency percentiles, so the
+gunicorn sync stack can be compared with the ASGI profile serving
+`/api/async/`.
+
+Usage:
+    python benchmarks/bench_async.py \\
+        --url sync=http://localhost:8000/api/products/ \\
+        --url async=http://localhost:8001/api/async/products/ \\
+        --concurrency 50 --requests 2000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an unsorted list."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def run_load(url: str | list[str], concurrency: int, total: int) -> dict:
+    """
+    Sends `total` GET requests to `url` from `concurrency` clients.
+
+    A list of URLs is requested round-robin.
+    """
+    urls = [url] if isinstance(url, str) else url
+    latencies = []
+    errors = 0
+    remaining = total
+
+    async def client_loop(client):
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await client.get(urls[remaining % len(urls)])
+                if response.status_code != 200:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50": statistics.median(latencies),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+    }
+
+
+def print_report(results: dict[str, dict]) -> None:
+    print(
+        f"{'target':>12} {'requests':>9} {'errors':>7} {'req/s':>9}"
+        f" {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    )
+    for name, stats in results.items():
+        print(
+            f"{name:>12} {stats['requests']:>9} {stats['errors']:>7}"
+            f" {stats['rps']:>9.1f} {stats['p50']:>9.1f} {stats['p95']:>9.1f}"
+            f" {stats['p99']:>9.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--url",
+        action="append",
+        required=True,
+        help="Target as name=url, may be given several times",
+    )
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    results = {}
+    for target in args.url:
+        name, _, url = target.partition("=")
+        results[name] = asyncio.run(run_load(url, args.concurrency, args.requests))
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Benchmark of the spider's per-item logging cost under each logging setup.
+
+Replays the log calls the spider makes per product (a page INFO line and the
+missing-price WARNINGs) through the JSON file, warning file and console
+handlers from `utils.logging.build_handlers`, and reports the time the calling
+thread spends per item:
+
+- `legacy`: handlers attached directly, the previous JSON formatter
+- `sync`: handlers attached directly, the current JSON formatter
+- `queue`: the current `LOG_QUEUE` setup, records handed to a listener thread
+  (`drain` is the extra time the listener needed to finish writing)
+- `limited`: `queue` plus the `LOG_RATE_LIMIT` filter with its defaults
+
+Usage:
+    python benchmarks/bench_logging.py --items 20000
+"""
+
+import argparse
+import datetime as dt
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django
+
+django.setup()
+
+from django.conf import settings
+from utils.logging import (
+    MyJsonFormatter,
+    RateLimitFilter,
+    StructuredQueueHandler,
+    build_handlers,
+    start_queue_listener,
+    stop_queue_listener,
+)
+
+
+class LegacyJsonFormatter(MyJsonFormatter):
+    """The JSON formatter before key mappings were precomputed (for reference)."""
+
+    def format(self, record):
+        return json.dumps(self._prepare_log_dict(record), default=str)
+
+    def _prepare_log_dict(self, record):
+        always_keys = {
+            "msg": record.getMessage(),
+            "timestamp": dt.datetime.fromtimestamp(
+                record.created, settings.LOCAL_TZ
+            ).strftime("%Y-%m-%dT%H:%M:%S"),
+            "levelname": record.levelname,
+            "filename": record.filename,
+            "funcName": record.funcName,
+            "lineno": record.lineno,
+        }
+        if record.exc_info:
+            always_keys["exception"] = self.formatException(record.exc_info)
+        message = {
+            val: always_keys.pop(key, getattr(record, key, None))
+            for key, val in self.fmt_keys.items()
+        }
+        message.update(always_keys)
+        for key, val in record.__dict__.items():
+            if key not in message and key not in self.fmt_keys:
+                message[key] = val
+        return message
+
+
+def spider_item(logger, index):
+    """The log calls of one crawled product."""
+    logger.info(f"🔍 Parsing page: https://www.esmerdis.com/shop/page/{index}")
+    logger.warning("No original price found")
+    logger.warning("No discount price found")
+
+
+def make_logger(name, log_dir, setup):
+    handlers = build_handlers(log_dir)
+    # Keep the console handler's formatting cost without flooding the terminal
+    handlers[-1].setStream(open(os.devnull, "w"))
+    if setup == "legacy":
+        for handler in handlers[:2]:
+            handler.setFormatter(
+                LegacyJsonFormatter(fmt_keys=handler.formatter.fmt_keys)
+            )
+
+    logger = logging.getLogger(name)
+    logger.handlers.clear()
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+
+    logger.filters.clear()
+    if setup == "limited":
+        logger.addFilter(RateLimitFilter())
+
+    listener = None
+    if setup in ("queue", "limited"):
+        queue_handler = StructuredQueueHandler(None)
+        listener = start_queue_listener(queue_handler, handlers)
+        logger.addHandler(queue_handler)
+    else:
+        for handler in handlers:
+            logger.addHandler(handler)
+    return logger, listener, handlers
+
+
+def run(setup, items):
+    with tempfile.TemporaryDirectory() as log_dir:
+        logger, listener, handlers = make_logger(f"bench.{setup}", log_dir, setup)
+        start = time.perf_counter()
+        for index in range(items):
+            spider_item(logger, index)
+        caller = time.perf_counter() - start
+        if listener is not None:
+            stop_queue_listener(listener)
+        total = time.perf_counter() - start
+        for handler in handlers:
+            handler.close()
+    return {"caller": caller, "drain": total - caller}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--items", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'setup':>8} {'us/item':>9} {'drain ms':>9} {'items/s':>10}")
+    for setup in ("legacy", "sync", "queue", "limited"):
+        stats = run(setup, args.items)
+        print(
+            f"{setup:>8} {stats['caller'] / args.items * 1e6:>9.1f}"
+            f" {stats['drain'] * 1000:>9.1f} {args.items / stats['caller']:>10.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
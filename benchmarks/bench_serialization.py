@@ -0,0 +1,102 @@
+"""
+Serialization benchmark for the product list endpoint.
+
+Compares `ProductSerializer` + `JSONRenderer` (the default path) with
+`ProductRowSerializer` + `FastJSONRenderer` (the `?format=fastjson` path) for
+page sizes of 20, 200 and 2000 products.
+
+Synthetic products are inserted inside a transaction that is rolled back at
+the end, so the benchmark can run against any development database.
+
+Usage:
+    python benchmarks/bench_serialization.py [--repeat 20]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+
+import django
+
+django.setup()
+
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from apps.api_app.renderers import FastJSONRenderer
+from apps.api_app.serializers import ProductRowSerializer, ProductSerializer
+from apps.crawler_app.models import Category, Product, store_blobs
+
+PAGE_SIZES = (20, 200, 2000)
+
+
+def create_products(count: int) -> None:
+    """Bulk inserts `count` synthetic products into a single category."""
+    category = Category.objects.create(name="bench", slug="bench-serialization")
+    products = [
+        Product(
+            site_id=f"bench-{i}",
+            title=f"Product {i}",
+            original_price=1000.0 + i,
+            discount_price=900.0 + i,
+            description="No description available",
+            specifications={"ابعاد": {"طول": "200", "عرض": "90"}},
+            category=category,
+            url=f"https://www.esmerdis.com/product/{i}/",
+            images=[f"https://www.esmerdis.com/{i}-{j}.jpg" for j in range(3)],
+        )
+        for i in range(count)
+    ]
+    store_blobs(products)
+    Product.objects.bulk_create(products)
+
+
+def measure(func, repeat: int) -> float:
+    """Returns the median wall time of `func` in milliseconds."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    queryset = Product.objects.select_related(
+        "category", "description_blob", "specifications_blob"
+    ).order_by("id")
+    row_serializer = ProductRowSerializer()
+
+    def default_path(size):
+        data = ProductSerializer(queryset[:size], many=True).data
+        return JSONRenderer().render(data)
+
+    def fast_path(size):
+        rows = row_serializer.get_queryset(queryset)[:size]
+        return FastJSONRenderer().render(row_serializer.many(rows))
+
+    with transaction.atomic():
+        create_products(max(PAGE_SIZES))
+
+        print(f"{'page size':>10} {'default ms':>12} {'fast ms':>10} {'speedup':>8}")
+        for size in PAGE_SIZES:
+            default_ms = measure(lambda: default_path(size), args.repeat)
+            fast_ms = measure(lambda: fast_path(size), args.repeat)
+            print(
+                f"{size:>10} {default_ms:>12.2f} {fast_ms:>10.2f}"
+                f" {default_ms / fast_ms:>7.1f}x"
+            )
+
+        transaction.set_rollback(True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Start-up benchmark of the Django, Celery and Scrapy entry points.
+
+Runs each entry point in a fresh interpreter under `python -X importtime` and
+reports the wall time of the process and the total import time (sum of the
+top-level imports), best of `--repeat` runs, plus the slowest imports:
+
+- `settings`: importing `config.settings`
+- `django`: `django.setup()`, what `manage.py` commands and workers start with
+- `wsgi`: the gunicorn application, with the URLconf (views) loaded
+- `celery`: the Celery app with its task modules, as a worker imports them
+- `scrapy`: the Scrapy project settings and the product spider
+
+Import times are also reported relative to `reference`, a bare
+`import django.db.models` measured in the same run, so they can be compared
+across machines. With `--check` these ratios are compared to
+`startup_baseline.json` and the script exits non-zero when one grew by more
+than `--tolerance`; `tests/config/test_startup.py` runs the same check.
+
+Usage:
+    python benchmarks/bench_startup.py --repeat 5
+    python benchmarks/bench_startup.py --check
+    python benchmarks/bench_startup.py --update  # rewrite the baseline
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE = os.path.join(ROOT, "benchmarks", "startup_baseline.json")
+
+# Same-run yardstick for the machine's speed, without any project code
+REFERENCE = "import django.db.models"
+
+ENTRY_POINTS = {
+    "settings": "import config.settings",
+    "django": "import django; django.setup()",
+    "wsgi": (
+        "from config.wsgi import application;"
+        "from django.urls import get_resolver; get_resolver().url_patterns"
+    ),
+    "celery": "from config import celery_app; celery_app.loader.import_default_modules()",
+    "scrapy": (
+        "from scrapy.utils.project import get_project_settings;"
+        "get_project_settings();"
+        "import apps.crawler_app.esmerdis_scraper.spiders.products"
+    ),
+}
+
+
+def parse_importtime(stderr: str) -> tuple[float, list[tuple[float, str]]]:
+    """Returns the total import time (ms) and the top-level imports."""
+    top_level = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        # Nested imports are indented below the module importing them
+        if not name[1:].startswith(" "):
+            top_level.append((int(cumulative) / 1000, name.strip()))
+    return sum(ms for ms, _ in top_level), top_level
+
+
+def measure(code: str, env: dict) -> dict:
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    wall = (time.perf_counter() - start) * 1000
+    if result.returncode:
+        raise RuntimeError(f"{code!r} failed:\n{result.stderr[-2000:]}")
+    imports, top_level = parse_importtime(result.stderr)
+    return {"wall_ms": wall, "import_ms": imports, "top_level": top_level}
+
+
+def run(code: str, repeat: int, env: dict) -> dict:
+    runs = [measure(code, env) for _ in range(repeat)]
+    best = min(runs, key=lambda stats: stats["import_ms"])
+    best["wall_ms"] = min(stats["wall_ms"] for stats in runs)
+    return best
+
+
+def measure_entries(entries: list[str], repeat: int) -> dict:
+    """Best-of-`repeat` stats per entry point, with `ratio` to the reference."""
+    with tempfile.TemporaryDirectory() as log_dir:
+        env = {
+            **os.environ,
+            "DJANGO_SETTINGS_MODULE": "config.settings",
+            "LOG_DIR": log_dir,
+        }
+        results = {}
+        for entry in entries:
+            # Measured next to each entry, so load changes affect both alike
+            reference = run(REFERENCE, repeat, env)["import_ms"]
+            results[entry] = run(ENTRY_POINTS[entry], repeat, env)
+            results[entry]["ratio"] = results[entry]["import_ms"] / reference
+    return results
+
+
+def find_regressions(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Entry points whose ratio to the reference grew by more than `tolerance`."""
+    return [
+        f"{entry}: {stats['ratio']:.2f}x > {baseline[entry]}x the reference"
+        for entry, stats in results.items()
+        if entry in baseline and stats["ratio"] > baseline[entry] * (1 + tolerance)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("entries", nargs="*", default=list(ENTRY_POINTS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=5)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--update", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args()
+
+    results = measure_entries(args.entries, args.repeat)
+
+    print(
+        f"{'entry':>10} {'wall ms':>9} {'import ms':>10} {'ratio':>6}  slowest imports"
+    )
+    for entry, stats in results.items():
+        slowest = sorted(stats["top_level"], reverse=True)[: args.top]
+        print(
+            f"{entry:>10} {stats['wall_ms']:>9.0f} {stats['import_ms']:>10.0f}"
+            f" {stats['ratio']:>6.2f}  "
+            + ", ".join(f"{name} {ms:.0f}" for ms, name in slowest)
+        )
+
+    if args.update:
+        with open(BASELINE, "w") as file:
+            json.dump(
+                {entry: round(stats["ratio"], 2) for entry, stats in results.items()},
+                file,
+                indent=2,
+            )
+            file.write("\n")
+        print(f"Baseline written to {BASELINE}")
+
+    if args.check:
+        with open(BASELINE) as file:
+            baseline = json.load(file)
+        regressions = find_regressions(results, baseline, args.tolerance)
+        if regressions:
+            print("Start-up regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("No start-up regressions")
+
+
+if __name__ == "__main__":
+    main()
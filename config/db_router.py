@@ -0,0 +1,42 @@
+"""
+Database router sending web reads to replicas and everything else to the primary.
+
+Reads only go to a replica while `use_replicas()` is active, which
+`ReplicaRoutingMiddleware` does for safe API/HTML requests. Celery tasks, the
+crawler and any request that writes (or recently wrote) stay on the primary,
+so they always read their own writes.
+"""
+
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from django.conf import settings
+
+_replicas_enabled = ContextVar("replicas_enabled", default=False)
+
+
+@contextmanager
+def use_replicas(enabled: bool = True):
+    """Routes reads made inside the block to a replica (when one is configured)."""
+    token = _replicas_enabled.set(enabled)
+    try:
+        yield
+    finally:
+        _replicas_enabled.reset(token)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if settings.REPLICA_DATABASES and _replicas_enabled.get():
+            return random.choice(settings.REPLICA_DATABASES)
+        return "default"
+
+    def db_for_write(self, model, **hints):
+        return "default"
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == "default"
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import importlib.util
 import os
 import sys
 from dotenv import load_dotenv
@@ -22,17 +23,23 @@ LOGGING = {
     "version": 1,
     "disable_existing_loggers": False,
 }
+# Attaches the handlers of utils/logging.py during django.setup()
+LOGGING_CONFIG = "utils.logging.configure_logging"
 
 LOG_DIR = os.getenv("LOG_DIR", os.path.join(BASE_DIR, "logs"))
 LOG_LEVEL = os.getenv("LOG_LEVEL", "DEBUG")
+# Run log handlers on a background thread (see utils/logging.py)
+LOG_QUEUE = os.getenv("LOG_QUEUE", "true").lower() != "false"
+# Records per call site and window before the rest are summarized (0 disables)
+LOG_RATE_LIMIT = int(os.getenv("LOG_RATE_LIMIT", 10))
+LOG_RATE_LIMIT_WINDOW = float(os.getenv("LOG_RATE_LIMIT_WINDOW", 60))
+# Share of DEBUG/INFO records kept per call site, e.g. 0.1 keeps every 10th
+LOG_SAMPLE_DEBUG = float(os.getenv("LOG_SAMPLE_DEBUG", 1.0))
+LOG_SAMPLE_INFO = float(os.getenv("LOG_SAMPLE_INFO", 1.0))
 DEFAULT_TIMEZONE = os.getenv("DEFAULT_TIMEZONE", "Asia/Tehran")
 TIME_FORMAT = os.getenv("TIME_FORMAT", "%Y-%m-%d_%H-%M-%S")
 LOCAL_TZ = tz(os.getenv("DEFAULT_TIMEZONE", "Asia/Tehran"))
 
-# Ensure logs directory exists
-if not os.path.exists(LOG_DIR):
-    os.makedirs(LOG_DIR)
-
 from utils.logging import logger
 
 
@@ -89,12 +96,18 @@ try:
 
     MIDDLEWARE = [
         "django.middleware.security.SecurityMiddleware",
+        # Logs slow API/HTML requests with their queries (PROFILE_* below)
+        "apps.api_app.middleware.QueryProfilingMiddleware",
+        # Response compression: Brotli when accepted, gzip otherwise
+        "django.middleware.gzip.GZipMiddleware",
+        "apps.api_app.middleware.BrotliMiddleware",
         "django.contrib.sessions.middleware.SessionMiddleware",
         "django.middleware.common.CommonMiddleware",
         "django.middleware.csrf.CsrfViewMiddleware",
         "django.contrib.auth.middleware.AuthenticationMiddleware",
         "django.contrib.messages.middleware.MessageMiddleware",
         "django.middleware.clickjacking.XFrameOptionsMiddleware",
+        "apps.api_app.middleware.ReplicaRoutingMiddleware",
     ]
 
     ROOT_URLCONF = "config.urls"
@@ -135,6 +148,61 @@ try:
         }
     }
 
+    # Connection reuse. With psycopg 3 + psycopg_pool installed every process
+    # gets a bounded pool (sized per service through the environment), otherwise
+    # each worker thread keeps a persistent connection (except under ASGI, see
+    # config/asgi.py). Either way connections are health-checked before use, so
+    # ones dropped by a Postgres restart or failover are replaced.
+    DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+    DATABASE_POOL_ENABLED = (
+        os.getenv("DATABASE_POOL", "True").lower() == "true"
+        and importlib.util.find_spec("psycopg") is not None
+        and importlib.util.find_spec("psycopg_pool") is not None
+    )
+    if DATABASE_POOL_ENABLED:
+        DATABASES["default"]["OPTIONS"] = {
+            "pool": {
+                "min_size": int(os.getenv("DATABASE_POOL_MIN_SIZE", 1)),
+                "max_size": int(os.getenv("DATABASE_POOL_MAX_SIZE", 4)),
+                "timeout": float(os.getenv("DATABASE_POOL_TIMEOUT", 10)),
+                "max_idle": float(os.getenv("DATABASE_POOL_MAX_IDLE", 300)),
+            }
+        }
+    else:
+        DATABASES["default"]["CONN_MAX_AGE"] = int(
+            os.getenv("DATABASE_CONN_MAX_AGE", 60)
+        )
+    # Log pool/connection stats every N requests or Celery tasks (0 disables)
+    DATABASE_POOL_STATS_EVERY = int(os.getenv("DATABASE_POOL_STATS_EVERY", 500))
+
+    # Read replicas (comma separated hosts), used for safe API/HTML reads only
+    REPLICA_DATABASES = []
+    for index, host in enumerate(
+        filter(None, (read_secret("DATABASE_REPLICA_HOSTS") or "").split(",")),
+        start=1,
+    ):
+        DATABASES[f"replica{index}"] = {
+            **DATABASES["default"],
+            "HOST": host.strip(),
+            "TEST": {"MIRROR": "default"},
+        }
+        REPLICA_DATABASES.append(f"replica{index}")
+
+    DATABASE_ROUTERS = ["config.db_router.PrimaryReplicaRouter"]
+    REPLICA_READ_PATHS = ["/api/", "/html/"]
+    # How long a client reads from the primary after a write (replica lag)
+    REPLICA_PIN_SECONDS = int(os.getenv("REPLICA_PIN_SECONDS", 10))
+
+    # Request profiling: requests over any threshold (0 disables it) are logged
+    PROFILE_REQUESTS = os.getenv("PROFILE_REQUESTS", "true").lower() == "true"
+    PROFILE_PATHS = ["/api/", "/html/"]
+    PROFILE_SLOW_REQUEST_MS = float(os.getenv("PROFILE_SLOW_REQUEST_MS", 500))
+    PROFILE_MAX_QUERIES = int(os.getenv("PROFILE_MAX_QUERIES", 30))
+    PROFILE_SLOW_QUERY_MS = float(os.getenv("PROFILE_SLOW_QUERY_MS", 100))
+    # Statements kept per request, and share of slow ones that get an EXPLAIN
+    PROFILE_SLOWEST = int(os.getenv("PROFILE_SLOWEST", 5))
+    PROFILE_EXPLAIN_RATE = float(os.getenv("PROFILE_EXPLAIN_RATE", 0.1))
+
     # Password validation
     # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -196,7 +264,81 @@ try:
     CELERY_ACCEPT_CONTENT = ["json"]
     CELERY_TASK_SERIALIZER = "json"
 
-    logger.info("Django settings loaded successfully!")
+    # Each crawl shard starts a Twisted reactor, which can't be restarted, so
+    # shards get their own queue, consumed by workers started with
+    # `-Q crawl_shards --max-tasks-per-child 1`; other tasks keep their process
+    CELERY_TASK_ROUTES = {"crawl_shard": {"queue": "crawl_shards"}}
+
+    # Page listing the top-level categories crawled as separate shards
+    CRAWL_SHOP_URL = os.getenv("CRAWL_SHOP_URL", "https://www.esmerdis.com/shop/")
+
+    # One crawl run at a time: shards renew the run's lease every
+    # CRAWL_HEARTBEAT_INTERVAL seconds, a lease not renewed for CRAWL_LEASE_TTL
+    # seconds is taken over. A run started while another is active is skipped,
+    # or with CRAWL_OVERLAP=queue retried every CRAWL_QUEUE_DELAY seconds.
+    CRAWL_LEASE = "catalog"
+    CRAWL_LEASE_TTL = int(os.getenv("CRAWL_LEASE_TTL", 5 * 60))
+    CRAWL_HEARTBEAT_INTERVAL = int(os.getenv("CRAWL_HEARTBEAT_INTERVAL", 60))
+    CRAWL_OVERLAP = os.getenv("CRAWL_OVERLAP", "skip")
+    CRAWL_QUEUE_DELAY = int(os.getenv("CRAWL_QUEUE_DELAY", 5 * 60))
+    CRAWL_QUEUE_RETRIES = int(os.getenv("CRAWL_QUEUE_RETRIES", 12))
+
+    # After a run where every shard finished, available products it did not see
+    # are marked unavailable, unless it saw less than this share of the catalog
+    CRAWL_RECONCILE_MIN_SEEN = float(os.getenv("CRAWL_RECONCILE_MIN_SEEN", 0.8))
+
+    # Dotted paths of callables receiving each batch of `ProductChange`s
+    # drained from the outbox (see apps/crawler_app/outbox.py); without any,
+    # changes are kept in the outbox
+    PRODUCT_CHANGE_HANDLERS = []
+    PRODUCT_CHANGE_BATCH_SIZE = int(os.getenv("PRODUCT_CHANGE_BATCH_SIZE", 500))
+    # Changes older than this (seconds) are pruned, delivered or not (0 keeps
+    # them forever), so the outbox can't grow without bound
+    PRODUCT_CHANGE_RETENTION = int(
+        os.getenv("PRODUCT_CHANGE_RETENTION", 7 * 24 * 60 * 60)
+    )
+
+    # Cache (shared through Redis so the crawler can invalidate API caches)
+    CACHES = {
+        "default": (
+            {
+                "BACKEND": "django.core.cache.backends.redis.RedisCache",
+                "LOCATION": read_secret("REDIS_URL"),
+            }
+            if read_secret("REDIS_URL")
+            else {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+        )
+    }
+
+    # Lower bounds of the price facet buckets (Toman), the last one is open-ended
+    PRODUCT_PRICE_BUCKETS = [0, 5_000_000, 10_000_000, 20_000_000, 50_000_000]
+    FACETS_CACHE_TIMEOUT = int(os.getenv("FACETS_CACHE_TIMEOUT", 60 * 60))
+    # Most frequent values listed per key by /api/products/attributes/
+    PRODUCT_ATTRIBUTE_VALUES = int(os.getenv("PRODUCT_ATTRIBUTE_VALUES", 50))
+
+    BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", 5))
+
+    # Records validated and written per statement by /api/products/bulk/
+    BULK_WRITE_CHUNK_SIZE = int(os.getenv("BULK_WRITE_CHUNK_SIZE", 1000))
+
+    # Description/specification blobs stored or reused this recently (seconds)
+    # are not garbage-collected, their products may still be being written
+    BLOB_GC_GRACE = int(os.getenv("BLOB_GC_GRACE", 60 * 60))
+
+    # Rows fetched per server-side cursor round trip by /api/products/export/
+    EXPORT_CHUNK_SIZE = int(os.getenv("EXPORT_CHUNK_SIZE", 2000))
+
+    # Columnar catalog snapshots written after each crawl (needs pyarrow)
+    SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", os.path.join(BASE_DIR, "snapshots"))
+    SNAPSHOT_FORMAT = os.getenv("SNAPSHOT_FORMAT", "arrow")  # "arrow" or "parquet"
+    SNAPSHOT_KEEP = int(os.getenv("SNAPSHOT_KEEP", 7))
+    SNAPSHOT_CHUNK_SIZE = int(os.getenv("SNAPSHOT_CHUNK_SIZE", 20_000))
+    # Specification keys filled in fewer products stay in the raw JSON column
+    SNAPSHOT_SPEC_MIN_SHARE = float(os.getenv("SNAPSHOT_SPEC_MIN_SHARE", 0.01))
+
+    # HTML product list
+    HTML_PRODUCTS_PER_PAGE = int(os.getenv("HTML_PRODUCTS_PER_PAGE", 24))
+    HTML_FRAGMENT_CACHE_TIMEOUT = int(os.getenv("HTML_FRAGMENT_CACHE_TIMEOUT", 60 * 60))
 
 except Exception as e:
     logger.critical("Failed to load Django settings", exc_info=True)
@@ -21,6 +21,7 @@ from django.views.generic.base import RedirectView
 
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("api/async/", include("apps.api_app.urls_async")),
     path("api/", include("apps.api_app.urls_api")),
     path("html/", include("apps.api_app.urls_html")),
     path("", RedirectView.as_view(url="html/", permanent=True)),
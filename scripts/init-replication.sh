@@ -0,0 +1,3 @@
+#!/bin/bash
+# Allow streaming replication connections to the primary (runs on first init only)
+echo "host replication all all scram-sha-256" >> "$PGDATA/pg_hba.conf"
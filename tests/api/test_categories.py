@@ -1,6 +1,7 @@
 import pytest
 from django.urls import reverse
 from rest_framework.test import APIClient
+from apps.crawler_app.models import Category, Product
 from utils.logging import logger
 
 
@@ -37,3 +38,56 @@ def test_get_categories(api_client):
     assert response.json()["results"] == [], "Expected results to be empty"
 
     logger.info("🎯 Test Passed: Categories API returns expected response!")
+
+
+@pytest.mark.django_db
+def test_category_tree(api_client, django_assert_max_num_queries):
+    """
+    Test the nested category tree endpoint.
+
+    - The whole hierarchy is built from a single query
+    - Nodes carry direct and subtree product counts and their slug path
+    - Creating a category invalidates the cached tree
+    """
+    decoration = Category.objects.create(name="decoration", slug="decoration")
+    bedroom = Category.objects.create(
+        name="decoration>bedroom", slug="bedroom", parent=decoration
+    )
+    Product.objects.create(
+        site_id="1001",
+        title="Bed",
+        original_price=200.0,
+        discount_price=150.0,
+        category=bedroom,
+        url="https://www.esmerdis.com/product/bed/",
+        images=[],
+    )
+    url = reverse("category-tree")
+
+    with django_assert_max_num_queries(1):
+        tree = api_client.get(url).json()
+    assert tree == [
+        {
+            "id": decoration.id,
+            "name": "decoration",
+            "slug": "decoration",
+            "product_count": 0,
+            "path": "decoration",
+            "total_count": 1,
+            "children": [
+                {
+                    "id": bedroom.id,
+                    "name": "decoration>bedroom",
+                    "slug": "bedroom",
+                    "product_count": 1,
+                    "path": "decoration/bedroom",
+                    "total_count": 1,
+                    "children": [],
+                }
+            ],
+        }
+    ]
+
+    Category.objects.create(name="kitchen", slug="kitchen")
+    tree = api_client.get(url).json()
+    assert [node["slug"] for node in tree] == ["decoration", "kitchen"]
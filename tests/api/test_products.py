@@ -0,0 +1,607 @@
+import asyncio
+import csv
+import json
+import threading
+from datetime import timedelta
+from types import SimpleNamespace
+import pytest
+from asgiref.sync import iscoroutinefunction
+from django.http import JsonResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.api_app.export import iterate_in_thread
+from apps.api_app.middleware import BrotliMiddleware
+from apps.crawler_app.models import (
+    Category,
+    DescriptionBlob,
+    TRACKED_FIELDS,
+    Product,
+    ProductChange,
+    SpecificationBlob,
+    delete_orphan_blobs,
+    store_blobs,
+)
+from utils.logging import logger
+
+
+@pytest.fixture
+def api_client():
+    """Fixture to provide an API client for tests."""
+    return APIClient()
+
+
+@pytest.fixture
+def product():
+    """Fixture to provide a single product inside a two-level category."""
+    parent = Category.objects.create(name="decoration", slug="decoration")
+    category = Category.objects.create(
+        name="decoration>bedroom", slug="bedroom", parent=parent
+    )
+    return Product.objects.create(
+        site_id="1001",
+        title="Bed",
+        original_price=200.0,
+        discount_price=150.0,
+        description="A bed",
+        specifications={"Size": {"Width": "160"}},
+        category=category,
+        url="https://www.esmerdis.com/product/bed/",
+        images=["https://www.esmerdis.com/bed.jpg"],
+    )
+
+
+@pytest.mark.django_db
+def test_product_list_conditional_get(api_client, product):
+    """
+    Test conditional GET on the product list.
+
+    - A first request returns 200 with `ETag` and `Last-Modified`
+    - Repeating it with `If-None-Match` returns 304 without a body
+    - Updating a product invalidates the ETag
+    - Renaming its category invalidates the ETag too
+    """
+    url = reverse("product-list")
+    response = api_client.get(url)
+    logger.info(f"✅ Response Status Code: {response.status_code}")
+
+    assert response.status_code == 200, "Expected status code 200 for product API"
+    assert response.has_header("ETag"), "Expected an ETag header"
+    assert response.has_header("Last-Modified"), "Expected a Last-Modified header"
+
+    etag = response["ETag"]
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304, "Expected 304 for an unchanged list"
+
+    product.title = "Double Bed"
+    product.save()
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, "Expected 200 after the product changed"
+    assert response["ETag"] != etag, "Expected a new ETag after the change"
+
+    etag = response["ETag"]
+    product.category.name = "decoration>guest room"
+    product.category.save()
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200, "Expected 200 after the category changed"
+    assert response["ETag"] != etag, "Expected a new ETag after the rename"
+
+
+@pytest.mark.django_db
+def test_product_detail_conditional_get(api_client, product):
+    """
+    Test conditional GET on the product detail endpoint.
+
+    - Matching `If-None-Match` returns 304
+    - A missing product still returns 404
+    """
+    url = reverse("product-detail", args=[product.id])
+    etag = api_client.get(url)["ETag"]
+
+    response = api_client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304, "Expected 304 for an unchanged product"
+
+    response = api_client.get(
+        reverse("product-detail", args=[product.id + 1]), HTTP_IF_NONE_MATCH=etag
+    )
+    assert response.status_code == 404, "Expected 404 for a missing product"
+
+
+@pytest.mark.django_db
+def test_product_list_fast_format_matches_serializer(api_client, product):
+    """
+    Test the opt-in fast list path.
+
+    - `?format=fastjson` returns the same page as the default JSON renderer
+    """
+    url = reverse("product-list")
+    regular = api_client.get(url, {"format": "json"}).json()
+    fast = api_client.get(url, {"format": "fastjson"}).json()
+
+    assert fast["count"] == regular["count"] == 1, "Expected one product"
+    assert fast["results"] == regular["results"], "Expected an identical schema"
+
+
+@pytest.mark.django_db
+def test_product_facets(api_client, product):
+    """
+    Test the facet counts endpoint.
+
+    - Counts are grouped by category, availability, discount and price bucket
+    - Filters narrow the facet counts
+    - A product write invalidates the cached facets
+    """
+    url = reverse("product-facets")
+    response = api_client.get(url)
+    logger.info(f"📄 Response JSON: {response.json()}")
+
+    assert response.status_code == 200, "Expected status code 200 for facets API"
+    facets = response.json()
+    assert facets["count"] == 1, "Expected one product"
+    assert facets["categories"][0]["slug"] == "bedroom"
+    assert facets["has_discount"] == {"true": 1, "false": 0}
+    assert facets["availability"] == {"true": 1, "false": 0}
+    assert sum(bucket["count"] for bucket in facets["price"]) == 1
+
+    response = api_client.get(url, {"has_discount": "false"})
+    assert response.json()["count"] == 0, "Expected filters to apply to facets"
+
+    product.availability = False
+    product.save()
+    facets = api_client.get(url).json()
+    assert facets["availability"] == {"true": 0, "false": 1}, "Expected fresh facets"
+
+
+@pytest.mark.django_db
+def test_product_discount_filters(api_client, product):
+    """
+    Test filtering and ordering on the generated discount columns.
+
+    - `discount_pct` is computed by the database (25% for 200 -> 150)
+    - `min_discount_pct` and `ordering=-discount` use it
+    """
+    Product.objects.create(
+        site_id="1002",
+        title="Chair",
+        original_price=100.0,
+        discount_price=90.0,
+        category=product.category,
+        url="https://www.esmerdis.com/product/chair/",
+        images=[],
+    )
+    url = reverse("product-list")
+
+    results = api_client.get(url, {"ordering": "-discount"}).json()["results"]
+    assert [item["site_id"] for item in results] == ["1001", "1002"]
+    assert results[0]["has_discount"] is True
+    assert results[0]["discount_pct"] == pytest.approx(25.0)
+
+    results = api_client.get(url, {"min_discount_pct": 20}).json()["results"]
+    assert [item["site_id"] for item in results] == ["1001"]
+
+
+@pytest.mark.django_db
+def test_html_product_list_is_paginated(client, product, settings):
+    """
+    Test the HTML product list.
+
+    - Products are paginated with `HTML_PRODUCTS_PER_PAGE`
+    - `ProductFilter` parameters apply to the page
+    - Only the listed filter fields are rendered
+    - Invalid parameters return 400 with the field errors, not all products
+    """
+    settings.HTML_PRODUCTS_PER_PAGE = 1
+    Product.objects.create(
+        site_id="1002",
+        title="Chair",
+        original_price=100.0,
+        discount_price=100.0,
+        category=product.category,
+        url="https://www.esmerdis.com/product/chair/",
+        images=["https://www.esmerdis.com/chair.jpg"],
+    )
+    url = reverse("product_list")
+
+    response = client.get(url)
+    assert response.status_code == 200, "Expected status code 200 for product list"
+    page = response.context["products"]
+    assert page.paginator.num_pages == 2, "Expected one product per page"
+    assert page[0].thumbnail == "https://www.esmerdis.com/bed.jpg"
+
+    response = client.get(url, {"has_discount": "false"})
+    assert [p.title for p in response.context["products"]] == ["Chair"]
+    fields = [field.name for field in response.context["filter_fields"]]
+    assert "name" in fields and "description" not in fields
+
+    response = client.get(url, {"min_price": "cheap"})
+    assert response.status_code == 400, "Expected 400 for an invalid filter"
+    assert not response.context["products"], "Expected no unfiltered products"
+    assert response.context["filter_fields"][2].errors, "Expected the field error"
+
+
+@pytest.mark.django_db
+def test_async_read_endpoints_match_sync_api(api_client, client, product):
+    """
+    Test the async read path.
+
+    - Async product and category lists return the same page as the sync API
+    - Async detail endpoints return the same object or 404
+    - Invalid filters return the same 400 errors as the sync API
+    """
+    for sync_name, async_name in [
+        ("product-list", "async-product-list"),
+        ("category-list", "async-category-list"),
+    ]:
+        expected = api_client.get(reverse(sync_name), {"format": "json"}).json()
+        response = client.get(reverse(async_name))
+        assert response.status_code == 200, f"Expected status code 200 for {async_name}"
+        assert response.json() == expected, f"Expected {async_name} to match the API"
+
+    url = reverse("async-product-detail", args=[product.id])
+    expected = api_client.get(reverse("product-detail", args=[product.id])).json()
+    assert client.get(url).json() == expected
+
+    url = reverse("async-category-detail-by-slug", args=["bedroom"])
+    assert client.get(url).json()["parent_name"] == "decoration"
+
+    url = reverse("async-product-detail", args=[product.id + 1])
+    assert client.get(url).status_code == 404, "Expected 404 for a missing product"
+
+    params = {"min_price": "cheap"}
+    expected = api_client.get(reverse("product-list"), params)
+    response = client.get(reverse("async-product-list"), params)
+    assert response.status_code == 400, "Expected 400 for an invalid filter"
+    assert response.json() == expected.json(), "Expected the API's errors"
+
+
+@pytest.mark.django_db
+def test_product_bulk_write(api_client, product):
+    """
+    Test the bulk write endpoint.
+
+    - NDJSON records are upserted on `site_id` and deleted with `op=delete`
+    - Invalid records are reported per record and skipped
+    - Only the last operation on a `site_id` in a chunk applies, in order
+    """
+    record = {
+        "site_id": "1002",
+        "title": "Chair",
+        "original_price": 100.0,
+        "discount_price": 90.0,
+        "category_id": product.category_id,
+        "url": "https://www.esmerdis.com/product/chair/",
+    }
+    lines = [
+        {"site_id": "1001", "op": "delete"},
+        record,
+        {**record, "site_id": "1001", "title": "Double Bed"},
+        {**record, "site_id": "1003", "category_id": 0},
+        {"site_id": "1002", "op": "delete"},
+    ]
+    body = "\n".join(json.dumps(line) for line in lines)
+    response = api_client.post(
+        reverse("product-bulk"), body, content_type="application/x-ndjson"
+    )
+    logger.info(f"📄 Response JSON: {response.json()}")
+
+    assert response.status_code == 200, "Expected status code 200 for bulk API"
+    summary = response.json()
+    assert [result["status"] for result in summary["results"]] == [
+        "superseded",
+        "superseded",
+        "updated",
+        "error",
+        "deleted",
+    ]
+    assert summary["superseded"] == 2, "Expected superseded records to be counted"
+    assert summary["errors"] == 1, "Expected superseded records not to be errors"
+    assert summary["deleted"] == 1, "Expected deleting a new product to count"
+    assert Product.objects.get(site_id="1001").title == "Double Bed"
+    assert not Product.objects.filter(site_id__in=["1002", "1003"]).exists()
+
+    response = api_client.post(reverse("product-bulk"), [record], format="json")
+    assert response.json()["created"] == 1, "Expected JSON arrays to be accepted"
+
+
+@pytest.mark.django_db
+def test_product_bulk_write_records_changes(api_client, product):
+    """
+    Test the outbox entries of a bulk write.
+
+    - New site_ids are recorded as inserted, existing ones as updated with
+      every tracked field
+    - Deletes are recorded too
+    """
+    ProductChange.objects.all().delete()
+    record = {
+        "site_id": "1002",
+        "title": "Chair",
+        "original_price": 100.0,
+        "discount_price": 90.0,
+        "category_id": product.category_id,
+        "url": "https://www.esmerdis.com/product/chair/",
+    }
+    records = [record, {**record, "site_id": "1001", "title": "Double Bed"}]
+    response = api_client.post(reverse("product-bulk"), records, format="json")
+    assert response.status_code == 200, "Expected status code 200 for bulk API"
+
+    chair = Product.objects.get(site_id="1002")
+    assert {
+        (change.product_id, change.action, tuple(change.fields))
+        for change in ProductChange.objects.all()
+    } == {
+        (chair.pk, "inserted", ()),
+        (product.pk, "updated", tuple(TRACKED_FIELDS)),
+    }
+
+    ProductChange.objects.all().delete()
+    records = [{"site_id": "1002", "op": "delete"}]
+    api_client.post(reverse("product-bulk"), records, format="json")
+    change = ProductChange.objects.get()
+    assert (change.product_id, change.action) == (chair.pk, "deleted")
+
+
+@pytest.mark.django_db
+def test_product_sparse_fieldsets_and_compression(api_client, product):
+    """
+    Test sparse fieldsets and response compression.
+
+    - `?fields=` and `?omit=` select the returned fields (regular and fast path)
+    - Responses are gzip-compressed when the client accepts it
+    """
+    url = reverse("product-list")
+    for renderer in ("json", "fastjson"):
+        params = {"fields": "id,title,category_name", "format": renderer}
+        item = api_client.get(url, params).json()["results"][0]
+        assert item == {
+            "id": product.id,
+            "title": "Bed",
+            "category_name": "decoration>bedroom",
+        }
+
+    item = api_client.get(url, {"omit": "description,specifications"}).json()
+    assert "description" not in item["results"][0]
+    assert "discount_price" in item["results"][0]
+
+    response = api_client.get(url, HTTP_ACCEPT_ENCODING="gzip")
+    assert response["Content-Encoding"] == "gzip", "Expected a gzip response"
+
+
+@pytest.mark.django_db
+def test_product_export_streams_ndjson_and_csv(api_client, product):
+    """
+    Test the streaming catalog export.
+
+    - NDJSON is the default, one product per line with the API schema
+    - `?output=csv` streams a header row and one row per product
+    - Filters and `?fields=` apply to the export
+    """
+    url = reverse("product-export")
+    response = api_client.get(url)
+    assert response.status_code == 200, "Expected status code 200 for export API"
+    assert response.streaming, "Expected a streaming response"
+    lines = b"".join(response.streaming_content).decode().splitlines()
+    expected = api_client.get(reverse("product-list")).json()["results"]
+    assert [json.loads(line) for line in lines] == expected
+
+    response = api_client.get(url, {"output": "csv", "fields": "site_id,images"})
+    rows = list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+    assert rows == [
+        ["site_id", "images"],
+        ["1001", '["https://www.esmerdis.com/bed.jpg"]'],
+    ]
+
+    response = api_client.get(url, {"has_discount": "false"})
+    assert b"".join(response.streaming_content) == b"", "Expected filters to apply"
+
+    response = api_client.get(url, {"output": "xml"})
+    assert response.status_code == 400, "Expected 400 for an unknown output"
+
+
+def test_export_iterates_in_one_thread_under_asgi():
+    """
+    Test the async export body used under ASGI.
+
+    - Chunks are read one at a time, all in the same dedicated thread
+    - The sync generator is closed once the stream ends
+    """
+    threads, closed = [], []
+
+    def chunks():
+        try:
+            for chunk in range(3):
+                threads.append(threading.current_thread().name)
+                yield chunk
+        finally:
+            closed.append(threading.current_thread().name)
+
+    async def consume():
+        return [chunk async for chunk in iterate_in_thread(chunks(), "default")]
+
+    assert asyncio.run(consume()) == [0, 1, 2]
+    assert len(set(threads + closed)) == 1, "Expected a single export thread"
+    assert threads[0].startswith("export")
+
+
+@pytest.mark.django_db
+def test_product_specification_filters_and_attributes(api_client, product):
+    """
+    Test `spec.<group>.<key>` filters and the attributes endpoint.
+
+    - A spec filter matches products whose specifications contain the value
+    - Repeated values of one filter match any of them
+    - The attributes endpoint lists keys and value counts for the filter set
+    """
+    Product.objects.create(
+        site_id="1002",
+        title="Single Bed",
+        original_price=100.0,
+        discount_price=100.0,
+        specifications={"Size": {"Width": "90"}, "Material": {"Frame": "Oak"}},
+        category=product.category,
+        url="https://www.esmerdis.com/product/single-bed/",
+        images=[],
+    )
+    url = reverse("product-list")
+
+    results = api_client.get(url, {"spec.Size.Width": "90"}).json()["results"]
+    assert [item["site_id"] for item in results] == ["1002"]
+
+    response = api_client.get(f"{url}?spec.Size.Width=90&spec.Size.Width=160")
+    assert response.json()["count"] == 2, "Expected repeated values to match any"
+
+    response = api_client.get(url, {"spec.Size.Width": "90", "max_price": 50})
+    assert response.json()["count"] == 0, "Expected spec filters to combine"
+
+    response = api_client.get(reverse("product-attributes"), {"category": "bedroom"})
+    assert response.status_code == 200, "Expected status code 200 for attributes"
+    assert response.json() == [
+        {
+            "group": "Material",
+            "key": "Frame",
+            "param": "spec.Material.Frame",
+            "values": [{"value": "Oak", "count": 1}],
+        },
+        {
+            "group": "Size",
+            "key": "Width",
+            "param": "spec.Size.Width",
+            "values": [{"value": "160", "count": 1}, {"value": "90", "count": 1}],
+        },
+    ]
+
+
+@pytest.mark.django_db
+def test_product_blobs_are_deduplicated(api_client, product):
+    """
+    Test content-addressed description and specification storage.
+
+    - Products with equal content share one blob, whatever the key order
+    - The API reads and writes `description`/`specifications` as before
+    - Unreferenced blobs are removed by `delete_orphan_blobs`
+    """
+    copy = Product.objects.create(
+        site_id="1002",
+        title="Bed copy",
+        original_price=200.0,
+        discount_price=150.0,
+        description="A bed",
+        specifications={"Size": {"Width": "160"}},
+        category=product.category,
+        url="https://www.esmerdis.com/product/bed-copy/",
+        images=[],
+    )
+    assert copy.specifications_blob_id == product.specifications_blob_id
+    assert copy.description_blob_id == product.description_blob_id
+    assert SpecificationBlob.objects.count() == DescriptionBlob.objects.count() == 1
+
+    url = reverse("product-detail", args=[copy.id])
+    response = api_client.patch(
+        url, {"specifications": {"Size": {"Width": "90"}}}, format="json"
+    )
+    assert response.status_code == 200, "Expected status code 200 for update"
+    item = api_client.get(url).json()
+    assert item["specifications"] == {"Size": {"Width": "90"}}
+    assert item["description"] == "A bed"
+
+    Product.objects.filter(pk=product.pk).delete()
+    assert delete_orphan_blobs() == (0, 0), "Expected fresh blobs to be kept"
+    assert delete_orphan_blobs(grace=0) == (0, 1), "Expected the old spec blob removed"
+
+
+@pytest.mark.django_db
+def test_stored_blobs_survive_gc(product):
+    """
+    Test that reusing an orphan blob protects it from the blob GC.
+
+    - `store_blobs` refreshes `touched_at` of blobs that already exist
+    - `delete_orphan_blobs` keeps blobs touched within the grace period
+    """
+    old = timezone.now() - timedelta(days=1)
+    Product.objects.filter(pk=product.pk).delete()
+    SpecificationBlob.objects.update(touched_at=old)
+    DescriptionBlob.objects.update(touched_at=old)
+
+    # A writer stores the blobs again, its product is not written yet
+    pending = Product(description="A bed", specifications={"Size": {"Width": "160"}})
+    store_blobs([pending])
+    assert SpecificationBlob.objects.get().touched_at > old
+    assert delete_orphan_blobs() == (0, 0), "Expected reused blobs to be kept"
+
+
+@pytest.mark.django_db
+def test_brotli_only_compresses_json(api_client, product, monkeypatch):
+    """
+    Test which responses `BrotliMiddleware` compresses.
+
+    - JSON API responses are brotli-encoded for clients accepting `br`
+    - HTML pages (with CSRF tokens) are left to the gzip middleware
+    - `br;q=0` refuses Brotli, `*` accepts it
+    """
+    fake_brotli = SimpleNamespace(compress=lambda data, quality: b"br")
+    monkeypatch.setattr("apps.api_app.middleware.brotli", fake_brotli)
+
+    response = api_client.get("/api/products/", HTTP_ACCEPT_ENCODING="br, gzip")
+    assert response["Content-Encoding"] == "br", "Expected JSON to use Brotli"
+    response = api_client.get("/api/products/", HTTP_ACCEPT_ENCODING="br;q=0, gzip")
+    assert response["Content-Encoding"] == "gzip", "Expected br;q=0 to refuse Brotli"
+    response = api_client.get("/api/products/", HTTP_ACCEPT_ENCODING="*")
+    assert response["Content-Encoding"] == "br", "Expected * to accept Brotli"
+
+    response = api_client.get("/html/product/add/", HTTP_ACCEPT_ENCODING="br, gzip")
+    assert response.status_code == 200, "Expected status code 200 for the form"
+    assert response.get("Content-Encoding") == "gzip", "Expected HTML to use gzip"
+
+
+def test_brotli_middleware_is_async_capable(monkeypatch):
+    """
+    Test `BrotliMiddleware` in an async middleware chain.
+
+    - Below an async view it stays async and compresses the awaited response
+    """
+    monkeypatch.setattr(
+        "apps.api_app.middleware.brotli",
+        SimpleNamespace(compress=lambda data, quality: b"br"),
+    )
+
+    async def view(request):
+        return JsonResponse({"title": "Bed" * 100})
+
+    middleware = BrotliMiddleware(view)
+    assert iscoroutinefunction(middleware), "Expected an async middleware"
+    request = RequestFactory().get("/api/", HTTP_ACCEPT_ENCODING="br")
+    response = asyncio.run(middleware(request))
+    assert response["Content-Encoding"] == "br"
+
+
+@pytest.mark.django_db
+def test_slow_requests_are_profiled(api_client, product, settings, monkeypatch):
+    """
+    Test the query profiling middleware.
+
+    - Requests under every threshold are not logged
+    - Requests over one log their query count, timings and slowest statements,
+      with an `EXPLAIN` plan when sampled
+    """
+    records = []
+    monkeypatch.setattr(
+        logger, "warning", lambda msg, extra=None: records.append((msg, extra))
+    )
+    url = reverse("product-list")
+    settings.PROFILE_SLOW_REQUEST_MS = settings.PROFILE_SLOW_QUERY_MS = 60_000
+    settings.PROFILE_MAX_QUERIES = 50
+    assert api_client.get(url).status_code == 200
+    assert not records, "Expected no log below the thresholds"
+
+    settings.PROFILE_SLOW_QUERY_MS = 0.001
+    settings.PROFILE_EXPLAIN_RATE = 1
+    assert api_client.get(url, {"title": "Bed"}).status_code == 200
+    [(msg, extra)] = records
+    assert msg.startswith("🐢 Slow request GET /api/products/?title=Bed")
+    assert extra["view"] == "product-list"
+    assert extra["exceeded"] == ["slow_query"]
+    assert extra["queries"] == len(extra["slow_queries"]) > 0
+    assert extra["db_ms"] >= extra["slow_queries"][0]["ms"]
+    assert {"view_ms", "render_ms", "total_ms"} <= extra.keys()
+    assert "Scan" in extra["explain"]
@@ -0,0 +1,86 @@
+import pytest
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+from rest_framework.test import APIClient
+from apps.api_app.middleware import PIN_COOKIE, ReplicaRoutingMiddleware
+from apps.crawler_app.models import Product
+from config.db_router import PrimaryReplicaRouter, use_replicas
+
+
+@pytest.fixture
+def replicas(settings):
+    """Fixture to configure two (routing-only) read replicas."""
+    settings.REPLICA_DATABASES = ["replica1", "replica2"]
+    return settings.REPLICA_DATABASES
+
+
+def test_router_reads_from_replica_only_when_enabled(replicas):
+    """
+    Test the primary/replica router.
+
+    - Reads outside `use_replicas()` (Celery, crawler) go to the primary
+    - Reads inside it go to a replica, writes always go to the primary
+    """
+    router = PrimaryReplicaRouter()
+    assert router.db_for_read(Product) == "default"
+
+    with use_replicas():
+        assert router.db_for_read(Product) in replicas
+        assert router.db_for_write(Product) == "default"
+
+    assert router.db_for_read(Product) == "default"
+    assert router.allow_migrate("replica1", "crawler_app") is False
+
+
+def test_middleware_pins_client_to_primary_after_write(replicas):
+    """
+    Test read-your-writes stickiness.
+
+    - Safe API requests read from a replica
+    - A successful POST sets the pin cookie, and pinned requests read from primary
+    """
+    router = PrimaryReplicaRouter()
+    seen = []
+
+    def view(request):
+        seen.append(router.db_for_read(Product))
+        return HttpResponse()
+
+    middleware = ReplicaRoutingMiddleware(view)
+    factory = RequestFactory()
+
+    middleware(factory.get("/api/products/"))
+    response = middleware(factory.post("/html/product/edit/1/"))
+    assert PIN_COOKIE in response.cookies, "Expected a pin cookie after a write"
+
+    pinned = factory.get("/html/product/")
+    pinned.COOKIES[PIN_COOKIE] = "1"
+    middleware(pinned)
+    middleware(factory.get("/admin/"))
+
+    assert seen[0] in replicas, "Expected API reads to use a replica"
+    assert seen[1:] == ["default", "default", "default"]
+
+
+@pytest.mark.django_db
+def test_versioned_cache_fills_read_from_primary(replicas, monkeypatch):
+    """
+    Test where cached summaries are computed.
+
+    - Facets and the category tree are computed on the primary even inside
+      `use_replicas()`, so a lagging replica can't fill the new data version
+    """
+    router = PrimaryReplicaRouter()
+    seen = []
+
+    def compute(*args):
+        seen.append(router.db_for_read(Product))
+        return {}
+
+    monkeypatch.setattr("apps.api_app.views.compute_facets", compute)
+    monkeypatch.setattr("apps.api_app.views.compute_category_tree", compute)
+    client = APIClient()
+    assert client.get(reverse("product-facets")).status_code == 200
+    assert client.get(reverse("category-tree")).status_code == 200
+    assert seen == ["default", "default"]
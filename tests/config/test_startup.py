@@ -0,0 +1,28 @@
+import json
+from benchmarks.bench_startup import (
+    BASELINE,
+    ENTRY_POINTS,
+    find_regressions,
+    measure_entries,
+)
+
+
+def test_startup_has_no_import_regressions():
+    """
+    Test the start-up time of the entry points against the baseline.
+
+    - Import times relative to a bare `import django.db.models` (same run)
+      stay within 50% of `benchmarks/startup_baseline.json`; the wider margin
+      than `bench_startup.py --check` absorbs noise on shared test machines
+    - An entry over the margin is measured again before it counts, so one
+      busy moment does not fail the suite
+    """
+    with open(BASELINE) as file:
+        baseline = json.load(file)
+    assert set(baseline) == set(ENTRY_POINTS), "Expected a baseline per entry point"
+
+    results = measure_entries(list(ENTRY_POINTS), repeat=3)
+    slow = [e for e in results if find_regressions({e: results[e]}, baseline, 0.5)]
+    if slow:
+        results = measure_entries(slow, repeat=5)
+    assert not find_regressions(results, baseline, tolerance=0.5)
@@ -78,6 +78,8 @@ def ensure_test_db():
     """
     test_db_name = settings.DATABASES["default"]["TEST"]["NAME"]
     settings.DATABASES["default"]["NAME"] = test_db_name
+    # Test transactions are invisible to other connections, so read from primary
+    settings.REPLICA_DATABASES = []
     logger.info(f"🔍 Test DB Name: {test_db_name}")
 
     logger.info(f"⚡ Ensuring test database `{test_db_name}` exists...")
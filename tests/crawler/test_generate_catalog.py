@@ -0,0 +1,45 @@
+import io
+import pytest
+from django.core.management import CommandError, call_command
+from rest_framework.test import APIClient
+from apps.crawler_app.models import Category, Product, SpecificationBlob
+
+
+@pytest.mark.django_db
+def test_generate_catalog_command():
+    """
+    Test the synthetic catalog generator.
+
+    - Builds a `depth` x `fanout` category tree with products on its leaves
+    - Products share a limited set of specification blobs
+    - The API filters work on the generated catalog
+    - A second run needs `--clear`, which removes the generated rows
+    """
+    call_command(
+        "generate_catalog",
+        products=120,
+        depth=3,
+        fanout=2,
+        variants=5,
+        chunk_size=50,
+        stdout=io.StringIO(),
+    )
+    assert Category.objects.count() == 2 + 4 + 8
+    assert Product.objects.count() == 120
+    assert not Product.objects.filter(category__subcategories__isnull=False).exists()
+    assert SpecificationBlob.objects.count() <= 5
+
+    root = Category.objects.filter(parent=None).first()
+    response = APIClient().get("/api/products/", {"category": root.slug})
+    assert response.status_code == 200
+    assert (
+        response.json()["count"]
+        == Product.objects.filter(category__parent__parent=root).count()
+        > 0
+    )
+
+    with pytest.raises(CommandError):
+        call_command("generate_catalog", products=10)
+    call_command("generate_catalog", products=0, clear=True, stdout=io.StringIO())
+    assert not Product.objects.exists()
+    assert not Category.objects.exists()
@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import pytest
+from scrapy.exceptions import NotConfigured
+from scrapy.http import HtmlResponse
+from scrapy.utils.test import get_crawler
+from apps.crawler_app.esmerdis_scraper.instrumentation import SamplingProfiler, timed
+from apps.crawler_app.esmerdis_scraper.spiders.products import ProductSpider
+
+LISTING = b"""
+<div class="wd-product" data-id="1001">
+  <h3 class="wd-entities-title"><a href="/product/bed/">Bed</a></h3>
+</div>
+<link rel="next" href="/shop/page/2">
+"""
+
+PRODUCT = """
+<span class="price"><del><span class="woocommerce-Price-amount"><bdi>۲۰۰</bdi></span></del>
+<ins><span class="woocommerce-Price-amount"><bdi>۱۵۰</bdi></span></ins></span>
+""".encode()
+
+
+class Waiter:
+    """A spider stand-in with a timed coroutine."""
+
+    def __init__(self, crawler):
+        self.crawler = crawler
+        self.timings_enabled = True
+
+    @timed
+    async def wait(self):
+        await asyncio.sleep(0.02)
+        return "done"
+
+
+def test_spider_timings_are_recorded_in_stats():
+    """
+    Test the opt-in callback timings.
+
+    - Nothing is recorded unless `SPIDER_TIMINGS` is on
+    - Plain methods, generator callbacks and coroutines record calls, wall/CPU
+      totals and histogram buckets
+    - A coroutine's waits count as wall time but not CPU time
+    """
+    url = "https://www.esmerdis.com/shop/page/1"
+    listing = HtmlResponse(url, body=LISTING, encoding="utf-8")
+    product = HtmlResponse(url, body=PRODUCT, encoding="utf-8")
+
+    crawler = get_crawler(ProductSpider)
+    spider = ProductSpider.from_crawler(crawler)
+    spider.get_price(product)
+    assert not crawler.stats.get_stats()
+
+    crawler = get_crawler(ProductSpider, {"SPIDER_TIMINGS": True})
+    spider = ProductSpider.from_crawler(crawler)
+    assert spider.get_price(product).discount_price == 150
+    assert len(list(spider.parse(listing))) == 2
+    assert asyncio.run(Waiter(crawler).wait()) == "done"
+
+    stats = crawler.stats.get_stats()
+    assert stats["timing/get_price/calls"] == 1
+    assert stats["timing/parse/calls"] == 1
+    parse_buckets = [key for key in stats if key.startswith("timing/parse/wall_ms/")]
+    assert sum(stats[key] for key in parse_buckets) == 1
+    assert stats["timing/wait/calls"] == 1
+    assert stats["timing/wait/wall_s"] >= 0.02
+    assert stats["timing/wait/cpu_s"] < 0.02
+    assert stats["timing/wait/wall_ms/le_50"] == 1
+
+
+def test_sampling_profiler_writes_folded_stacks(tmp_path):
+    """
+    Test the sampling profiler extension.
+
+    - It is disabled unless `SPIDER_PROFILE_FILE` is set
+    - Samples of other threads are written as `thread;outer;...;inner count`
+    """
+    crawler = get_crawler(ProductSpider)
+    with pytest.raises(NotConfigured):
+        SamplingProfiler.from_crawler(crawler)
+
+    path = tmp_path / "crawl.folded"
+    crawler = get_crawler(ProductSpider, {"SPIDER_PROFILE_FILE": str(path)})
+    profiler = SamplingProfiler.from_crawler(crawler)
+
+    stop = threading.Event()
+    worker = threading.Thread(target=stop.wait, name="Worker")
+    worker.start()
+    profiler.sample()
+    profiler.sample()
+    stop.set()
+    worker.join()
+    profiler.write()
+
+    lines = path.read_text().splitlines()
+    [worker_line] = [line for line in lines if line.startswith("Worker;")]
+    stack, count = worker_line.rsplit(" ", 1)
+    assert count == "2"
+    assert "wait (threading.py:" in stack
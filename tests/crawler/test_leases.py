@@ -0,0 +1,57 @@
+from datetime import timedelta
+import pytest
+from celery.exceptions import Retry
+from django.utils import timezone
+from apps.crawler_app import tasks
+from apps.crawler_app.leases import acquire_lease, heartbeat, release_lease
+from apps.crawler_app.models import CrawlLease
+
+
+@pytest.mark.django_db
+def test_crawl_lease():
+    """
+    Test acquiring, renewing, taking over and releasing a crawl lease.
+
+    - Only one run holds the lease at a time
+    - Heartbeats renew it and record progress per shard
+    - An expired lease is taken over, and the old run's heartbeats fail
+    - Releasing frees the lease for the next run
+    """
+    lease, acquired = acquire_lease("catalog", ttl=60)
+    assert acquired
+    active, acquired = acquire_lease("catalog", ttl=60)
+    assert not acquired and active.run_id == lease.run_id
+
+    assert heartbeat("catalog", lease.run_id, key="shard-a", progress={"pages": 3})
+    assert CrawlLease.objects.get().progress == {"shard-a": {"pages": 3}}
+
+    # The worker died: no heartbeat within the TTL
+    CrawlLease.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+    takeover, acquired = acquire_lease("catalog", ttl=60)
+    assert acquired and takeover.run_id != lease.run_id
+    assert takeover.progress == {}
+    assert not heartbeat("catalog", lease.run_id)
+    assert not release_lease("catalog", lease.run_id)
+
+    assert release_lease("catalog", takeover.run_id)
+    assert acquire_lease("catalog", ttl=60)[1]
+
+
+@pytest.mark.django_db
+def test_overlapping_crawl_runs(monkeypatch, settings):
+    """
+    Test starting a crawl while another run is active.
+
+    - The new run is skipped by default
+    - With `CRAWL_OVERLAP = "queue"` it is retried later
+    - No shards are dispatched either way
+    """
+    monkeypatch.setattr(tasks, "chord", lambda header: pytest.fail("dispatched"))
+    lease, _ = acquire_lease(settings.CRAWL_LEASE)
+
+    assert tasks.scrape_products() == (
+        f"Skipped: crawl run {lease.run_id} is still active"
+    )
+    settings.CRAWL_OVERLAP = "queue"
+    with pytest.raises(Retry):
+        tasks.scrape_products()
@@ -0,0 +1,162 @@
+import uuid
+from datetime import timedelta
+import pytest
+from django.utils import timezone
+from apps.crawler_app.models import (
+    Category,
+    Product,
+    ProductChange,
+    mark_unseen_products,
+    save_crawled_products,
+    tracked_values,
+)
+from apps.crawler_app.outbox import drain_changes, prune_changes
+
+
+@pytest.fixture
+def product():
+    category = Category.objects.create(name="decoration", slug="decoration")
+    product = Product.objects.create(
+        site_id="1001",
+        title="Bed",
+        original_price=200.0,
+        discount_price=150.0,
+        description="A bed",
+        specifications={"Size": {"Width": "160"}},
+        category=category,
+        url="https://www.esmerdis.com/product/bed/",
+        images=["https://www.esmerdis.com/bed.jpg"],
+    )
+    ProductChange.objects.all().delete()
+    return Product.objects.get(pk=product.pk)
+
+
+def crawled(product, **values):
+    """The stored product with crawled values assigned, like `process_products`."""
+    before = tracked_values(product)
+    values.setdefault("description", product.description)
+    values.setdefault("specifications", product.specifications)
+    for key, value in values.items():
+        setattr(product, key, value)
+    return product, before
+
+
+@pytest.mark.django_db
+def test_crawl_writes_outbox(product):
+    """
+    Test the outbox entries of a crawl.
+
+    - Unchanged products are only stamped with the run, `updated_at` stays
+    - Changed products record the fields that changed
+    - Inserted products record their new ID
+    - A product another shard inserted in the meantime is recorded as updated
+    - Products marked unavailable record the `availability` change
+    """
+    run_id = uuid.uuid4()
+    updated_at = product.updated_at
+    assert save_crawled_products([], [crawled(product)], run_id) == (0, 0)
+    assert not ProductChange.objects.exists()
+    product.refresh_from_db()
+    assert product.last_seen_run == run_id and product.updated_at == updated_at
+
+    new = Product(
+        site_id="1002",
+        title="Lamp",
+        original_price=50.0,
+        discount_price=50.0,
+        description="A lamp",
+        specifications={},
+        category=product.category,
+        url="https://www.esmerdis.com/product/lamp/",
+        images=[],
+        last_seen_run=run_id,
+    )
+    changes = [crawled(product, discount_price=120.0, description="A large bed")]
+    assert save_crawled_products([new], changes, run_id) == (1, 1)
+    assert {
+        (change.product_id, change.action, tuple(change.fields), change.run_id)
+        for change in ProductChange.objects.all()
+    } == {
+        (product.pk, "updated", ("discount_price", "description"), run_id),
+        (new.pk, "inserted", (), run_id),
+    }
+    product.refresh_from_db()
+    assert product.discount_price == 120.0 and product.updated_at > updated_at
+
+    ProductChange.objects.all().delete()
+    duplicate = Product(
+        site_id="1002",
+        title="Lamp",
+        original_price=40.0,
+        discount_price=40.0,
+        description="A lamp",
+        specifications={},
+        category=product.category,
+        url="https://www.esmerdis.com/product/lamp/",
+        images=[],
+        last_seen_run=run_id,
+    )
+    assert save_crawled_products([duplicate], [], run_id) == (0, 1)
+    change = ProductChange.objects.get()
+    assert (change.product_id, change.action) == (new.pk, "updated")
+    assert "original_price" in change.fields
+    assert Product.objects.get(pk=new.pk).original_price == 40.0
+
+    ProductChange.objects.all().delete()
+    Product.objects.filter(pk=new.pk).update(last_seen_run=None)
+    assert mark_unseen_products(run_id, min_seen=0.5) == 1
+    change = ProductChange.objects.get()
+    assert (change.product_id, change.fields) == (new.pk, ["availability"])
+
+
+@pytest.mark.django_db
+def test_drain_changes(product):
+    """
+    Test draining the outbox.
+
+    - ORM saves and deletes are recorded
+    - Without handlers the changes are kept
+    - Handlers get the changes in batches, oldest first
+    - A failing handler leaves its batch to be delivered again
+    """
+    product.title = "Big bed"
+    product.save(update_fields=["title"])
+    product.delete()
+
+    def failing(changes):
+        raise RuntimeError("index down")
+
+    assert drain_changes(handlers=[]) == 0
+    assert ProductChange.objects.count() == 2
+
+    with pytest.raises(RuntimeError):
+        drain_changes(handlers=[failing])
+    assert ProductChange.objects.count() == 2
+
+    batches = []
+    assert drain_changes(batch_size=1, handlers=[batches.append]) == 2
+    assert [[(c.action, c.fields) for c in batch] for batch in batches] == [
+        [("updated", ["title"])],
+        [("deleted", [])],
+    ]
+    assert not ProductChange.objects.exists()
+
+
+@pytest.mark.django_db
+def test_prune_changes(product):
+    """
+    Test the outbox retention.
+
+    - Changes older than the retention are deleted, delivered or not
+    - A retention of 0 keeps every change
+    """
+    product.title = "Big bed"
+    product.save(update_fields=["title"])
+    product.delete()
+    ProductChange.objects.filter(action="updated").update(
+        created_at=timezone.now() - timedelta(days=8)
+    )
+
+    assert prune_changes(retention=0) == 0
+    assert prune_changes(retention=7 * 24 * 60 * 60) == 1
+    assert list(ProductChange.objects.values_list("action", flat=True)) == ["deleted"]
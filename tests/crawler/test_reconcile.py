@@ -0,0 +1,79 @@
+import uuid
+import pytest
+from apps.crawler_app import tasks
+from apps.crawler_app.leases import acquire_lease
+from apps.crawler_app.models import Category, Product, mark_unseen_products
+
+
+def create_products(count, **fields):
+    category, _ = Category.objects.get_or_create(name="decoration", slug="decoration")
+    start = Product.objects.count()
+    return [
+        Product.objects.create(
+            site_id=str(start + index),
+            title=f"Bed {start + index}",
+            original_price=200.0,
+            discount_price=150.0,
+            category=category,
+            url=f"https://www.esmerdis.com/product/bed-{start + index}/",
+            images=[],
+            **fields,
+        )
+        for index in range(count)
+    ]
+
+
+@pytest.mark.django_db
+def test_mark_unseen_products():
+    """
+    Test reconciling the catalog after a crawl run.
+
+    - A run that saw too little of the catalog changes nothing
+    - Otherwise products not seen by the run are marked unavailable
+    - Products already unavailable are left as they are
+    """
+    run_id = uuid.uuid4()
+    seen = create_products(8, last_seen_run=run_id)
+    unseen = create_products(2, last_seen_run=uuid.uuid4()) + create_products(1)
+    gone = create_products(1, availability=False)
+
+    assert mark_unseen_products(run_id, min_seen=0.9) is None
+    assert Product.objects.filter(availability=True).count() == 11
+
+    assert mark_unseen_products(run_id, min_seen=0.7) == 3
+    assert set(Product.objects.filter(availability=False)) == set(unseen + gone)
+    assert all(Product.objects.filter(pk__in=[p.pk for p in seen], availability=True))
+
+
+@pytest.mark.django_db
+def test_finish_crawl_reconciles_complete_runs(monkeypatch, settings):
+    """
+    Test reconciliation from the chord callback.
+
+    - A run with a failed or unsaved shard does not reconcile
+    - A complete run marks the products it did not see unavailable, even
+      with an empty shard
+    """
+    monkeypatch.setattr(tasks.snapshot_catalog, "delay", lambda: None)
+    monkeypatch.setattr(tasks.drain_product_changes, "delay", lambda: None)
+    settings.CRAWL_RECONCILE_MIN_SEEN = 0.5
+    lease, _ = acquire_lease(settings.CRAWL_LEASE)
+    create_products(3, last_seen_run=lease.run_id)
+    create_products(1)
+    finished = {"shard": "a", "products": 3, "finish_reason": "finished"}
+    incomplete = [
+        {"shard": "b", "finish_reason": "error: boom"},
+        {**finished, "shard": "c", "save_error": "OperationalError()"},
+    ]
+
+    for shard in incomplete:
+        tasks.finish_crawl([finished, shard], str(lease.run_id))
+        assert not Product.objects.filter(availability=False).exists()
+        lease, _ = acquire_lease(settings.CRAWL_LEASE)
+        Product.objects.update(last_seen_run=lease.run_id)
+        create_products(1)
+
+    empty = {**finished, "shard": "d", "products": 0}
+    totals = tasks.finish_crawl([finished, empty], str(lease.run_id))
+    assert (totals["failed"], totals["empty"]) == (0, 1)
+    assert Product.objects.filter(availability=False).count() == 1
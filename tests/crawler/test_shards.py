@@ -0,0 +1,119 @@
+import httpx
+import pytest
+from apps.crawler_app import shards, tasks
+from apps.crawler_app.esmerdis_scraper.spiders.products import ProductSpider
+from apps.crawler_app.models import Category, CrawlLease
+
+MENU = """
+<a href="https://www.esmerdis.com/product-category/decoration/">Decoration</a>
+<a href="/product-category/decoration/bedroom/">Bedroom</a>
+<a href="/product-category/lighting/">Lighting</a>
+<a href="/product-category/lighting/page/2/">Lighting, page 2</a>
+<a href="/shop/">Shop</a>
+"""
+
+
+def test_top_level_category_urls():
+    """
+    Test reading the shards from the shop menu.
+
+    - Only top-level categories become shards, each listed once
+    - A shard's URL is the spider's start URL
+    """
+    urls = shards.top_level_category_urls(MENU, "https://www.esmerdis.com/shop/")
+    assert urls == [
+        "https://www.esmerdis.com/product-category/decoration/",
+        "https://www.esmerdis.com/product-category/lighting/",
+    ]
+    spider = ProductSpider(start_url=urls[0])
+    assert spider.start_urls == [urls[0]]
+
+
+@pytest.mark.django_db
+def test_discover_shards_falls_back_to_root_categories(monkeypatch):
+    """
+    Test shard discovery when the shop can't be reached.
+
+    - Root categories of earlier crawls are used instead
+    - Without categories the whole shop is a single shard
+    """
+
+    def unreachable(*args, **kwargs):
+        raise httpx.ConnectError("unreachable")
+
+    monkeypatch.setattr(shards.httpx, "get", unreachable)
+    assert shards.discover_shards() == ["https://www.esmerdis.com/shop/"]
+
+    root = Category.objects.create(name="decoration", slug="decoration")
+    Category.objects.create(name="decoration>bedroom", slug="bedroom", parent=root)
+    assert shards.discover_shards() == [
+        "https://www.esmerdis.com/product-category/decoration/"
+    ]
+
+
+@pytest.mark.django_db
+def test_scrape_products_dispatches_a_chord(monkeypatch, settings):
+    """
+    Test the coordinator and the chord callback.
+
+    - One `crawl_shard` per shard, with `finish_crawl` as the callback
+    - The run holds the crawl lease until the callback releases it
+    - The callback sums the shard stats and queues a snapshot
+    """
+    urls = ["https://a.test/product-category/x/", "https://a.test/product-category/y/"]
+    dispatched = {}
+
+    def fake_chord(header):
+        dispatched["header"] = list(header)
+        return lambda callback: dispatched.setdefault("callback", callback)
+
+    monkeypatch.setattr(shards, "discover_shards", lambda: urls)
+    monkeypatch.setattr(tasks, "chord", fake_chord)
+    tasks.scrape_products()
+    run_id = str(CrawlLease.objects.get(name=settings.CRAWL_LEASE).run_id)
+    assert [sig.args for sig in dispatched["header"]] == [(url, run_id) for url in urls]
+    assert {sig.task for sig in dispatched["header"]} == {"crawl_shard"}
+    assert dispatched["callback"].task == "finish_crawl"
+    assert dispatched["callback"].args == (run_id,)
+
+    snapshots = []
+    monkeypatch.setattr("apps.crawler_app.models.delete_orphan_blobs", lambda: (0, 0))
+    monkeypatch.setattr(tasks.snapshot_catalog, "delay", lambda: snapshots.append(1))
+    monkeypatch.setattr(tasks.drain_product_changes, "delay", lambda: None)
+    results = [
+        shards.shard_stats(
+            urls[0],
+            {
+                "products/scraped": 3,
+                "products/inserted": 2,
+                "products/updated": 1,
+                "response_received_count": 4,
+                "elapsed_time_seconds": 12.5,
+                "finish_reason": "finished",
+            },
+        ),
+        shards.shard_stats(
+            urls[1],
+            {
+                "products/scraped": 5,
+                "products/updated": 5,
+                "elapsed_time_seconds": 20.0,
+                "finish_reason": "finished",
+            },
+        ),
+        {"shard": "https://a.test/z/", "finish_reason": "error: boom"},
+    ]
+    totals = tasks.finish_crawl(results, run_id)
+    assert totals == {
+        "products": 8,
+        "inserted": 2,
+        "updated": 6,
+        "pages": 4,
+        "errors": 0,
+        "elapsed": 20.0,
+        "shards": 3,
+        "failed": 1,
+        "empty": 0,
+    }
+    assert snapshots == [1]
+    assert CrawlLease.objects.get(name=settings.CRAWL_LEASE).run_id is None
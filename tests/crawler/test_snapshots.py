@@ -0,0 +1,138 @@
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from apps.crawler_app.models import Category, Product
+from apps.crawler_app.snapshots import list_snapshots, prune_snapshots, write_snapshot
+
+
+@pytest.fixture
+def snapshot_dir(settings, tmp_path):
+    """Fixture to write snapshots into a temporary directory."""
+    settings.SNAPSHOT_DIR = str(tmp_path)
+    settings.SNAPSHOT_SPEC_MIN_SHARE = 0.75
+    return tmp_path
+
+
+@pytest.fixture
+def products():
+    """Fixture to provide two products with overlapping specifications."""
+    category = Category.objects.create(name="bedroom", slug="bedroom")
+    for site_id, specifications in [
+        ("1001", {"Size": {"Width": "160", "Height": "1.5"}, "Color": {"Main": "Red"}}),
+        ("1002", {"Size": {"Width": "90", "Height": "2"}}),
+    ]:
+        Product.objects.create(
+            site_id=site_id,
+            title=f"Bed {site_id}",
+            original_price=200.0,
+            discount_price=150.0,
+            specifications=specifications,
+            category=category,
+            url=f"https://www.esmerdis.com/product/{site_id}/",
+            images=["https://www.esmerdis.com/bed.jpg"],
+        )
+
+
+@pytest.mark.django_db
+def test_arrow_snapshot_is_typed_and_memory_mappable(snapshot_dir, products):
+    """
+    Test the Arrow IPC catalog snapshot.
+
+    - Products and categories are written with a manifest
+    - Frequent specification keys become typed columns, rare ones stay in JSON
+    - The file can be opened zero-copy through a memory map
+    """
+    call_command("snapshot_catalog", format="arrow")
+    (manifest,) = list_snapshots()
+    assert manifest["tables"]["products"]["rows"] == 2
+    assert manifest["tables"]["categories"]["rows"] == 1
+    assert manifest["spec_columns"] == ["spec.Size.Height", "spec.Size.Width"]
+
+    path = snapshot_dir / manifest["version"] / "products.arrow"
+    table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+    assert table.schema.field("spec.Size.Width").type == pa.int64()
+    assert table.schema.field("spec.Size.Height").type == pa.float64()
+    assert table.column("spec.Size.Width").to_pylist() == [160, 90]
+    assert table.column("images").to_pylist()[0] == ["https://www.esmerdis.com/bed.jpg"]
+
+
+@pytest.mark.django_db
+def test_parquet_snapshot_download_and_prune(snapshot_dir, products):
+    """
+    Test Parquet snapshots, the download endpoint and pruning.
+
+    - `latest` resolves to the newest snapshot
+    - Only files listed in the manifest can be downloaded
+    - Pruning keeps the newest snapshots only
+    """
+    call_command("snapshot_catalog", format="parquet")
+    (manifest,) = list_snapshots()
+    client = APIClient()
+
+    response = client.get(reverse("snapshot-list"))
+    assert [item["version"] for item in response.json()] == [manifest["version"]]
+
+    url = reverse("snapshot-download", args=["latest", "products.parquet"])
+    response = client.get(url)
+    assert response.status_code == 200, "Expected the latest snapshot file"
+    path = snapshot_dir / "download.parquet"
+    path.write_bytes(b"".join(response.streaming_content))
+    assert pq.read_table(path).num_rows == 2
+
+    url = reverse("snapshot-download", args=["latest", "..%2Fsecret"])
+    assert client.get(url).status_code == 404, "Expected 404 for unknown files"
+
+    older = snapshot_dir / "20000101T000000Z"
+    older.mkdir()
+    (older / "manifest.json").write_text('{"version": "20000101T000000Z"}')
+    assert prune_snapshots(keep=1) == ["20000101T000000Z"]
+    assert not older.exists()
+
+
+@pytest.mark.django_db
+def test_snapshot_download_of_missing_snapshots(snapshot_dir, products):
+    """
+    Test the download endpoint without a matching snapshot.
+
+    - `latest` without snapshots and unknown versions are 404s
+    - So is a file pruned after its manifest was read
+    """
+    client = APIClient()
+    for version in ["latest", "20000101T000000Z"]:
+        url = reverse("snapshot-download", args=[version, "manifest.json"])
+        assert client.get(url).status_code == 404, "Expected 404 without snapshot"
+
+    call_command("snapshot_catalog", format="arrow")
+    (manifest,) = list_snapshots()
+    (snapshot_dir / manifest["version"] / "products.arrow").unlink()
+    url = reverse("snapshot-download", args=["latest", "products.arrow"])
+    assert client.get(url).status_code == 404, "Expected 404 for pruned files"
+
+
+@pytest.mark.django_db
+def test_snapshots_written_in_the_same_second(snapshot_dir, products, monkeypatch):
+    """
+    Test two snapshots written back to back.
+
+    - Both are published under distinct versions
+    - An existing version is never overwritten
+    """
+    first = write_snapshot(fmt="arrow")
+    second = write_snapshot(fmt="arrow")
+    assert first["version"] != second["version"], "Expected distinct versions"
+    assert [manifest["version"] for manifest in list_snapshots()] == [
+        second["version"],
+        first["version"],
+    ]
+
+    now = timezone.now()
+    monkeypatch.setattr("apps.crawler_app.snapshots.timezone.now", lambda: now)
+    write_snapshot(fmt="arrow")
+    with pytest.raises(FileExistsError):
+        write_snapshot(fmt="arrow")
+    assert len(list_snapshots()) == 3, "Expected the existing version to be kept"
+    assert not list(snapshot_dir.glob(".*.tmp")), "Expected staging to be removed"
@@ -0,0 +1,139 @@
+import logging
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from utils.logging import RateLimitFilter, build_rate_limit_filter
+
+
+class FakeClock:
+    """A clock the test moves by hand."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_record(msg, level=logging.INFO, lineno=1, args=(), **extra):
+    record = logging.LogRecord("test", level, "spider.py", lineno, msg, args, None)
+    record.__dict__.update(extra)
+    return record
+
+
+def test_rate_limit_filter_caps_call_sites_and_summarizes(monkeypatch):
+    """
+    Test the per call site rate limit.
+
+    - A call site passes `burst` records per window, other call sites and
+      records with `rate_limit=False` are not held back
+    - Once the window is over the suppressed count is logged as a warning
+    """
+    clock = FakeClock()
+    rate_limit = RateLimitFilter(burst=2, window=60, clock=clock)
+    summaries = []
+    monkeypatch.setattr(
+        logging.Logger, "callHandlers", lambda self, record: summaries.append(record)
+    )
+
+    passed = [rate_limit.filter(make_record("No price found")) for _ in range(5)]
+    assert passed == [True, True, False, False, False]
+    assert rate_limit.filter(make_record("Other site", lineno=2))
+    assert rate_limit.filter(make_record("Failed", level=logging.ERROR, lineno=4))
+    assert all(
+        rate_limit.filter(
+            make_record("Slow", level=logging.WARNING, lineno=3, rate_limit=False)
+        )
+        for _ in range(5)
+    )
+    assert not summaries
+
+    clock.now = 61
+    assert rate_limit.filter(make_record("No price found"))
+    assert len(summaries) == 1
+    assert summaries[0].suppressed == 3
+    assert summaries[0].levelno == logging.WARNING
+    assert "Suppressed 3 similar messages" in summaries[0].getMessage()
+
+    # A call site that went quiet reports on flush
+    for _ in range(3):
+        rate_limit.filter(make_record("Other site", lineno=2))
+    rate_limit.flush()
+    assert [summary.suppressed for summary in summaries] == [3, 1]
+
+
+def test_rate_limit_filter_caps_repeated_warnings(monkeypatch):
+    """
+    Test the rate limit of warnings, e.g. "No original price found" per page.
+
+    - Repeated warnings of one call site pass `burst` times per window
+    - `%`-style templates of one line are limited separately
+    - The summary is a warning with the suppressed count
+    """
+    clock = FakeClock()
+    rate_limit = RateLimitFilter(burst=10, window=60, clock=clock)
+    summaries = []
+    monkeypatch.setattr(
+        logging.Logger, "callHandlers", lambda self, record: summaries.append(record)
+    )
+
+    passed = sum(
+        rate_limit.filter(make_record("No original price found", logging.WARNING))
+        for _ in range(1000)
+    )
+    assert passed == 10, "Expected only the burst of repeated warnings to pass"
+    assert rate_limit.filter(
+        make_record("Bad price %s", logging.WARNING, args=("x",))
+    ), "Expected another template of the same line to pass"
+
+    rate_limit.flush()
+    assert [summary.suppressed for summary in summaries] == [990]
+    assert summaries[0].levelno == logging.WARNING
+
+
+def test_rate_limit_filter_samples_debug_and_info():
+    """
+    Test DEBUG/INFO sampling.
+
+    - The configured rate keeps every n-th record of a call site
+    - `extra={"sample_rate": ...}` overrides it, warnings are not sampled
+      (only rate-limited)
+    - A rate of 0 drops every record
+    """
+    rate_limit = RateLimitFilter(
+        burst=100, sample_rates={logging.INFO: 0.25}, clock=FakeClock()
+    )
+
+    kept = [rate_limit.filter(make_record("Page", logging.INFO)) for _ in range(8)]
+    assert kept == [True, False, False, False] * 2
+
+    kept = [
+        rate_limit.filter(make_record("Item", logging.DEBUG, lineno=2, sample_rate=0.5))
+        for _ in range(4)
+    ]
+    assert kept == [True, False, True, False]
+
+    assert all(
+        rate_limit.filter(make_record("Warn", logging.WARNING, lineno=3))
+        for _ in range(8)
+    )
+
+    rate_limit.sample_rates[logging.INFO] = 0.0
+    assert not any(
+        rate_limit.filter(make_record("Off", logging.INFO, lineno=4)) for _ in range(3)
+    )
+    assert not rate_limit.filter(make_record("Off", lineno=5, sample_rate=0))
+
+
+def test_build_rate_limit_filter_validates_settings(settings):
+    """
+    Test the settings check of the rate limit filter.
+
+    - Sample rates outside [0, 1] and negative bursts are rejected
+    """
+    settings.LOG_SAMPLE_INFO = 2.0
+    with pytest.raises(ImproperlyConfigured):
+        build_rate_limit_filter()
+    settings.LOG_SAMPLE_INFO = 0.0
+    settings.LOG_RATE_LIMIT = -1
+    with pytest.raises(ImproperlyConfigured):
+        build_rate_limit_filter()
@@ -0,0 +1,70 @@
+"""
+Database connection pool instrumentation.
+
+Counts new database connections per alias and, when the psycopg 3 pool is
+enabled, reports its size, utilisation and wait times. Stats are logged every
+`DATABASE_POOL_STATS_EVERY` requests (web) or tasks (Celery).
+
+Usage:
+    from utils.db_pool import pool_stats
+    pool_stats("default")
+"""
+
+import itertools
+from celery.signals import task_postrun
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from utils.logging import logger
+
+connections_opened: dict[str, int] = {}
+_events = itertools.count(1)
+
+
+@receiver(connection_created)
+def count_connection(sender, connection, **kwargs):
+    connections_opened[connection.alias] = (
+        connections_opened.get(connection.alias, 0) + 1
+    )
+
+
+def pool_stats(alias: str = "default") -> dict:
+    """
+    Returns connection stats for a database alias.
+
+    Pool fields are only present when the psycopg 3 pool is enabled:
+    `utilisation` is the share of `max_size` checked out, `requests_wait_ms`
+    the total time callers waited for a connection.
+    """
+    stats = {"alias": alias, "connections_opened": connections_opened.get(alias, 0)}
+    pool = getattr(connections[alias], "pool", None)
+    if pool is None:
+        return stats
+
+    raw = pool.get_stats()
+    in_use = raw.get("pool_size", 0) - raw.get("pool_available", 0)
+    stats.update(
+        pool_size=raw.get("pool_size", 0),
+        pool_max_size=pool.max_size,
+        pool_in_use=in_use,
+        utilisation=round(in_use / pool.max_size, 3),
+        requests_waiting=raw.get("requests_waiting", 0),
+        requests_num=raw.get("requests_num", 0),
+        requests_queued=raw.get("requests_queued", 0),
+        requests_wait_ms=raw.get("requests_wait_ms", 0),
+        requests_errors=raw.get("requests_errors", 0),
+    )
+    return stats
+
+
+@receiver(request_finished)
+@receiver(task_postrun)
+def log_pool_stats(**kwargs):
+    """Logs pool stats for every database alias once per N requests/tasks."""
+    every = settings.DATABASE_POOL_STATS_EVERY
+    if not every or next(_events) % every:
+        return
+    for alias in connections:
+        logger.info("📊 Database pool stats", extra=pool_stats(alias))
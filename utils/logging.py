@@ -5,11 +5,18 @@ This module configures logging with:
 - JSON-formatted logs for file storage
 - Console logs in a human-readable format
 - Rotating file handler to manage log file size
+- A queue, so handlers do their I/O on a background thread
+- Per call site rate limiting and DEBUG/INFO sampling
 
 Features:
 - Logs messages to `logs/trader.log` with automatic rotation.
 - Console logging for real-time debugging.
 - Supports structured logging with extra fields.
+- Logging calls only enqueue the record (`LOG_QUEUE=false` disables it).
+- Repeated warnings are capped per call site (`LOG_RATE_LIMIT`) and
+  summarized as "suppressed N similar messages".
+- Importing the module is cheap: handlers are attached by `django.setup()`
+  through `LOGGING_CONFIG = "utils.logging.configure_logging"`.
 
 Usage:
     from src.logger import logger
@@ -19,14 +26,40 @@ Usage:
 Author: Hesoyam
 """
 
+import atexit
+import copy
 import datetime as dt
 import json
 import logging
-from logging.handlers import RotatingFileHandler
+import logging.config
+import operator
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 import os
+import queue
+import threading
+import time
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 
-LOCAL_TZ = settings.LOCAL_TZ
+try:
+    import orjson
+except ImportError:  # orjson is optional, fall back to the stdlib encoder
+    orjson = None
+
+# Handlers are attached by `configure_logging`, records logged before
+# `django.setup()` only reach Python's last resort handler (warnings and up)
+logger = logging.getLogger("DjangoLogger")
+
+# Attributes every LogRecord has; anything else was passed with `extra=`
+RECORD_ATTRIBUTES = frozenset(
+    logging.LogRecord("", 0, "", 0, "", (), None).__dict__
+) | {"message", "asctime", "taskName"}
+
+
+def _dumps(message: dict) -> str:
+    if orjson is not None:
+        return orjson.dumps(message, default=str).decode()
+    return json.dumps(message, default=str, ensure_ascii=False)
 
 
 class MyJsonFormatter(logging.Formatter):
@@ -42,15 +75,38 @@ class MyJsonFormatter(logging.Formatter):
     - Any extra attributes passed with `logger.info(..., extra={"key": value})`
     """
 
-    def __init__(self, *, fmt_keys: dict[str, str] = None):
+    def __init__(self, *, fmt_keys: dict[str, str] = None, tz=None):
         """
         Initializes the JSON formatter.
 
         Args:
             fmt_keys (dict[str, str]): A mapping of field names to custom keys.
+            tz: Timezone of the timestamps, `LOCAL_TZ` by default.
         """
         super().__init__()
+        self.tz = tz or settings.LOCAL_TZ
         self.fmt_keys = fmt_keys if fmt_keys else {}
+        # Output keys and value getters resolved once instead of per record
+        computed = {
+            "msg": logging.LogRecord.getMessage,
+            "timestamp": lambda record: self._format_time(record.created),
+            "levelname": operator.attrgetter("levelname"),
+            "filename": operator.attrgetter("filename"),
+            "funcName": operator.attrgetter("funcName"),
+            "lineno": operator.attrgetter("lineno"),
+        }
+        self.fields = [
+            (val, computed.pop(key, None) or self._attribute(key))
+            for key, val in self.fmt_keys.items()
+        ]
+        self.fields += list(computed.items())
+        self.reserved = RECORD_ATTRIBUTES | set(self.fmt_keys)
+        self._second = None
+        self._timestamp = None
+
+    @staticmethod
+    def _attribute(key):
+        return lambda record: getattr(record, key, None)
 
     def format(self, record: logging.LogRecord) -> str:
         """
@@ -62,8 +118,17 @@ class MyJsonFormatter(logging.Formatter):
         Returns:
             str: The formatted JSON log entry.
         """
-        message = self._prepare_log_dict(record)
-        return json.dumps(message, default=str)  # Convert dictionary to JSON string
+        return _dumps(self._prepare_log_dict(record))
+
+    def _format_time(self, created: float) -> str:
+        # Records arrive in bursts within the same second, reuse its string
+        second = int(created)
+        if second != self._second:
+            self._timestamp = dt.datetime.fromtimestamp(second, self.tz).strftime(
+                "%Y-%m-%dT%H:%M:%S"
+            )
+            self._second = second
+        return self._timestamp
 
     def _prepare_log_dict(self, record: logging.LogRecord) -> dict:
         """
@@ -75,53 +140,186 @@ class MyJsonFormatter(logging.Formatter):
         Returns:
             dict: The structured log entry.
         """
-        always_keys = {
-            "msg": record.getMessage(),
-            "timestamp": dt.datetime.fromtimestamp(record.created, LOCAL_TZ).strftime(
-                "%Y-%m-%dT%H:%M:%S"
-            ),
-            "levelname": record.levelname,
-            "filename": record.filename,
-            "funcName": record.funcName,
-            "lineno": record.lineno,
-        }
+        message = {key: get(record) for key, get in self.fields}
+
         if record.exc_info:
-            always_keys["exception"] = self.formatException(record.exc_info)
+            message["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            message["exception"] = record.exc_text
         if record.stack_info:
-            always_keys["stack"] = self.formatStack(record.stack_info)
-
-        # Format log message with specified key mappings
-        message = {
-            val: always_keys.pop(key, getattr(record, key, None))
-            for key, val in self.fmt_keys.items()
-        }
-        message.update(always_keys)
+            message["stack"] = self.formatStack(record.stack_info)
 
         # Include extra fields from log record
-        for key, val in record.__dict__.items():
-            if key not in message and key not in self.fmt_keys:
-                message[key] = val
+        for key in record.__dict__.keys() - self.reserved:
+            message.setdefault(key, record.__dict__[key])
 
         return message
 
 
-def setup_logger() -> logging.Logger:
+class StructuredQueueHandler(QueueHandler):
     """
-    Configures the logger with JSON formatting, console logging, and file rotation.
+    Enqueues records for a `QueueListener`, keeping them structured.
 
-    - Logs messages to `logs/trader.log`
-    - Rotates log files when they exceed 5MB (keeps last 3 logs)
-    - Prints logs to the console in human-readable format
+    The stock handler merges the traceback into `msg`; here the message is
+    rendered and the exception kept as `exc_text`, so the JSON formatter on
+    the listener thread still emits a separate `exception` field.
+    """
 
-    Returns
-    -------
-        logging.Logger: The configured logger instance.
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _CallSite:
+    """Counters of one call site for the current window."""
+
+    __slots__ = ("start", "passed", "suppressed", "seen", "last")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.passed = 0
+        self.suppressed = 0
+        self.seen = 0
+        self.last = None
+
+
+class RateLimitFilter(logging.Filter):
     """
-    # Create the logs directory if it doesn't exist
-    log_dir = settings.LOG_DIR  # Get log directory from settings.py
-    if not os.path.exists(log_dir):
-        os.makedirs(log_dir)
+    Rate-limits and samples repetitive records per call site (file and line,
+    and the message template for `%`-style calls).
+
+    - A call site logs at most `burst` records per `window` seconds, whatever
+      their level. The rest are dropped and counted, and once the window is
+      over a "suppressed N similar messages" record (with a `suppressed`
+      field, at WARNING level or above) is logged in their place.
+    - DEBUG/INFO records are sampled too: a call site keeps one record in
+      1/rate, with the rate from `sample_rates` or a per call
+      `extra={"sample_rate": 0.1}`; a rate of 0 drops them all.
+    - Records logged with `extra={"rate_limit": False}` always pass (e.g.
+      slow requests, where one call site reports many distinct problems), and
+      a new call site is never held back.
+    """
+
+    def __init__(
+        self,
+        burst: int = 10,
+        window: float = 60.0,
+        sample_rates: dict[int, float] = None,
+        clock=time.monotonic,
+    ):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.sample_rates = sample_rates or {}
+        self.clock = clock
+        self.sites: dict[tuple[str, int, str | None], _CallSite] = {}
+        self.lock = threading.Lock()
+        self.next_sweep = clock() + window
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "rate_limit", True) is False:
+            return True
+        rate = getattr(record, "sample_rate", None)
+        if record.levelno >= logging.WARNING:
+            rate = 1.0
+        elif rate is None:
+            rate = self.sample_rates.get(record.levelno, 1.0)
+
+        now = self.clock()
+        with self.lock:
+            summaries = self._sweep(now) if now >= self.next_sweep else []
+            # f-strings are rendered already, so only `%` templates tell apart
+            # the messages of one line
+            template = record.msg if record.args else None
+            key = (record.pathname, record.lineno, template)
+            site = self.sites.get(key)
+            if site is None:
+                site = self.sites[key] = _CallSite(now)
+            elif now - site.start >= self.window:
+                if site.suppressed:
+                    summaries.append(self._summary(site))
+                site.start, site.passed, site.suppressed = now, 0, 0
+
+            site.seen += 1
+            keep = rate >= 1 or (rate > 0 and (site.seen - 1) % round(1 / rate) == 0)
+            if keep and site.passed < self.burst:
+                site.passed += 1
+            else:
+                keep = False
+                site.suppressed += 1
+                site.last = record
+
+        for summary in summaries:
+            logging.getLogger(summary.name).callHandlers(summary)
+        return keep
+
+    def flush(self) -> None:
+        """Logs the summaries of every call site with suppressed records."""
+        with self.lock:
+            summaries = self._sweep(None)
+        for summary in summaries:
+            logging.getLogger(summary.name).callHandlers(summary)
+
+    def _sweep(self, now: float | None) -> list[logging.LogRecord]:
+        # Call sites that went quiet still report what they suppressed
+        summaries = []
+        for site in self.sites.values():
+            if site.suppressed and (now is None or now - site.start >= self.window):
+                summaries.append(self._summary(site))
+                site.suppressed = 0
+        if now is not None:
+            self.next_sweep = now + self.window
+        return summaries
+
+    def _summary(self, site: _CallSite) -> logging.LogRecord:
+        last = site.last
+        summary = logging.LogRecord(
+            last.name,
+            max(last.levelno, logging.WARNING),
+            last.pathname,
+            last.lineno,
+            "🔇 Suppressed %d similar messages, last: %s",
+            (site.suppressed, last.getMessage()),
+            None,
+            last.funcName,
+        )
+        summary.suppressed = site.suppressed
+        site.last = None
+        return summary
+
+
+def build_rate_limit_filter() -> RateLimitFilter | None:
+    """The filter configured by the `LOG_RATE_LIMIT*` and `LOG_SAMPLE_*` settings."""
+    burst = getattr(settings, "LOG_RATE_LIMIT", 10)
+    if not burst:
+        return None
+    window = getattr(settings, "LOG_RATE_LIMIT_WINDOW", 60.0)
+    sample_rates = {
+        logging.DEBUG: getattr(settings, "LOG_SAMPLE_DEBUG", 1.0),
+        logging.INFO: getattr(settings, "LOG_SAMPLE_INFO", 1.0),
+    }
+    if burst < 0 or window <= 0:
+        raise ImproperlyConfigured(
+            "LOG_RATE_LIMIT must be >= 0 and LOG_RATE_LIMIT_WINDOW > 0"
+        )
+    if not all(0 <= rate <= 1 for rate in sample_rates.values()):
+        raise ImproperlyConfigured("LOG_SAMPLE_DEBUG/LOG_SAMPLE_INFO must be in [0, 1]")
+    return RateLimitFilter(burst=burst, window=window, sample_rates=sample_rates)
 
+
+def build_handlers(log_dir: str) -> list[logging.Handler]:
+    """
+    Creates the JSON file, warning file and console handlers.
+
+    - Logs messages to `<log_dir>/django.log`
+    - Rotates log files when they exceed 5MB (keeps last 5 logs)
+    - Prints logs to the console in human-readable format
+    """
     log_file = os.path.join(log_dir, "django.log")
     warn_log_file = os.path.join(log_dir, "django_warn.log")
 
@@ -139,12 +337,16 @@ def setup_logger() -> logging.Logger:
     )
 
     # **Rotating File Handler** (max 5MB per log file, keeps 5 backups)
-    file_handler = RotatingFileHandler(log_file, maxBytes=5_000_000, backupCount=5)
+    file_handler = RotatingFileHandler(
+        log_file, maxBytes=5_000_000, backupCount=5, encoding="utf-8"
+    )
     file_handler.setFormatter(json_formatter)
     file_handler.setLevel(logging.DEBUG)
 
     # **Rotating Warn File Handler** for warnings and above
-    warn_handler = RotatingFileHandler(warn_log_file, maxBytes=5_000_000, backupCount=2)
+    warn_handler = RotatingFileHandler(
+        warn_log_file, maxBytes=5_000_000, backupCount=2, encoding="utf-8"
+    )
     warn_handler.setFormatter(json_formatter)
     warn_handler.setLevel(logging.WARNING)
 
@@ -160,16 +362,89 @@ def setup_logger() -> logging.Logger:
     )
     console_handler.setLevel(logging.INFO)
 
+    return [file_handler, warn_handler, console_handler]
+
+
+def start_queue_listener(
+    queue_handler: QueueHandler, handlers: list[logging.Handler]
+) -> QueueListener:
+    """
+    Starts a thread writing the records of `queue_handler` to `handlers`.
+
+    Threads do not survive `fork()` (Celery prefork workers, gunicorn), so a
+    forked child gets a fresh queue and listener of its own.
+    """
+    queue_handler.queue = queue.SimpleQueue()
+    listener = QueueListener(queue_handler.queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(stop_queue_listener, listener)
+    return listener
+
+
+def stop_queue_listener(listener: QueueListener) -> None:
+    """Writes the queued records and stops `listener` (safe to call twice)."""
+    if listener._thread is not None:
+        listener.stop()
+
+
+def setup_logger(use_queue: bool = None) -> logging.Logger:
+    """
+    Configures the logger with JSON formatting, console logging, and file rotation.
+
+    With `use_queue` (the `LOG_QUEUE` setting, on by default) the logger only
+    enqueues records and a `QueueListener` thread runs the handlers, so logging
+    calls never wait on file I/O or rotation. Records pass the
+    `RateLimitFilter` first, so suppressed ones cost neither.
+
+    Returns
+    -------
+        logging.Logger: The configured logger instance.
+    """
+    # Create the logs directory if it doesn't exist
+    log_dir = settings.LOG_DIR  # Get log directory from settings.py
+    if not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+    if use_queue is None:
+        use_queue = getattr(settings, "LOG_QUEUE", True)
+
+    handlers = build_handlers(log_dir)
+
     # Configure the main logger
-    logger = logging.getLogger("DjangoLogger")
     logger.setLevel(logging.DEBUG)  # Capture all levels (DEBUG, INFO, ERROR, etc.)
-    logger.addHandler(file_handler)
-    logger.addHandler(warn_handler)
-    logger.addHandler(console_handler)
-
+    rate_limit = build_rate_limit_filter()
+    if rate_limit is not None:
+        logger.addFilter(rate_limit)
+        os.register_at_fork(
+            after_in_child=lambda: setattr(rate_limit, "lock", threading.Lock())
+        )
+    if not use_queue:
+        for handler in handlers:
+            logger.addHandler(handler)
+    else:
+        queue_handler = StructuredQueueHandler(queue.SimpleQueue())
+        start_queue_listener(queue_handler, handlers)
+        os.register_at_fork(
+            after_in_child=lambda: start_queue_listener(queue_handler, handlers)
+        )
+        logger.addHandler(queue_handler)
+    if rate_limit is not None:
+        # atexit runs last-in first-out: summaries are queued before the
+        # listener stops
+        atexit.register(rate_limit.flush)
     return logger
 
 
-logger = setup_logger()
-# Seprate each run of the program
-logger.info("=" * 100)
+def configure_logging(logging_settings: dict) -> None:
+    """
+    Django's `LOGGING_CONFIG` callable, run by `django.setup()`.
+
+    Applies the `LOGGING` dict, then sets up `logger` once per process (Scrapy
+    and Celery may run `django.setup()` again).
+    """
+    logging.config.dictConfig(logging_settings)
+    if logger.handlers:
+        return
+    setup_logger()
+    # Seprate each run of the program
+    logger.info("=" * 100)
+    logger.info("Django settings loaded successfully!")
@@ -0,0 +1,134 @@
+"""
+Per-request database profiling.
+
+`RequestProfile` wraps every database connection with
+`connection.execute_wrapper()`, counting the statements and their total time
+and keeping only the slowest few, so a profiled request costs two clock reads
+and a heap comparison per query. `QueryProfilingMiddleware` logs the profile
+of requests over the `PROFILE_*` thresholds.
+
+Usage:
+    from utils.profiling import RequestProfile
+    with RequestProfile() as profile:
+        list(Product.objects.all())
+    profile.queries, profile.db_time, profile.slowest()
+"""
+
+import heapq
+import itertools
+import time
+from contextlib import ExitStack
+from django.db import DatabaseError, connections, transaction
+
+
+class RequestProfile:
+    """
+    Collects the queries run on any connection while the profile is active.
+
+    `mark()` splits the elapsed time into a view and a render phase, e.g. when
+    a `TemplateResponse` is about to be rendered; database time is attributed
+    to the phase it was spent in.
+    """
+
+    def __init__(self, keep: int = 5):
+        self.keep = keep
+        self.queries = 0
+        self.db_time = 0.0
+        self.started = self.marked = self.finished = None
+        self.db_time_at_mark = None
+        self._slowest = []  # min-heap of (duration, seq, sql, params, alias)
+        self._seq = itertools.count()
+        self._stack = None
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.queries += 1
+            self.db_time += duration
+            slowest = self._slowest
+            if len(slowest) < self.keep or (slowest and duration > slowest[0][0]):
+                entry = (
+                    duration,
+                    next(self._seq),
+                    sql,
+                    None if many else params,
+                    context["connection"].alias,
+                )
+                if len(slowest) < self.keep:
+                    heapq.heappush(slowest, entry)
+                else:
+                    heapq.heapreplace(slowest, entry)
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.finished = time.perf_counter()
+        self._stack.close()
+
+    def mark(self) -> None:
+        """Ends the view phase (only the first call counts)."""
+        if self.marked is None:
+            self.marked = time.perf_counter()
+            self.db_time_at_mark = self.db_time
+
+    @property
+    def total_time(self) -> float:
+        return (self.finished or time.perf_counter()) - self.started
+
+    def phases(self) -> dict[str, float]:
+        """
+        Milliseconds spent outside the database per phase.
+
+        `view_ms` is the view's own Python time (filtering, serializer `.data`),
+        `render_ms` the renderer or template time after it.
+        """
+        end = self.finished or time.perf_counter()
+        marked = self.marked or end
+        db_at_mark = self.db_time if self.marked is None else self.db_time_at_mark
+        view = marked - self.started - db_at_mark
+        render = end - marked - (self.db_time - db_at_mark)
+        return {
+            "view_ms": round(max(view, 0) * 1000, 2),
+            "render_ms": round(max(render, 0) * 1000, 2),
+        }
+
+    def slowest(self) -> list[dict]:
+        """The slowest statements, slowest first."""
+        return [
+            {
+                "ms": round(duration * 1000, 2),
+                "sql": sql,
+                "params": params,
+                "alias": alias,
+            }
+            for duration, _, sql, params, alias in sorted(self._slowest, reverse=True)
+        ]
+
+
+def explain(statement: dict) -> str | None:
+    """
+    Returns the `EXPLAIN` plan of a statement from `RequestProfile.slowest()`.
+
+    Only plain `SELECT`s are explained (the plan is not executed); errors are
+    rolled back to a savepoint and give `None`.
+    """
+    sql = statement["sql"]
+    if statement["params"] is None and "%s" in sql:
+        return None
+    if not sql.lstrip().upper().startswith("SELECT"):
+        return None
+    try:
+        with transaction.atomic(using=statement["alias"]):
+            with connections[statement["alias"]].cursor() as cursor:
+                cursor.execute(f"EXPLAIN {sql}", statement["params"])
+                return "\n".join(row[0] for row in cursor.fetchall())
+    except DatabaseError:
+        return None